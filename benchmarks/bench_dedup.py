@@ -0,0 +1,68 @@
+# imports
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from dedup import NearDuplicateIndex, SIGNATURE_FORMAT, NUM_HASHES, EMPTY, _band_keys, job_signature
+
+# This file measures near-duplicate lookups (dedup.py) against a large index. The index is filled with
+# random signatures directly (fingerprinting millions of pages would take far longer than the lookups
+# being measured), then distinct job records of a few hundred words are added one at a time, as the
+# BatchWriter does, so each add is a full fingerprint + lookup + insert.
+# Usage: python benchmarks/bench_dedup.py [--records 100000 1000000] [--lookups 2000]
+
+
+def fill(index, records, seed=0):
+    """Insert `records` random signatures into the index."""
+    rng = random.Random(seed)
+    conn = index._conn
+    batch = 10_000
+    for start in range(0, records, batch):
+        rows, bands = [], []
+        for record in range(start + 1, min(start + batch, records) + 1):
+            signature = [rng.randrange(EMPTY) for _ in range(NUM_HASHES)]
+            rows.append((record, f'{record:016x}', SIGNATURE_FORMAT.pack(*signature)))
+            bands.extend((key, record) for key in _band_keys(signature))
+        conn.executemany('INSERT INTO records (id, cluster, signature) VALUES (?, ?, ?)', rows)
+        conn.executemany('INSERT OR IGNORE INTO bands (key, record) VALUES (?, ?)', bands)
+    conn.commit()
+
+
+def random_jobs(count, seed=1, vocabulary_size=5000, words=300):
+    """Return count distinct job details dictionaries with random-word descriptions."""
+    rng = random.Random(seed)
+    vocabulary = [f'word{i}' for i in range(vocabulary_size)]
+    return [{'job_title': f'Job {i}', 'employer': f'Employer {i % 97}',
+             'description': ' '.join(rng.choice(vocabulary) for _ in range(words))} for i in range(count)]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark near-duplicate lookups against a large index.')
+    parser.add_argument('--records', type=int, nargs='+', default=[100_000], help='index sizes to test')
+    parser.add_argument('--lookups', type=int, default=2000, help='records added (and looked up) per size')
+    args = parser.parse_args()
+
+    jobs = random_jobs(args.lookups)
+    start = time.perf_counter()
+    for job in jobs:
+        job_signature(job)
+    print(f"Fingerprinting alone: {(time.perf_counter() - start) / len(jobs) * 1000:.3f} ms per record")
+    print(f"{'records':>10}{'fill s':>9}{'add p50 ms':>12}{'add p99 ms':>12}")
+    for records in args.records:
+        with tempfile.TemporaryDirectory() as tmp_dir, \
+                NearDuplicateIndex(os.path.join(tmp_dir, 'dedup.db')) as index:
+            start = time.perf_counter()
+            fill(index, records)
+            fill_seconds = time.perf_counter() - start
+
+            timings = []
+            for i in range(args.lookups):
+                start = time.perf_counter()
+                index.add(jobs[i])
+                timings.append(time.perf_counter() - start)
+            timings.sort()
+            p50, p99 = timings[len(timings) // 2], timings[int(len(timings) * 0.99)]
+            print(f"{records:>10}{fill_seconds:>9.1f}{p50 * 1000:>12.3f}{p99 * 1000:>12.3f}")
@@ -0,0 +1,44 @@
+# imports
+import argparse
+import logging
+import sys
+import os
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+from scraper import parse_job_html
+from synthetic import build_job_page
+
+# This file benchmarks the BeautifulSoup and lxml extraction backends on a Monster-sized job page, and the
+# JSON-LD fast path (jsonld.py) that parse_job_html tries first on pages embedding a JobPosting block.
+# Usage: python benchmarks/bench_extract.py [--pages 200]
+
+
+def bench(backend, page, pages):
+    """Return pages/second for extracting `pages` copies of page with the given backend."""
+    start = time.perf_counter()
+    for _ in range(pages):
+        parse_job_html(page, backend=backend)
+    return pages / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the bs4 and lxml extraction backends and the JSON-LD fast path.')
+    parser.add_argument('--pages', type=int, default=200, help='pages parsed per backend')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)  # Per-page logging would dominate the timings
+    page = build_job_page()
+    assert parse_job_html(page, backend='bs4') == parse_job_html(page, backend='lxml')
+
+    print(f"Page size: {len(page) / 1024:.0f} KiB, {args.pages} pages per backend")
+    results = {backend: bench(backend, page, args.pages) for backend in ('bs4', 'lxml')}
+    for backend, rate in results.items():
+        print(f"{backend:>5}: {rate:8.1f} pages/s")
+    print(f"lxml speedup: {results['lxml'] / results['bs4']:.1f}x")
+
+    # The same page with a JobPosting block: every field comes from the JSON-LD, so no DOM is built
+    jsonld_page = build_job_page(jsonld=True)
+    assert parse_job_html(jsonld_page) == parse_job_html(page, backend='lxml')
+    jsonld_rate = bench(None, jsonld_page, args.pages)
+    print(f"jsonld: {jsonld_rate:7.1f} pages/s ({jsonld_rate / results['lxml']:.1f}x lxml)")
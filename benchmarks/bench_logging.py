@@ -0,0 +1,53 @@
+# imports
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from structured_logging import configure_logging
+
+# This file measures how long the scraping thread spends per per-page log event (structured_logging.py):
+# synchronous text logging as before, asynchronous JSON Lines, and asynchronous JSON Lines with sampling.
+# Console output goes to /dev/null so only the logging work itself is timed.
+# Usage: python benchmarks/bench_logging.py [--events 100000]
+
+MODES = {
+    'sync text': dict(),
+    'async json': dict(structured=True, async_logging=True),
+    'async json 10%': dict(structured=True, async_logging=True, sample_rate=0.1),
+}
+
+
+def log_events(count):
+    """Log count page_fetched events the way the scraper does and return the seconds spent doing it."""
+    start = time.perf_counter()
+    for i in range(count):
+        url = f'https://www.monster.com/job-openings/job-{i}'
+        logging.info("Fetched URL: %s (Attempt %d): HTTP %d, %d bytes", url, 1, 200, 81920,
+                     extra={'event': 'page_fetched', 'url': url, 'stage': 'fetch', 'status': 200, 'attempt': 1,
+                            'duration': 0.25})
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure the per-event cost of logging on the scraping thread.')
+    parser.add_argument('--events', type=int, default=100_000, help='events logged per mode')
+    args = parser.parse_args()
+
+    sys.stdout = open(os.devnull, 'w')  # The console handler writes to stdout
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, options in MODES.items():
+            listener = configure_logging(os.path.join(tmp_dir, 'bench.log'), **options)
+            elapsed = log_events(args.events)
+            drain_start = time.perf_counter()
+            if listener is not None:
+                listener.stop()
+            results.append((name, elapsed, time.perf_counter() - drain_start))
+    sys.stdout = sys.__stdout__
+
+    print(f"{'mode':>16}{'us/event':>10}{'drain s':>10}")
+    for name, elapsed, drain in results:
+        print(f"{name:>16}{elapsed / args.events * 1e6:>10.1f}{drain:>10.2f}")
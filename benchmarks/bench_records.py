@@ -0,0 +1,64 @@
+# imports
+import argparse
+import gc
+import os
+import random
+import sys
+import tracemalloc
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from records import JobBatch, JobRecord
+from synthetic import TITLES, EMPLOYERS, SKILLS, SENTENCES
+
+# This file measures the memory held by a large in-memory batch of job records (records.py): the job
+# details dictionaries the extractors return, the same records as JobRecords, and as a columnar JobBatch.
+# Every string is freshly built, as it is when parsed from a page, so only interning can share them.
+# Usage: python benchmarks/bench_records.py [--records 1000000]
+
+
+def fresh(text):
+    """A new copy of text, as a parser would produce it (not the interned literal)."""
+    return text.encode('utf-8').decode('utf-8')
+
+
+def synthetic_details(count, seed=0):
+    """Yield count job details dictionaries with repeated titles, employers, salaries and skills."""
+    rng = random.Random(seed)
+    salaries = [f'${amount},000' for amount in range(30, 150, 5)] + ['None']
+    for i in range(count):
+        yield {
+            'job_title': fresh(rng.choice(TITLES)),
+            'employer': fresh(f'{rng.choice(EMPLOYERS)} {i % 5000}'),
+            'salary': fresh(rng.choice(salaries)),
+            'description': f'{i} ' + ' '.join(rng.sample(SENTENCES, 2)),
+            'requirements': [fresh(skill) for skill in rng.sample(SKILLS, rng.randint(2, 6))],
+        }
+
+
+def measure(build, count):
+    """Return the MB held by the container build(details) returns."""
+    gc.collect()
+    tracemalloc.start()
+    held = build(synthetic_details(count))
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return size / 1e6
+
+
+def as_batch(details):
+    batch = JobBatch()
+    for job_details in details:
+        batch.append(JobRecord.from_details(job_details))
+    return batch
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure the memory of an in-memory batch of job records.')
+    parser.add_argument('--records', type=int, default=1_000_000, help='records in the batch')
+    args = parser.parse_args()
+
+    print(f"{'container':>16}{'MB':>10}{'bytes/record':>14}")
+    for name, build in (('dicts', list), ('JobRecords', lambda details: [JobRecord.from_details(d) for d in details]),
+                        ('JobBatch', as_batch)):
+        size = measure(build, args.records)
+        print(f"{name:>16}{size:>10.0f}{size * 1e6 / args.records:>14.0f}")
@@ -0,0 +1,47 @@
+# imports
+import argparse
+import re
+import sys
+import os
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from salary import extract_salary_from_text
+
+# This file compares the linear-time salary extractor in salary.py with the regex it replaced, on
+# adversarial descriptions full of "pay" / "rate" words where no salary follows (the worst case for
+# the old pattern's lazy [\s\w]*? and its {1,4}-repeated optional group).
+# Usage: python benchmarks/bench_salary.py [--sizes 1000 5000 20000 50000]
+
+LEGACY_SALARY_PATTERN = re.compile(
+    r'(?i)(compensation|salary|pay|rate)[\s\w]*?(:?|\s) (\$[\d,]+(?:\.\d{2})?)(\s*(?:per|weekly|monthly|yearly|hourly|annually)?\s*){1,4}((hour|week|month|year))?'
+)
+
+
+def adversarial_text(size):
+    """Roughly size characters of keyword-dense text with no salary amount in it."""
+    phrase = 'competitive pay and rate of pay reviewed with salary and compensation per year '
+    return (phrase * (size // len(phrase) + 1))[:size]
+
+
+def best_of(func, text, repeats=3):
+    """Fastest of several runs of func(text), in seconds."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(text)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the salary extractor against the legacy regex.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 20000, 50000],
+                        help='adversarial text lengths in characters')
+    args = parser.parse_args()
+
+    print(f"{'chars':>8}{'legacy regex ms':>18}{'salary.py ms':>15}{'speed-up':>10}")
+    for size in args.sizes:
+        text = adversarial_text(size)
+        legacy = best_of(LEGACY_SALARY_PATTERN.search, text)
+        linear = best_of(extract_salary_from_text, text)
+        print(f"{size:>8}{legacy * 1000:>18.2f}{linear * 1000:>15.2f}{legacy / linear:>9.0f}x")
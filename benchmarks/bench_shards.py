@@ -0,0 +1,78 @@
+# imports
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+from main import main
+from sharding import merge_shards
+from stand_in_server import StandInServer
+
+# This file checks that sharded crawling scales with the number of workers. For each worker count it starts
+# that many main() processes (each with its own politeness budget, as separate machines would have) against
+# one stand-in server, merges their output shards, and reports rows/second.
+# Usage: python benchmarks/bench_shards.py [--workers 1 2 4] [--rate 5]
+
+
+def run_worker(args):
+    """Run one shard of the crawl in this process."""
+    logging.disable(logging.CRITICAL)
+    main(args.index_url, args.tmp_dir, os.path.join(args.tmp_dir, 'jobs.csv'), num_sitemaps=args.sitemaps,
+         urls_per_sitemap=args.urls_per_sitemap, extraction_backend='lxml', rate_limit_calls=args.rate,
+         rate_limit_period=1, sitemap_delay=(0, 0), metrics_summary=None,
+         shard_index=args.shard_index, shard_count=args.shard_count)
+
+
+def run_crawl(server, workers, args):
+    """Crawl the stand-in with `workers` shard processes and return (merged rows, seconds)."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        start = time.perf_counter()
+        processes = [
+            subprocess.Popen([sys.executable, os.path.abspath(__file__), '--worker',
+                              '--index-url', server.index_url, '--tmp-dir', tmp_dir,
+                              '--shard-index', str(shard_index), '--shard-count', str(workers),
+                              '--sitemaps', str(args.sitemaps), '--urls-per-sitemap', str(args.urls_per_sitemap),
+                              '--rate', str(args.rate)])
+            for shard_index in range(workers)
+        ]
+        for process in processes:
+            if process.wait() != 0:
+                raise RuntimeError(f"Shard worker exited with {process.returncode}")
+        elapsed = time.perf_counter() - start
+        rows = merge_shards(os.path.join(tmp_dir, 'jobs.csv'), workers)
+    return rows, elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure how sharded crawling scales with worker processes.')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='worker counts to compare')
+    parser.add_argument('--sitemaps', type=int, default=2)
+    parser.add_argument('--urls-per-sitemap', type=int, default=50)
+    parser.add_argument('--rate', type=int, default=5, help='politeness budget per worker, requests/second')
+    parser.add_argument('--latency', type=float, default=0.02, help='mean stand-in response latency (s)')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--index-url', help=argparse.SUPPRESS)
+    parser.add_argument('--tmp-dir', help=argparse.SUPPRESS)
+    parser.add_argument('--shard-index', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--shard-count', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        sys.exit(0)
+
+    logging.disable(logging.CRITICAL)
+    # One distinct page per URL, so the merge's de-duplication doesn't hide rows
+    with StandInServer(num_sitemaps=args.sitemaps, urls_per_sitemap=args.urls_per_sitemap, latency=args.latency,
+                       corpus_size=args.sitemaps * args.urls_per_sitemap) as server:
+        print(f"{'workers':>8}{'rows':>8}{'seconds':>10}{'rows/s':>10}{'speed-up':>10}")
+        baseline = None
+        for workers in args.workers:
+            rows, elapsed = run_crawl(server, workers, args)
+            throughput = rows / elapsed
+            baseline = baseline or throughput
+            print(f"{workers:>8}{rows:>8}{elapsed:>10.1f}{throughput:>10.1f}{throughput / baseline:>9.1f}x")
@@ -0,0 +1,246 @@
+# imports
+import argparse
+import csv
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+import requests
+import aiohttp
+import sitemap_parser
+from scraper import parse_job_html
+from main import main
+from synthetic import generate_sitemap, build_corpus
+from stand_in_server import StandInServer
+
+# This file is the offline benchmark harness. It measures throughput (items/s), p50/p99 latency per item
+# and peak RSS for download_sitemaps, parse_xml_and_filter_urls, extract_job_details and end-to-end main(),
+# running each benchmark in its own subprocess so peak RSS figures don't bleed into each other.
+#
+# Usage:
+#   python benchmarks/run_benchmarks.py                          # run everything and print a table
+#   python benchmarks/run_benchmarks.py --save baseline.json     # save results
+#   python benchmarks/run_benchmarks.py --compare baseline.json  # fail if throughput drops > 20%
+
+BENCHMARKS = ['download_sitemaps', 'parse_xml_and_filter_urls', 'extract_job_details_bs4',
+              'extract_job_details_lxml', 'main_sync', 'main_async', 'main_pipeline']
+
+# Options that shape the workload, passed on to each benchmark subprocess
+WORKLOAD_OPTIONS = ['sitemaps', 'urls_per_sitemap', 'sitemap_size', 'pages', 'corpus_size', 'latency',
+                    'error_rate', 'throttle_rate', 'backend']
+
+
+def percentile(values, pct):
+    """Return the pct-th percentile of values (nearest-rank)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MiB (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def summarise(name, unit, count, elapsed, latencies):
+    return {
+        'benchmark': name,
+        'unit': unit,
+        'items': count,
+        'seconds': round(elapsed, 3),
+        'items_per_sec': round(count / elapsed, 1) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+
+class HttpLatencyRecorder:
+    """Times every HTTP request made through requests sessions and aiohttp sessions while active."""
+
+    def __init__(self, path_filter):
+        self.path_filter = path_filter
+        self.latencies = []
+
+    def __enter__(self):
+        recorder = self
+        self._requests_request = requests.Session.request
+        self._aiohttp_request = aiohttp.ClientSession._request
+        original_requests_request = self._requests_request
+        original_aiohttp_request = self._aiohttp_request
+
+        def timed_request(session, method, url, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original_requests_request(session, method, url, *args, **kwargs)
+            finally:
+                if recorder.path_filter in str(url):
+                    recorder.latencies.append(time.perf_counter() - start)
+
+        async def timed_aiohttp_request(session, method, url, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await original_aiohttp_request(session, method, url, *args, **kwargs)
+            finally:
+                if recorder.path_filter in str(url):
+                    recorder.latencies.append(time.perf_counter() - start)
+
+        requests.Session.request = timed_request
+        aiohttp.ClientSession._request = timed_aiohttp_request
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        requests.Session.request = self._requests_request
+        aiohttp.ClientSession._request = self._aiohttp_request
+
+
+def bench_download_sitemaps(args, tmp_dir):
+    with StandInServer(num_sitemaps=args.sitemaps, urls_per_sitemap=args.urls_per_sitemap) as server, \
+            HttpLatencyRecorder('/sitemaps/') as recorder:
+        start = time.perf_counter()
+        files = sitemap_parser.download_sitemaps(server.index_url, tmp_dir, num_sitemaps=args.sitemaps,
+                                                 min_delay=0, max_delay=0)
+        elapsed = time.perf_counter() - start
+    return summarise('download_sitemaps', 'sitemaps', len(files), elapsed, recorder.latencies)
+
+
+def bench_parse_xml_and_filter_urls(args, tmp_dir):
+    path = os.path.join(tmp_dir, 'large_sitemap.xml.gz')
+    generate_sitemap(path, 'https://www.monster.com', args.sitemap_size)
+    namespace = {'ns': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
+    cutoff_date = (datetime.now() - timedelta(weeks=1)).date()
+
+    latencies = []
+    count = 0
+    start = last = time.perf_counter()
+    for _ in sitemap_parser.parse_xml_and_filter_urls(path, namespace, cutoff_date, max_urls=args.sitemap_size):
+        now = time.perf_counter()
+        latencies.append(now - last)
+        last = now
+        count += 1
+    elapsed = time.perf_counter() - start
+    return summarise('parse_xml_and_filter_urls', 'urls', count, elapsed, latencies)
+
+
+def bench_extract_job_details(args, backend):
+    corpus = build_corpus(args.corpus_size)
+    latencies = []
+    start = time.perf_counter()
+    for i in range(args.pages):
+        page_start = time.perf_counter()
+        parse_job_html(corpus[i % len(corpus)], backend=backend)
+        latencies.append(time.perf_counter() - page_start)
+    elapsed = time.perf_counter() - start
+    return summarise(f'extract_job_details_{backend}', 'pages', args.pages, elapsed, latencies)
+
+
+def bench_main(args, tmp_dir, mode):
+    output_csv = os.path.join(tmp_dir, 'jobs.csv')
+    with StandInServer(num_sitemaps=args.sitemaps, urls_per_sitemap=args.urls_per_sitemap, latency=args.latency,
+                       error_rate=args.error_rate, throttle_rate=args.throttle_rate) as server, \
+            HttpLatencyRecorder('/job-openings/') as recorder:
+        start = time.perf_counter()
+        main(server.index_url, tmp_dir, output_csv, num_sitemaps=args.sitemaps, async_fetch=(mode == 'async'),
+             pipeline=(mode == 'pipeline'), extraction_backend=args.backend, rate_limit_calls=1_000_000,
+             rate_limit_period=1, sitemap_delay=(0, 0), metrics_summary=os.path.join(tmp_dir, 'run_summary.json'))
+        elapsed = time.perf_counter() - start
+    with open(output_csv, newline='', encoding='utf-8') as f:
+        rows = sum(1 for _ in csv.DictReader(f))
+    return summarise(f'main_{mode}', 'rows', rows, elapsed, recorder.latencies)
+
+
+def run_one(name, args):
+    """Run a single benchmark in this process and return its result dictionary."""
+    logging.disable(logging.CRITICAL)  # Per-page logging would dominate the timings
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if name == 'download_sitemaps':
+            return bench_download_sitemaps(args, tmp_dir)
+        if name == 'parse_xml_and_filter_urls':
+            return bench_parse_xml_and_filter_urls(args, tmp_dir)
+        if name.startswith('extract_job_details_'):
+            return bench_extract_job_details(args, name.rsplit('_', 1)[1])
+        if name.startswith('main_'):
+            return bench_main(args, tmp_dir, name.split('_', 1)[1])
+    raise ValueError(f"Unknown benchmark: {name}")
+
+
+def run_isolated(name, argv):
+    """Run one benchmark in a fresh interpreter so its peak RSS is measured on its own."""
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--only', name, '--json-stdout', *argv],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baseline_path, tolerance):
+    """Return a list of benchmarks whose throughput fell more than tolerance below the baseline."""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {result['benchmark']: result for result in json.load(f)}
+    regressions = []
+    for result in results:
+        previous = baseline.get(result['benchmark'])
+        if previous and previous['items_per_sec'] and result['items_per_sec'] is not None:
+            change = result['items_per_sec'] / previous['items_per_sec'] - 1
+            if change < -tolerance:
+                regressions.append(f"{result['benchmark']}: {previous['items_per_sec']} -> "
+                                   f"{result['items_per_sec']} {result['unit']}/s ({change:+.0%})")
+    return regressions
+
+
+def print_table(results):
+    print(f"{'benchmark':<28}{'items':>8}{'items/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'peak RSS MiB':>14}")
+    for r in results:
+        print(f"{r['benchmark']:<28}{r['items']:>8}{r['items_per_sec'] or '-':>12}{r['p50_ms'] or '-':>10}"
+              f"{r['p99_ms'] or '-':>10}{r['peak_rss_mb']:>14}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Offline throughput benchmarks for the job scraper.')
+    parser.add_argument('--only', choices=BENCHMARKS, action='append', help='run only these benchmarks')
+    parser.add_argument('--sitemaps', type=int, default=5, help='child sitemaps served by the stand-in')
+    parser.add_argument('--urls-per-sitemap', type=int, default=1000)
+    parser.add_argument('--sitemap-size', type=int, default=50000, help='entries in the parsing benchmark sitemap')
+    parser.add_argument('--pages', type=int, default=200, help='pages in the extraction benchmarks')
+    parser.add_argument('--corpus-size', type=int, default=50, help='distinct synthetic job pages')
+    parser.add_argument('--latency', type=float, default=0.05, help='mean stand-in response latency (s)')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--backend', default='lxml', choices=['bs4', 'lxml'], help='extraction backend for main()')
+    parser.add_argument('--save', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='baseline JSON to check for throughput regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed throughput drop vs baseline')
+    parser.add_argument('--json-stdout', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    names = args.only or BENCHMARKS
+    if args.json_stdout:
+        print(json.dumps(run_one(names[0], args)))
+        sys.exit(0)
+
+    # Workload options forwarded to each isolated run
+    forwarded = []
+    for option in WORKLOAD_OPTIONS:
+        forwarded += [f"--{option.replace('_', '-')}", str(getattr(args, option))]
+    results = [run_isolated(name, forwarded) for name in names]
+    print_table(results)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions:
+            print("\nThroughput regressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("\nNo throughput regressions.")
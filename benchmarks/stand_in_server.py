@@ -0,0 +1,158 @@
+# imports
+import argparse
+import gzip
+import io
+import random
+import re
+import socket
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from synthetic import generate_sitemap, generate_sitemap_index, build_corpus
+
+# This file contains a local HTTP stand-in for the job site, serving synthetic sitemaps and job pages
+# with configurable latency, server errors and 429 throttling, so benchmarks never touch the real site.
+# Run it standalone with: python benchmarks/stand_in_server.py --port 8000
+
+
+class StandInServer:
+    """
+    Threaded HTTP server serving a sitemap index, gzipped child sitemaps and job pages.
+
+    Args:
+        num_sitemaps (int): Child sitemaps listed in /sitemap_index.xml.
+        urls_per_sitemap (int): Job URLs in each child sitemap.
+        latency (float): Mean seconds added before each job page response (uniformly 0.5x-1.5x).
+        error_rate (float): Fraction of job page requests answered with 500.
+        throttle_rate (float): Fraction of job page requests answered with 429 and Retry-After.
+        retry_after (int): Value of the Retry-After header on 429 responses.
+        corpus_size (int): Distinct job pages generated; job ids reuse them modulo this size.
+        port (int): Port to listen on (0 picks a free one).
+    """
+
+    def __init__(self, num_sitemaps=5, urls_per_sitemap=1000, latency=0.05, error_rate=0.0, throttle_rate=0.0,
+                 retry_after=1, corpus_size=50, port=0, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.stats = {'requests': 0, 'job_pages': 0, 'errors': 0, 'throttled': 0, 'not_modified': 0}
+        self.stats_lock = threading.Lock()
+        self.corpus = build_corpus(corpus_size)
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+        self.index = generate_sitemap_index(self.base_url, num_sitemaps)
+        self.sitemaps = {}
+        for i in range(num_sitemaps):
+            buffer = io.BytesIO()
+            generate_sitemap(buffer, self.base_url, urls_per_sitemap, first_id=i * urls_per_sitemap, seed=seed)
+            self.sitemaps[f'/sitemaps/sitemap_{i}.xml.gz'] = buffer.getvalue()
+        self._thread = None
+
+    @property
+    def index_url(self):
+        return f"{self.base_url}/sitemap_index.xml"
+
+    def _count(self, key):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def _roll(self):
+        with self.rng_lock:
+            return self.rng.random(), self.rng.uniform(0.5, 1.5)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-alive, like the real site
+
+            def setup(self):
+                super().setup()
+                # Headers and body go out in separate writes, which Nagle's algorithm would hold back ~40 ms
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def send_body(self, status, body, content_type, extra_headers=()):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in extra_headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                server._count('requests')
+                if self.path == '/sitemap_index.xml':
+                    return self.send_body(200, server.index, 'application/xml')
+
+                if self.path in server.sitemaps:
+                    etag = f'"{self.path}"'
+                    if self.headers.get('If-None-Match') == etag:
+                        server._count('not_modified')
+                        return self.send_body(304, b'', 'application/x-gzip')
+                    return self.send_body(200, server.sitemaps[self.path], 'application/x-gzip', [('ETag', etag)])
+
+                match = re.fullmatch(r'/job-openings/job-(\d+)', self.path)
+                if not match:
+                    return self.send_body(404, b'Not found', 'text/plain')
+
+                server._count('job_pages')
+                roll, jitter = server._roll()
+                time.sleep(server.latency * jitter)
+                if roll < server.throttle_rate:
+                    server._count('throttled')
+                    return self.send_body(429, b'Too many requests', 'text/plain',
+                                          [('Retry-After', str(server.retry_after))])
+                if roll < server.throttle_rate + server.error_rate:
+                    server._count('errors')
+                    return self.send_body(500, b'Server error', 'text/plain')
+
+                page = server.corpus[int(match.group(1)) % len(server.corpus)]
+                if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    return self.send_body(200, gzip.compress(page, compresslevel=5), 'text/html; charset=utf-8',
+                                          [('Content-Encoding', 'gzip')])
+                return self.send_body(200, page, 'text/html; charset=utf-8')
+
+            def log_message(self, format, *args):
+                pass  # Request logging would swamp benchmark output
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve synthetic Monster-style sitemaps and job pages locally.')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--sitemaps', type=int, default=5)
+    parser.add_argument('--urls-per-sitemap', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = StandInServer(args.sitemaps, args.urls_per_sitemap, args.latency, args.error_rate,
+                           args.throttle_rate, port=args.port)
+    print(f"Serving sitemap index at {server.index_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,124 @@
+# imports
+import gzip
+import json
+import random
+from datetime import datetime, timedelta
+
+# This file generates synthetic test data for the benchmarks: Monster-style .xml.gz sitemaps and
+# sitemap indexes, and job pages that use the exact class names extract_job_details targets
+
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+TITLES = ['Software Engineer', 'Data Analyst', 'Registered Nurse', 'Warehouse Associate', 'Account Manager',
+          'Machine Learning Engineer', 'Customer Service Representative', 'Electrician', 'Product Designer']
+EMPLOYERS = ['Tech Corp', 'Acme Health', 'Globex Logistics', 'Initech', 'Umbrella Retail', 'Stark Industries']
+SKILLS = ['Python', 'Django', 'SQL', 'Excel', 'Communication', 'Forklift', 'Patient Care', 'AWS', 'Figma',
+          'Salesforce', 'Java', 'Kubernetes', 'Customer Service', 'Wiring', 'Leadership']
+SENTENCES = [
+    'You will develop and maintain solutions across our platform.',
+    'Work closely with a friendly, collaborative team.',
+    'We offer flexible hours, paid time off and a generous pension.',
+    'Previous experience in a similar role is an advantage.',
+    'Candidates must be eligible to work in the US.',
+]
+
+
+def job_url(base_url, job_id):
+    """Return the URL of a synthetic job page."""
+    return f"{base_url}/job-openings/job-{job_id}"
+
+
+def generate_sitemap(path, base_url, num_urls, first_id=0, days_old=2, stale_fraction=0.1, seed=0):
+    """
+    Write a gzipped <urlset> sitemap of num_urls job URLs to path.
+
+    Most entries have a lastmod within the last days_old days, so they pass the one-week cutoff;
+    stale_fraction of them are a month old and get filtered out.
+    """
+    rng = random.Random(seed + first_id)
+    now = datetime.now()
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}">\n')
+        for job_id in range(first_id, first_id + num_urls):
+            age = timedelta(days=30) if rng.random() < stale_fraction else timedelta(hours=rng.uniform(0, 24 * days_old))
+            lastmod = (now - age).strftime('%Y-%m-%dT%H:%M:%SZ')
+            f.write(f'<url><loc>{job_url(base_url, job_id)}</loc><lastmod>{lastmod}</lastmod></url>\n')
+        f.write('</urlset>\n')
+
+
+def generate_sitemap_index(base_url, num_sitemaps):
+    """Return a sitemap index document (bytes) listing num_sitemaps child sitemaps on base_url."""
+    lastmod = datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ')
+    entries = ''.join(
+        f'<sitemap><loc>{base_url}/sitemaps/sitemap_{i}.xml.gz</loc><lastmod>{lastmod}</lastmod></sitemap>'
+        for i in range(num_sitemaps)
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex xmlns="{SITEMAP_NS}">{entries}</sitemapindex>'.encode()
+
+
+def build_job_page(job_id=0, filler_blocks=400, salary_tag=True, jsonld=False):
+    """
+    Build a realistic (~80 KiB) Monster-style job page as bytes.
+
+    The fields extract_job_details reads sit among navigation, inline scripts and footer markup.
+    Content varies with job_id; pages without a salary tag mention pay in the description instead.
+    With jsonld=True the page also embeds the same job as a schema.org JobPosting JSON-LD block.
+    """
+    rng = random.Random(job_id)
+    title = rng.choice(TITLES)
+    employer = rng.choice(EMPLOYERS)
+    skills = rng.sample(SKILLS, rng.randint(3, 8))
+    salary_thousands = rng.randrange(30, 150)
+    salary = f"{salary_thousands},000 USD per year"
+    description = ''.join(f'<p>{rng.choice(SENTENCES)}</p>' for _ in range(60))
+    if salary_tag:
+        salary_html = (
+            '<ul class="header-style__JobViewHeaderTagsContainer-sc-c5940466-11">'
+            f'<li><span class="indexmodern__TagLabel-sc-6pvrvp-1 bkgNmO ds-tag-label">{salary}</span></li></ul>'
+        )
+    else:
+        salary_html = ''
+        description += f'<p>Annual compensation ${rng.randrange(30, 150)},000 per year.</p>'
+
+    filler_rows = [
+        f'<div class="layout__Row-sc-{i}"><a href="/jobs/{i}">Related job {i}</a><span>Location {i}</span></div>'
+        for i in range(filler_blocks)
+    ]
+    filler = ''.join(filler_rows)
+    nav = ''.join(filler_rows[:filler_blocks // 4])  # Whole rows, so the markup after the nav stays intact
+    if jsonld:
+        posting = {
+            '@context': 'https://schema.org', '@type': 'JobPosting', 'title': title,
+            'hiringOrganization': {'@type': 'Organization', 'name': employer},
+            'description': description, 'skills': skills,
+            'baseSalary': {'@type': 'MonetaryAmount', 'currency': 'USD',
+                           'value': {'@type': 'QuantitativeValue', 'value': salary_thousands * 1000,
+                                     'unitText': 'YEAR'}},
+        }
+        if not salary_tag:
+            del posting['baseSalary']
+        jsonld_html = f'<script type="application/ld+json">{json.dumps(posting)}</script>'
+    else:
+        jsonld_html = ''
+    script = '<script>window.__NEXT_DATA__ = {' + ','.join(f'"k{i}": {i}' for i in range(2000)) + '};</script>'
+    return f'''<!DOCTYPE html>
+    <html><head><title>{title} - {employer}</title>{jsonld_html}{script}<style>.a {{ color: red; }}</style></head>
+    <body>
+        <nav>{nav}</nav>
+        <h2 class="header-style__JobViewHeaderJobName-sc-c5940466-9">{title}</h2>
+        <ul>
+            <li class="header-style__JobViewHeaderCompanyName-sc-c5940466-12">{employer}</li>
+        </ul>
+        {salary_html}
+        <div class="description-styles__DescriptionContainerInner-sc-78eb761c-2">{description}</div>
+        <ul class="skill-list-clamped-styles__SkillsContainerInner-sc-5a5d6754-0">
+            {''.join(f'<li>{skill}</li>' for skill in skills)}
+        </ul>
+        <footer>{filler}</footer>
+    </body></html>'''.encode('utf-8')
+
+
+def build_corpus(num_pages, salary_tag_fraction=0.7):
+    """Return a list of num_pages distinct job pages."""
+    rng = random.Random(num_pages)
+    return [build_job_page(job_id, salary_tag=rng.random() < salary_tag_fraction) for job_id in range(num_pages)]
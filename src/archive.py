@@ -0,0 +1,204 @@
+# imports
+import glob
+import gzip
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import scraper
+from scraper import parse_job_html
+from writers import open_writer, replace_output, staging_path
+from metrics import metrics
+
+# This file contains a compressed archive of every fetched job page, so that when the site's CSS class
+# names change, job details can be re-extracted from the stored HTML at CPU speed instead of re-fetched.
+#
+# Pages are appended to segment files (segment-00000.gz, ...) in a WARC-like layout: each page is its own
+# gzip member holding a one-line JSON header (url, fetched_at) followed by the raw HTML, so any record can
+# be read on its own by seeking to its offset. An SQLite index maps each URL to its segment, offset and length.
+
+SEGMENT_PATTERN = 'segment-{:05d}.gz'
+INDEX_FILE = 'index.sqlite'
+
+
+def read_record(segment_path, offset, length):
+    """Read one archived page and return (header, html_content)."""
+    with open(segment_path, 'rb') as f:
+        f.seek(offset)
+        data = gzip.decompress(f.read(length))
+    header_line, _, html_content = data.partition(b'\n')
+    return json.loads(header_line), html_content
+
+
+class PageArchive:
+    """
+    Append-only archive of raw job page HTML, keyed by URL.
+
+    A page is only stored if it differs from the last version archived for its URL. Segment files
+    roll over once they reach max_segment_bytes. Index writes are committed in batches of
+    commit_every pages (and on close), after the segment data has been flushed. Safe to share
+    between threads.
+    """
+
+    def __init__(self, archive_dir, max_segment_bytes=1024 ** 3, commit_every=100, compresslevel=6):
+        os.makedirs(archive_dir, exist_ok=True)
+        self.archive_dir = archive_dir
+        self.max_segment_bytes = max_segment_bytes
+        self.commit_every = commit_every
+        self.compresslevel = compresslevel
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(archive_dir, INDEX_FILE), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS records (
+                url TEXT NOT NULL,
+                fetched_at TEXT,
+                sha256 TEXT,
+                segment TEXT,
+                offset INTEGER,
+                length INTEGER
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS records_url ON records (url)')
+        self._conn.commit()
+
+        # Carry on appending to the newest segment
+        segments = sorted(glob.glob(os.path.join(archive_dir, 'segment-*.gz')))
+        self._segment_number = len(segments) - 1 if segments else 0
+        self._segment = None
+        self._open_segment()
+
+    def _open_segment(self):
+        if self._segment is not None:
+            self._segment.close()
+        self._segment_name = SEGMENT_PATTERN.format(self._segment_number)
+        self._segment = open(os.path.join(self.archive_dir, self._segment_name), 'ab')
+
+    def store(self, url, html_content, fetched_at=None):
+        """Archive the raw HTML of a fetched page. Returns False if it was unchanged since the last version."""
+        if isinstance(html_content, str):
+            html_content = html_content.encode('utf-8')
+        digest = hashlib.sha256(html_content).hexdigest()
+        fetched_at = fetched_at or datetime.now().isoformat(timespec='seconds')
+        header = json.dumps({'url': url, 'fetched_at': fetched_at}, ensure_ascii=False).encode('utf-8')
+        record = gzip.compress(header + b'\n' + html_content, compresslevel=self.compresslevel)
+
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT sha256 FROM records WHERE url = ? ORDER BY rowid DESC LIMIT 1', (url,)
+            ).fetchone()
+            if row is not None and row[0] == digest:
+                return False
+
+            if self._segment.tell() and self._segment.tell() + len(record) > self.max_segment_bytes:
+                self._segment_number += 1
+                self._open_segment()
+            offset = self._segment.tell()
+            self._segment.write(record)
+            self._conn.execute(
+                'INSERT INTO records (url, fetched_at, sha256, segment, offset, length) VALUES (?, ?, ?, ?, ?, ?)',
+                (url, fetched_at, digest, self._segment_name, offset, len(record))
+            )
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self._commit()
+        metrics.inc('pages_archived')
+        metrics.inc('archive_bytes', len(record))
+        return True
+
+    def _commit(self):
+        # Flush segment data first, so the index never points past the end of a segment
+        self._segment.flush()
+        self._conn.commit()
+        self._pending = 0
+
+    def _locations(self):
+        """(url, segment path, offset, length) of the latest version of every page, in file order."""
+        with self._lock:
+            self._commit()
+            rows = self._conn.execute('''
+                SELECT url, segment, offset, length FROM records
+                WHERE rowid IN (SELECT MAX(rowid) FROM records GROUP BY url)
+                ORDER BY segment, offset
+            ''').fetchall()
+        return [(url, os.path.join(self.archive_dir, segment), offset, length)
+                for url, segment, offset, length in rows]
+
+    def get(self, url):
+        """Return the latest archived HTML for url as bytes, or None."""
+        with self._lock:
+            self._commit()
+            row = self._conn.execute(
+                'SELECT segment, offset, length FROM records WHERE url = ? ORDER BY rowid DESC LIMIT 1', (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        segment, offset, length = row
+        return read_record(os.path.join(self.archive_dir, segment), offset, length)[1]
+
+    def __iter__(self):
+        """Yield (url, html_content) for the latest version of every archived page."""
+        for url, segment_path, offset, length in self._locations():
+            yield url, read_record(segment_path, offset, length)[1]
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(DISTINCT url) FROM records').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._commit()
+            self._segment.close()
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _extract_record(location, backend):
+    """Read and parse one archived page in a worker process."""
+    url, segment_path, offset, length = location
+    try:
+        return parse_job_html(read_record(segment_path, offset, length)[1], backend)
+    except Exception as e:
+        logging.error(f"Error re-extracting {url}: {e}")
+        return None
+
+
+def reextract_archive(archive_dir, output_path, output_format=None, batch_size=500, flush_interval=30,
+                      workers=None, backend=None, chunksize=32):
+    """
+    Run the extraction over every page in an archive, without any network access, and write a fresh output file.
+
+    Worker processes (one per CPU by default) read their pages straight from the segment files, so only
+    file offsets and parsed records cross between processes. The records are written to a side file that
+    then replaces output_path, so the rows of the crawl (or an earlier re-extraction) are not kept.
+    Returns the number of records written.
+    """
+    backend = backend or scraper.EXTRACTION_BACKEND  # Passed explicitly as worker processes don't share globals
+    with PageArchive(archive_dir) as archive:
+        locations = archive._locations()
+    logging.info(f"Re-extracting {len(locations)} archived pages from {archive_dir}")
+
+    with open_writer(staging_path(output_path), output_format, batch_size, flush_interval) as writer, \
+            ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                                mp_context=multiprocessing.get_context('spawn')) as executor:
+        results = executor.map(_extract_record, locations, [backend] * len(locations), chunksize=chunksize)
+        for (url, *_), job_details in zip(locations, results):
+            if job_details:
+                writer.write(job_details)
+            else:
+                logging.warning(f"No details found for archived page {url}. Skipping...")
+    replace_output(writer.sink.path, output_path, output_format)
+    logging.info(f"Re-extracted {writer.rows_written} job records to {output_path}")
+    return writer.rows_written
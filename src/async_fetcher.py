@@ -0,0 +1,217 @@
+# imports
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from urllib.parse import urlsplit
+import aiohttp
+from validators import url as validate_url
+import scraper
+from scraper import parse_job_html
+from retry_queue import PERMANENT_STATUSES
+from http_client import job_page_headers, ResponseTooLarge
+from metrics import metrics
+
+# This file contains an asyncio fetch engine that keeps several job page requests in flight at once,
+# while respecting a per-host concurrency cap and the same global politeness budget as the sync scraper
+
+
+async def read_body_async(response, chunk_size=16 * 1024):
+    """
+    Read a job page body (decoded by aiohttp), raising ResponseTooLarge past scraper.MAX_PAGE_BYTES and
+    stopping early once the job details are in if scraper.STOP_AT_JOB_DETAILS is set (see read_body()).
+    """
+    max_bytes = scraper.MAX_PAGE_BYTES
+    if response.content_length is not None and response.content_length > max_bytes:
+        metrics.inc('responses_too_large', kind='job_page')
+        raise ResponseTooLarge(f"Response body of {response.content_length} bytes is over {max_bytes}")
+    stop_when = scraper.page_stop_condition()
+    content = bytearray()
+    async for chunk in response.content.iter_chunked(chunk_size):
+        content += chunk
+        if len(content) > max_bytes:
+            metrics.inc('responses_too_large', kind='job_page')
+            raise ResponseTooLarge(f"Response body is over {max_bytes} bytes")
+        if stop_when is not None and stop_when(chunk, content):
+            break
+    return bytes(content)
+
+
+class GlobalRateLimiter:
+    """
+    Sliding-window limiter allowing at most `calls` requests per `period` seconds across all hosts.
+
+    Without calls / period it follows scraper.RATE_LIMIT_CALLS / RATE_LIMIT_PERIOD, read on every
+    request so set_rate_limit() applies here too. Request times outlive the event loop, so one
+    limiter can pace several scrape_job_pages() calls (each runs its own loop).
+    """
+
+    def __init__(self, calls=None, period=None):
+        self._calls = calls
+        self._period = period
+        self._timestamps = deque()
+        self._lock = None
+        self._loop = None
+
+    @property
+    def calls(self):
+        return self._calls or scraper.RATE_LIMIT_CALLS
+
+    @property
+    def period(self):
+        return self._period or scraper.RATE_LIMIT_PERIOD
+
+    def _lock_for_loop(self):
+        # asyncio locks belong to one event loop, so each loop gets its own
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._lock, self._loop = asyncio.Lock(), loop
+        return self._lock
+
+    async def wait(self):
+        """Wait until a request slot is free, then claim it."""
+        async with self._lock_for_loop():
+            while True:
+                now = time.monotonic()
+                calls, period = self.calls, self.period
+                while self._timestamps and now - self._timestamps[0] >= period:
+                    self._timestamps.popleft()
+                if len(self._timestamps) < calls:
+                    self._timestamps.append(now)
+                    return
+                # Holding the lock while sleeping keeps waiting requests in arrival order
+                await asyncio.sleep(period - (now - self._timestamps[0]))
+
+
+# The run's politeness budget for async fetches, shared by every scrape_job_pages() call (one per sitemap)
+RATE_LIMITER = GlobalRateLimiter()
+
+
+class AsyncJobFetcher:
+    """Fetches and parses job pages concurrently, capping in-flight requests per host."""
+
+    def __init__(self, session, rate_limiter, per_host_concurrency=4, max_retries=3, delay=2, rate_controller=None):
+        self.session = session
+        self.rate_limiter = rate_limiter
+        self.rate_controller = rate_controller  # Adaptive pacing in place of rate_limiter and the fixed backoff
+        self.per_host_concurrency = per_host_concurrency
+        self.max_retries = max_retries
+        self.delay = delay
+        self._host_semaphores = {}
+
+    def _semaphore_for(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.per_host_concurrency)
+        return self._host_semaphores[host]
+
+    async def fetch_job_details(self, url):
+        """Fetch a job page with retries and return (job_details, status). job_details is None on failure."""
+        if not validate_url(url):
+            logging.error(f"Invalid job page URL: {url}")
+            return None, None
+
+        semaphore = self._semaphore_for(url)
+        controller = self.rate_controller
+        status = None
+        for attempt in range(self.max_retries):
+            responded = False
+            try:
+                async with semaphore:
+                    if controller is not None:
+                        await controller.acquire_async(url)
+                    else:
+                        with metrics.timer('rate_limit_wait'):
+                            await self.rate_limiter.wait()
+                    metrics.inc('fetches', kind='job_page')
+                    start = time.perf_counter()
+                    with metrics.timer('http_fetch'):
+                        async with self.session.get(url, headers=job_page_headers()) as response:
+                            status = response.status
+                            responded = True
+                            metrics.inc('http_responses', kind='job_page', status=status)
+                            if controller is not None:
+                                controller.record(url, status, time.perf_counter() - start,
+                                                  response.headers.get('Retry-After'))
+                            response.raise_for_status()
+                            content = await read_body_async(response)
+                    metrics.inc('bytes_received', len(content), kind='job_page')
+                    logging.info("Fetched URL: %s (Attempt %d): HTTP %d, %d bytes", url, attempt + 1, status,
+                                 len(content), extra={'event': 'page_fetched', 'url': url, 'stage': 'fetch',
+                                                      'status': status, 'attempt': attempt + 1,
+                                                      'duration': time.perf_counter() - start})
+                if scraper.PAGE_ARCHIVE is not None:
+                    scraper.PAGE_ARCHIVE.store(url, content)
+                job_details = parse_job_html(content)
+                logging.info("Successfully scraped job details for %s", url,
+                             extra={'event': 'page_scraped', 'url': url, 'stage': 'parse'})
+                return job_details, status
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logging.error("Error scraping %s. Attempt %d failed: %s", url, attempt + 1, e,
+                              extra={'url': url, 'stage': 'fetch', 'attempt': attempt + 1,
+                                     'status': status if responded else None})
+                if responded and status in PERMANENT_STATUSES:
+                    return None, status  # The page is gone; retrying won't bring it back
+                metrics.inc('retries', kind='job_page')
+                if controller is not None:
+                    if not responded:
+                        controller.record(url, None)  # Connection error or timeout
+                    continue  # The controller has already slowed down (and paused for any Retry-After)
+                # Back off outside the semaphore so other URLs on this host can use the slot
+                with metrics.timer('retry_backoff'):
+                    await asyncio.sleep(self.delay * (2 ** (attempt + 1)) + random.uniform(0, 1) * bool(self.delay))
+            except Exception as e:
+                logging.error(f"An unexpected error occurred while scraping {url}: {e}")
+                return None, status
+
+        logging.error(f"Failed to scrape {url} after {self.max_retries} attempts.")
+        return None, status
+
+
+async def scrape_job_pages_async(urls, on_result, on_failure=None, per_host_concurrency=4, max_concurrency=16,
+                                 calls=None, period=None, max_retries=3, retry_delay=2):
+    """
+    Scrape job pages concurrently and call on_result(url, job_details) for each one that succeeds.
+
+    Args:
+        urls (iterable): Job page URLs. Consumed lazily, so a generator is fine.
+        on_result (callable): Called with (url, job_details) as each page finishes, in completion order.
+        on_failure (callable, optional): Called with (url, status) for pages that could not be scraped.
+            status is the last HTTP status code received, or None if there was no response.
+        per_host_concurrency (int, optional): Maximum requests in flight to any single host.
+        max_concurrency (int, optional): Maximum requests in flight overall.
+        calls (int, optional): Global politeness budget - requests allowed per period. By default
+            the shared RATE_LIMITER applies scraper.RATE_LIMIT_CALLS across every call, so the
+            budget carries over from one sitemap to the next; with calls or period set, this call
+            gets a budget of its own. Not used while an adaptive rate controller is set
+            (scraper.set_rate_controller), which paces each host instead.
+        period (int, optional): Length of the politeness window in seconds. Defaults to scraper.RATE_LIMIT_PERIOD.
+        max_retries (int, optional): Attempts per URL before giving up.
+        retry_delay (int, optional): Base delay in seconds for exponential backoff between attempts.
+    """
+    url_iter = iter(urls)
+    rate_limiter = GlobalRateLimiter(calls, period) if calls or period else RATE_LIMITER
+    connector = aiohttp.TCPConnector(limit=max_concurrency, limit_per_host=per_host_concurrency)
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+        fetcher = AsyncJobFetcher(session, rate_limiter, per_host_concurrency, max_retries, retry_delay,
+                                  rate_controller=scraper.RATE_CONTROLLER)
+
+        async def worker():
+            # Workers share one iterator, so only max_concurrency URLs are pulled ahead of the fetches
+            for url in url_iter:
+                job_details, status = await fetcher.fetch_job_details(url)
+                if job_details:
+                    on_result(url, job_details)
+                else:
+                    logging.warning(f"No details found for {url}. Skipping...")
+                    if on_failure is not None:
+                        on_failure(url, status)
+
+        await asyncio.gather(*(worker() for _ in range(max_concurrency)))
+
+
+def scrape_job_pages(urls, on_result, on_failure=None, **kwargs):
+    """Blocking entry point for scrape_job_pages_async, for use from synchronous code."""
+    asyncio.run(scrape_job_pages_async(urls, on_result, on_failure, **kwargs))
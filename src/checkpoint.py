@@ -0,0 +1,127 @@
+# imports
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from writers import output_position, truncate_output
+
+# This file contains the run journal used to checkpoint and resume long crawls. It is an append-only
+# JSON Lines file, synced to disk after every entry, recording the sitemap files of the run, each batch
+# of URLs whose rows have been flushed to the output (with the output position at that point), URLs
+# that failed, and each sitemap that was finished. Replaying it tells a resumed run exactly what is done.
+
+
+class RunJournal:
+    """
+    Durable progress journal for one crawl.
+
+    With resume=True an existing journal is replayed: `sitemaps` holds the sitemap files of the
+    interrupted run, `completed_sitemaps` and `done_urls` what was finished, and `output_position`
+    the output's position after the last recorded flush (its file size, or its number of Parquet part
+    files; see writers.output_position). Otherwise any previous journal is replaced.
+
+    Attach record_flushed to a BatchWriter's flush_listeners, and mark the writer durable, so URLs
+    are only journalled once their rows are on disk. Safe to share between threads.
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.sitemaps = None
+        self.completed_sitemaps = set()
+        self.done_urls = set()
+        self.output_position = None
+        self._failed = []
+        self._lock = threading.Lock()
+        if resume:
+            if os.path.exists(path):
+                self._replay()
+            else:
+                logging.warning(f"No run journal at {path}. Starting a fresh run...")
+        self._file = open(path, 'a' if resume else 'w', encoding='utf-8')
+
+    @property
+    def resuming(self):
+        """True if an interrupted run was found to resume."""
+        return self.sitemaps is not None
+
+    def _replay(self):
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    logging.warning(f"Ignoring incomplete entry at the end of {self.path}")
+                    break  # Only the last line can be partial, if the process died while writing it
+                event = entry['event']
+                if event == 'start':
+                    self.sitemaps = entry['sitemaps']
+                    self.output_position = entry['output_position']
+                elif event == 'flush':
+                    self.done_urls.update(entry['urls'])
+                    if entry['output_position'] is not None:
+                        self.output_position = entry['output_position']
+                elif event == 'failed':
+                    self.done_urls.update(entry['urls'])
+                elif event == 'sitemap_done':
+                    self.completed_sitemaps.add(entry['file'])
+        logging.info(f"Resuming run from {self.path}: {len(self.completed_sitemaps)} of "
+                     f"{len(self.sitemaps or [])} sitemaps and {len(self.done_urls)} URLs already done")
+
+    def _append(self, entry):
+        entry['at'] = datetime.now().isoformat(timespec='seconds')
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def start(self, sitemaps, output_path, output_format=None):
+        """Record the sitemap files of a new run and the current position of its output."""
+        position = output_position(output_path, output_format)
+        with self._lock:
+            self.sitemaps = list(sitemaps)
+            self.output_position = position
+            self._append({'event': 'start', 'sitemaps': self.sitemaps, 'output_position': position})
+
+    def rollback_output(self, output_path, output_format=None):
+        """Cut the output back to the last journalled flush, dropping rows whose URLs will be fetched again."""
+        if self.output_position is not None:
+            truncate_output(output_path, self.output_position, output_format)
+
+    def is_done(self, url):
+        return url in self.done_urls
+
+    def record_flushed(self, tags, position):
+        """BatchWriter flush listener: journal the URLs of a flushed batch ((url, ...) tags) with the output position."""
+        with self._lock:
+            self._append_failed()
+            urls = [tag[0] for tag in tags]
+            self.done_urls.update(urls)
+            self._append({'event': 'flush', 'urls': urls, 'output_position': position})
+
+    def record_failed(self, url):
+        """Note a URL that could not be scraped. Failures are journalled with the next flush or finished sitemap."""
+        with self._lock:
+            self._failed.append(url)
+
+    def _append_failed(self):
+        if self._failed:
+            self.done_urls.update(self._failed)
+            self._append({'event': 'failed', 'urls': self._failed})
+            self._failed = []
+
+    def sitemap_done(self, sitemap_file):
+        """Record that every URL of a sitemap file has been processed and its rows flushed."""
+        with self._lock:
+            self._append_failed()
+            self.completed_sitemaps.add(sitemap_file)
+            self._append({'event': 'sitemap_done', 'file': sitemap_file})
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,144 @@
+# imports
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from retry_queue import PERMANENT_STATUSES
+from records import JobRecord
+
+# This file contains a persistent SQLite index of crawled job pages, used to skip URLs
+# whose sitemap lastmod hasn't changed since they were last scraped successfully
+
+
+def content_hash(job_details):
+    """Return a stable SHA-256 hash of a job details dictionary (or JobRecord)."""
+    if isinstance(job_details, JobRecord):
+        job_details = job_details.to_details()
+    canonical = json.dumps(job_details, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class CrawlState:
+    """
+    SQLite-backed record of each job URL's sitemap lastmod, fetch time, HTTP status and content hash,
+    plus the index lastmod and ETag / Last-Modified validators of each processed child sitemap.
+
+    Writes are committed in batches of commit_every records (and on close) to keep
+    per-page overhead low. The connection is guarded by a lock so the state can be
+    shared between threads.
+    """
+
+    def __init__(self, db_path, commit_every=100):
+        self.db_path = db_path
+        self.commit_every = commit_every
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                lastmod TEXT,
+                fetched_at TEXT,
+                status INTEGER,
+                content_hash TEXT
+            )
+        ''')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS sitemaps (
+                url TEXT PRIMARY KEY,
+                index_lastmod TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                processed_at TEXT
+            )
+        ''')
+        self._conn.commit()
+        self._staged_sitemaps = {}
+
+    def skip_reason(self, url, lastmod):
+        """
+        Return why a sitemap entry needn't be fetched, from one lookup: 'unchanged' if url was last scraped
+        successfully with the same lastmod, 'gone' if it answered 404 / 410 with the same lastmod, else None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT lastmod, status FROM pages WHERE url = ?', (url,)
+            ).fetchone()
+        if row is None or row[0] != lastmod:
+            return None
+        if row[1] == 200:
+            return 'unchanged'
+        if row[1] in PERMANENT_STATUSES:
+            return 'gone'
+        return None
+
+    def record(self, url, lastmod, status, job_details=None):
+        """Record the outcome of a fetch. status is the HTTP status code, or None if unknown."""
+        digest = content_hash(job_details) if job_details else None
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO pages (url, lastmod, fetched_at, status, content_hash) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (url, lastmod, datetime.now().isoformat(timespec='seconds'), status, digest)
+            )
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self._conn.commit()
+                self._pending = 0
+
+    def record_flushed(self, tags, position=None):
+        """BatchWriter flush listener: record each written (url, lastmod, job_details) tag as a success."""
+        for url, lastmod, job_details in tags:
+            self.record(url, lastmod, 200, job_details)
+
+    def get(self, url):
+        """Return the stored row for url as a dictionary, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT url, lastmod, fetched_at, status, content_hash FROM pages WHERE url = ?', (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('url', 'lastmod', 'fetched_at', 'status', 'content_hash'), row))
+
+    def get_sitemap(self, url):
+        """Return the index lastmod and HTTP validators saved for a child sitemap, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT index_lastmod, etag, last_modified FROM sitemaps WHERE url = ?', (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('index_lastmod', 'etag', 'last_modified'), row))
+
+    def stage_sitemap(self, file_name, url, index_lastmod, etag, last_modified):
+        """Hold a downloaded sitemap's validators until its URLs have been processed."""
+        with self._lock:
+            self._staged_sitemaps[file_name] = (url, index_lastmod, etag, last_modified)
+
+    def mark_sitemap_processed(self, file_name):
+        """Save the staged validators for a sitemap file, so an unchanged copy is skipped next run."""
+        with self._lock:
+            staged = self._staged_sitemaps.pop(file_name, None)
+            if staged is None:
+                return
+            self._conn.execute(
+                'INSERT OR REPLACE INTO sitemaps (url, index_lastmod, etag, last_modified, processed_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (*staged, datetime.now().isoformat(timespec='seconds'))
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
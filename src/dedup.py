@@ -0,0 +1,167 @@
+# imports
+import hashlib
+import re
+import sqlite3
+import struct
+import threading
+
+# This file contains a persistent near-duplicate index for job records. The same job is often reposted
+# under several URLs with small edits (a changed date, a reworded sentence), which exact content hashes
+# miss. Each record gets a MinHash signature of the word shingles of its employer, title and description,
+# from which the Jaccard similarity of two records can be estimated. Signatures are split into BANDS bands
+# and each band is indexed in SQLite (locality-sensitive hashing), so a lookup only compares the few records
+# sharing a band with the new one, however many millions the index holds.
+#
+# The signature uses one-permutation hashing: each shingle is hashed once, and its hash picks one of
+# NUM_HASHES bins and competes for that bin's minimum. That costs one hash per shingle rather than one
+# per shingle per hash function, so fingerprinting a page takes a fraction of a millisecond.
+
+SHINGLE_SIZE = 3  # Words per shingle
+NUM_HASHES = 64
+BANDS = 16
+ROWS = NUM_HASHES // BANDS  # Signature values per band
+BIN_BITS = 6  # log2(NUM_HASHES): the top bits of a shingle hash pick its bin
+VALUE_BITS = 64 - BIN_BITS
+EMPTY = 1 << VALUE_BITS  # Larger than any value, for bins no shingle landed in
+
+WORD_PATTERN = re.compile(r'[^\W_]+')
+SIGNATURE_FORMAT = struct.Struct(f'<{NUM_HASHES}Q')
+
+
+def _hash64(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+
+def minhash(text):
+    """Return the MinHash signature (a list of NUM_HASHES ints) of text's word shingles, or None if it is too short."""
+    words = WORD_PATTERN.findall(text.lower())
+    shingles = {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    if not shingles:
+        return None
+    signature = [EMPTY] * NUM_HASHES
+    value_mask = EMPTY - 1
+    for shingle in shingles:
+        h = _hash64(shingle.encode('utf-8'))
+        position, value = h >> VALUE_BITS, h & value_mask
+        if value < signature[position]:
+            signature[position] = value
+    # Fill empty bins from the next filled one (circularly), so short texts still compare position by position
+    if EMPTY in signature:
+        filled = [i for i, value in enumerate(signature) if value != EMPTY]
+        for i in range(NUM_HASHES):
+            if signature[i] == EMPTY:
+                signature[i] = signature[min(filled, key=lambda j: (j - i) % NUM_HASHES)]
+    return signature
+
+
+def job_signature(job_details):
+    """Return the MinHash signature of a job's employer, title and description, or None."""
+    text = ' '.join(str(job_details.get(key, '')) for key in ('employer', 'job_title', 'description'))
+    return minhash(text)
+
+
+def similarity(signature, other):
+    """Estimate the Jaccard similarity of the shingle sets behind two signatures."""
+    return sum(a == b for a, b in zip(signature, other)) / NUM_HASHES
+
+
+def _band_keys(signature):
+    """Return one 64-bit key per band (signed, for SQLite's INTEGER), hashing the band's values and position."""
+    keys = []
+    for band in range(BANDS):
+        values = signature[band * ROWS:(band + 1) * ROWS]
+        key = _hash64(struct.pack(f'<B{ROWS}Q', band, *values))
+        keys.append(key - (1 << 64) if key >= 1 << 63 else key)
+    return keys
+
+
+class NearDuplicateIndex:
+    """
+    SQLite-backed MinHash-LSH index assigning every job record to a duplicate cluster.
+
+    A record whose estimated Jaccard similarity to one already indexed is at least threshold joins that
+    record's cluster and counts as a near-duplicate; otherwise it starts a new cluster, named after its
+    signature. Additions are only committed by commit(), which the BatchWriter calls after each flush, so
+    the index never gets ahead of the output file (a resumed run doesn't find its own rolled-back rows in it).
+    """
+
+    def __init__(self, db_path, threshold=0.8):
+        self.db_path = db_path
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS records (
+                id INTEGER PRIMARY KEY,
+                cluster TEXT NOT NULL,
+                signature BLOB NOT NULL
+            )
+        ''')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS bands (
+                key INTEGER NOT NULL,
+                record INTEGER NOT NULL,
+                PRIMARY KEY (key, record)
+            ) WITHOUT ROWID
+        ''')
+        self._conn.commit()
+        self._candidates_sql = (
+            'SELECT id, cluster, signature FROM records WHERE id IN '
+            f'(SELECT record FROM bands WHERE key IN ({", ".join("?" * BANDS)}))'
+        )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+
+    def _nearest(self, signature, band_keys):
+        best = None
+        for _, cluster, blob in self._conn.execute(self._candidates_sql, band_keys):
+            score = similarity(signature, SIGNATURE_FORMAT.unpack(blob))
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (cluster, score)
+        return best
+
+    def find(self, job_details):
+        """Return (cluster, estimated similarity) for the closest indexed near-duplicate of a record, or None."""
+        signature = job_signature(job_details)
+        if signature is None:
+            return None
+        with self._lock:
+            return self._nearest(signature, _band_keys(signature))
+
+    def add(self, job_details):
+        """
+        Index a record and return (cluster, is_duplicate). cluster is None for records too short to
+        fingerprint, which are never counted as duplicates.
+        """
+        signature = job_signature(job_details)
+        if signature is None:
+            return None, False
+        band_keys = _band_keys(signature)
+        blob = SIGNATURE_FORMAT.pack(*signature)
+        with self._lock:
+            nearest = self._nearest(signature, band_keys)
+            cluster = nearest[0] if nearest else hashlib.blake2b(blob, digest_size=8).hexdigest()
+            record = self._conn.execute('INSERT INTO records (cluster, signature) VALUES (?, ?)',
+                                        (cluster, blob)).lastrowid
+            self._conn.executemany('INSERT OR IGNORE INTO bands (key, record) VALUES (?, ?)',
+                                   [(key, record) for key in band_keys])
+        return cluster, nearest is not None
+
+    def commit(self):
+        with self._lock:
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,136 @@
+# imports
+import logging
+import re
+from bs4.dammit import UnicodeDammit
+from lxml import etree
+from lxml import html as lxml_html
+from lxml.cssselect import CSSSelector
+from scraper import extract_salary_from_text
+
+# This file contains a faster alternative to extract_job_details, built on lxml's C parser.
+# It returns exactly the same job details dictionary as the BeautifulSoup version.
+
+# Selectors are compiled to XPath once at import time rather than on every page
+JOB_TITLE_SELECTOR = CSSSelector("h2.header-style__JobViewHeaderJobName-sc-c5940466-9")
+EMPLOYER_SELECTOR = CSSSelector("li.header-style__JobViewHeaderCompanyName-sc-c5940466-12")
+DESCRIPTION_SELECTOR = CSSSelector("div.description-styles__DescriptionContainerInner-sc-78eb761c-2")
+SALARY_SELECTOR = CSSSelector(
+    "ul.header-style__JobViewHeaderTagsContainer-sc-c5940466-11 li span.indexmodern__TagLabel-sc-6pvrvp-1.bkgNmO.ds-tag-label"
+)
+REQUIREMENTS_SELECTOR = CSSSelector("ul.skill-list-clamped-styles__SkillsContainerInner-sc-5a5d6754-0")
+LI_XPATH = etree.XPath('.//li')
+# BeautifulSoup's .text skips script, style and template contents, so these do too
+TEXT_XPATH = etree.XPath('.//text()[not(ancestor::script or ancestor::style or ancestor::template)]')
+
+# Comments and processing instructions are dropped while parsing as neither is ever extracted
+PARSER = lxml_html.HTMLParser(remove_comments=True, remove_pis=True)
+
+# Leading <?xml ... ?> declaration of an XHTML page
+XML_DECLARATION = re.compile(r'^\s*<\?xml[^>]*\?>')
+
+
+def select_one(selector, root):
+    """Return the first element matching a precompiled selector, like BeautifulSoup's select_one."""
+    matches = selector(root)
+    return matches[0] if matches else None
+
+
+def element_text(element):
+    """Return the text content of an element, matching BeautifulSoup's .text."""
+    return ''.join(TEXT_XPATH(element))
+
+
+def decode_html(html_bytes):
+    """
+    Decode a page body the way BeautifulSoup does: byte order mark, then the declared charset, then a
+    guess from the bytes. lxml itself reads bytes without a declared charset as latin-1.
+    """
+    text = UnicodeDammit(html_bytes, is_html=True).unicode_markup
+    return text if text is not None else html_bytes.decode('utf-8', errors='replace')
+
+
+def parse_html(html_content):
+    """Parse raw HTML (str or bytes) into an lxml tree, returning None for an empty document."""
+    if isinstance(html_content, bytes):
+        html_content = decode_html(html_content)
+    # lxml refuses str input with an XML encoding declaration, which is meaningless once decoded anyway
+    html_content = XML_DECLARATION.sub('', html_content, count=1)
+    if not html_content.strip():
+        return None
+    return lxml_html.document_fromstring(html_content, parser=PARSER)
+
+
+def extract_job_details_fast(html_content):
+    """Extracts job title, employer, salary, requirements, and description from raw job page HTML using lxml."""
+    job_details = {}
+    try:
+        root = parse_html(html_content)
+    except (etree.ParserError, ValueError) as e:
+        logging.error(f"Error parsing job page HTML: {e}")
+        root = None
+    if root is None:
+        return {'job_title': 'None', 'employer': 'None', 'description': 'None', 'salary': 'None',
+                'requirements': 'None'}
+
+    # Extract job title
+    try:
+        job_title_element = select_one(JOB_TITLE_SELECTOR, root)
+        job_details['job_title'] = element_text(job_title_element).strip() if job_title_element is not None else 'None'
+    except Exception as e:
+        job_details['job_title'] = 'None'
+        logging.error(f"Error extracting job title: {e}")
+
+    # Extract employer
+    try:
+        employer_element = select_one(EMPLOYER_SELECTOR, root)
+        job_details['employer'] = element_text(employer_element).strip() if employer_element is not None else 'None'
+    except Exception as e:
+        job_details['employer'] = 'None'
+        logging.error(f"Error extracting employer: {e}")
+
+    # Extract description
+    try:
+        description_element = select_one(DESCRIPTION_SELECTOR, root)
+        if description_element is not None:
+            job_description = element_text(description_element).strip().replace('\n', ' ').replace('\r', ' ')
+            job_details['description'] = job_description
+        else:
+            job_details['description'] = 'None'
+            job_description = ''
+    except Exception as e:
+        job_details['description'] = 'None'
+        job_description = ''
+        logging.error(f"Error extracting description: {e}")
+
+    # Extract salary with dedicated field + fallback to title/description regex search
+    try:
+        salary_element = select_one(SALARY_SELECTOR, root)
+        if salary_element is not None:
+            job_details['salary'] = element_text(salary_element).strip()
+            logging.info("extracted salary element from field: %s", job_details['salary'],
+                         extra={'event': 'salary_extracted', 'stage': 'extract'})
+        else:
+            job_title = job_details.get('job_title', '')
+            job_details['salary'] = extract_salary_from_text(job_title + ' ' + job_description)
+            logging.info("fallback search identified salary: %s", job_details['salary'],
+                         extra={'event': 'salary_extracted', 'stage': 'extract'})
+    except Exception as e:
+        job_details['salary'] = 'None'
+        logging.error(f"Error extracting salary: {e}")
+
+    # Extract requirements
+    try:
+        requirements_element = select_one(REQUIREMENTS_SELECTOR, root)
+        if requirements_element is not None:
+            requirement_texts = [element_text(req).strip() for req in LI_XPATH(requirements_element)]
+            job_details['requirements'] = [
+                text.replace('unmatched', '').strip()
+                for text in requirement_texts if text
+            ]
+        else:
+            job_details['requirements'] = 'None'
+    except Exception as e:
+        job_details['requirements'] = 'None'
+        logging.error(f"Error extracting requirements: {e}")
+
+    return job_details
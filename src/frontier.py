@@ -0,0 +1,133 @@
+# imports
+import heapq
+import itertools
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+# This file contains a global crawl frontier. Instead of taking the first few URLs of every sitemap file,
+# every sitemap is streamed through the frontier, which keeps only the `budget` most recently modified job
+# URLs seen so far. Memory therefore grows with the budget, not with the millions of entries offered.
+#
+# An optional per-group cap stops one group from taking the whole budget. Employers aren't known until a
+# page has been fetched, so URLs are grouped by their job slug (title and location, without the posting
+# ID): a job reposted under many URLs is one group.
+
+
+def lastmod_key(lastmod_text):
+    """Turn a sitemap <lastmod> (a date or an ISO 8601 timestamp) into a sortable UTC timestamp, or None."""
+    try:
+        lastmod = datetime.fromisoformat(lastmod_text.strip().replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+    if lastmod.tzinfo is None:
+        lastmod = lastmod.replace(tzinfo=timezone.utc)
+    return lastmod.timestamp()
+
+
+def job_slug(url):
+    """Group key for a job URL: its last path segment without the posting ID (".../data-engineer-ny--1234")."""
+    slug = urlsplit(url).path.rstrip('/').rsplit('/', 1)[-1]
+    return slug.rsplit('--', 1)[0]
+
+
+class CrawlFrontier:
+    """
+    Keeps the `budget` most recently modified URLs offered, with at most max_per_group from any one group.
+
+    The result is exactly what sorting every offered URL by lastmod (newest first) and taking each one
+    whose group still has room, until the budget is spent, would give. Only the selected entries are held,
+    in a min-heap by lastmod so the oldest can be evicted when a newer URL arrives. A URL offered twice
+    (listed in several sitemaps) is kept once, with its newest lastmod.
+
+    Each offer can name its source (a sitemap file); `truncated` holds the sources that had a URL left out
+    because the budget or a group cap was full, so callers know which sources were taken in full.
+    """
+
+    def __init__(self, budget, max_per_group=None, group_key=job_slug):
+        self.budget = budget
+        self.max_per_group = max_per_group
+        self.group_key = group_key
+        self._sequence = itertools.count()  # Among equal lastmods, the URL offered first wins
+        self._heap = []  # [key, -sequence, url, lastmod, group, removed, source] entries, oldest first
+        self._groups = {}  # Per-group heaps of the same entries, for groups at their cap
+        self._selected = {}  # url -> entry
+        self.offered = 0
+        self.truncated = set()
+
+    def __len__(self):
+        return len(self._selected)
+
+    def offer(self, url, lastmod, source=None):
+        """Consider a URL (from source) for the frontier. Entries with an unreadable lastmod are ignored."""
+        key = lastmod_key(lastmod)
+        if key is None:
+            return
+        if self.budget <= 0:
+            self.truncated.add(source)
+            return
+        self.offered += 1
+        entry = [key, -next(self._sequence), url, lastmod, None, False, source]
+
+        current = self._selected.get(url)
+        if current is not None:
+            if current[:2] >= entry[:2]:
+                return
+            self._remove(current)
+        elif len(self._selected) >= self.budget and self._peek(self._heap)[:2] >= entry[:2]:
+            self.truncated.add(source)
+            return  # Older than everything selected: most offers stop here, before the group is worked out
+
+        if self.max_per_group:
+            entry[4] = self.group_key(url)
+            group = self._groups.get(entry[4])
+            if group is not None and len(group) >= self.max_per_group:
+                oldest = self._peek(group)
+                if oldest[:2] >= entry[:2]:
+                    self.truncated.add(source)
+                    return
+                self._drop(oldest)  # Replaces the group's oldest, so the total doesn't change
+                self._add(entry)
+                return
+
+        if len(self._selected) >= self.budget:
+            oldest = self._peek(self._heap)
+            if oldest[:2] >= entry[:2]:
+                self.truncated.add(source)
+                return
+            self._drop(oldest)
+        self._add(entry)
+
+    def _peek(self, heap):
+        while heap[0][5]:
+            heapq.heappop(heap)  # Drop entries removed while deeper in the heap
+        return heap[0]
+
+    def _add(self, entry):
+        self._selected[entry[2]] = entry
+        heapq.heappush(self._heap, entry)
+        if self.max_per_group:
+            heapq.heappush(self._groups.setdefault(entry[4], []), entry)
+
+    def _drop(self, entry):
+        """Evict a selected entry to make room, so its source is no longer taken in full."""
+        self.truncated.add(entry[6])
+        self._remove(entry)
+
+    def _remove(self, entry):
+        entry[5] = True
+        del self._selected[entry[2]]
+        if self.max_per_group:
+            group = self._groups[entry[4]]
+            if len(group) == 1:
+                del self._groups[entry[4]]
+            else:
+                group.remove(entry)  # Group heaps are at most max_per_group long
+                heapq.heapify(group)
+        if len(self._heap) > 2 * len(self._selected) + 1024:
+            self._heap = [item for item in self._heap if not item[5]]  # Compact removed entries
+            heapq.heapify(self._heap)
+
+    def entries(self):
+        """Return the selected (url, lastmod) pairs, newest first."""
+        ordered = sorted(self._selected.values(), reverse=True)
+        return [(entry[2], entry[3]) for entry in ordered]
@@ -0,0 +1,195 @@
+# imports
+import itertools
+import threading
+import zlib
+import requests
+from requests.adapters import HTTPAdapter
+from fake_useragent import UserAgent
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; brotlicffi has the same interface
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+# This file contains the shared HTTP client layer: one pooled keep-alive session for the whole run,
+# and rotating header pools built once at startup instead of on every request. Job page bodies are read as
+# a stream by read_body(), which decodes them itself, caps their size and can stop once enough has been read.
+
+# Seconds to wait for a server to respond before treating the request as failed
+REQUEST_TIMEOUT = 30
+
+# Largest decoded job page body read before giving up on the page (Monster pages are ~80 KiB)
+MAX_BODY_BYTES = 5 * 1024 * 1024
+
+# Only advertise the encodings read_body() can decode
+ACCEPT_ENCODING = 'gzip, deflate, br' if brotli is not None else 'gzip, deflate'
+DECODE_ERRORS = (zlib.error, brotli.error) if brotli is not None else (zlib.error,)
+
+# Static request headers for job pages (User-Agent is added by the header pool)
+JOB_PAGE_HEADERS = {
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': ACCEPT_ENCODING,
+    'Referer': 'https://www.monster.com',
+    'Connection': 'keep-alive',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+# Static request headers for sitemap downloads
+SITEMAP_HEADERS = {
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept': 'application/xml;q=0.9,text/html;q=0.8,*/*;q=0.7',
+}
+
+
+class ResponseTooLarge(requests.exceptions.RequestException):
+    """Raised when a response body is larger than the limit it is read with. Retrying won't help."""
+
+
+class _DeflateDecoder:
+    """Decoder for Content-Encoding: deflate, which servers send both zlib-wrapped and raw."""
+
+    def __init__(self):
+        self._decoder = zlib.decompressobj()
+        self._first = True
+
+    def decompress(self, data):
+        if self._first:
+            self._first = False
+            try:
+                return self._decoder.decompress(data)
+            except zlib.error:
+                self._decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._decoder.decompress(data)
+
+    def flush(self):
+        return self._decoder.flush()
+
+
+class _BrotliDecoder:
+
+    def __init__(self):
+        self._decoder = brotli.Decompressor()
+
+    def decompress(self, data):
+        return self._decoder.process(data)
+
+    def flush(self):
+        return b''
+
+
+def _decoder_for(encoding):
+    if encoding in ('gzip', 'x-gzip'):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == 'deflate':
+        return _DeflateDecoder()
+    if encoding == 'br' and brotli is not None:
+        return _BrotliDecoder()
+    raise requests.exceptions.ContentDecodingError(f"Unsupported Content-Encoding: {encoding}")
+
+
+def read_body(response, max_bytes=MAX_BODY_BYTES, stop_when=None, chunk_size=16 * 1024):
+    """
+    Read the body of a response requested with stream=True and return (content, wire_bytes).
+
+    The body is decoded here (gzip, deflate and, if installed, brotli, applied in Content-Encoding order)
+    rather than by requests, so every advertised encoding works and the decoded size is checked as it
+    grows: ResponseTooLarge is raised once it passes max_bytes, without the rest being downloaded.
+    If stop_when(chunk, content) returns True after a decoded chunk, reading stops there and the partial
+    content is returned. The caller should then close the response, which also closes its connection.
+    """
+    length = response.headers.get('Content-Length')
+    if length and length.isdigit() and int(length) > max_bytes:
+        raise ResponseTooLarge(f"Response body of {length} bytes is over {max_bytes}", response=response)
+    encodings = [encoding.strip().lower() for encoding in response.headers.get('Content-Encoding', '').split(',')]
+    decoders = [_decoder_for(encoding) for encoding in reversed(encodings) if encoding not in ('', 'identity')]
+
+    content = bytearray()
+    wire_bytes = 0
+
+    def decode(data, final=False):
+        for decoder in decoders:
+            try:
+                data = decoder.decompress(data) + (decoder.flush() if final else b'')
+            except DECODE_ERRORS as e:
+                raise requests.exceptions.ContentDecodingError(f"Failed to decode response body: {e}")
+        return data
+
+    for chunk in response.raw.stream(chunk_size, decode_content=False):
+        wire_bytes += len(chunk)
+        data = decode(chunk)
+        content += data
+        if len(content) > max_bytes:
+            raise ResponseTooLarge(f"Response body is over {max_bytes} bytes", response=response)
+        if stop_when is not None and data and stop_when(data, content):
+            return bytes(content), wire_bytes
+    content += decode(b'', final=True)
+    if len(content) > max_bytes:
+        raise ResponseTooLarge(f"Response body is over {max_bytes} bytes", response=response)
+    return bytes(content), wire_bytes
+
+
+class HeaderPool:
+    """A fixed set of header dictionaries with random User-Agents, handed out in rotation."""
+
+    def __init__(self, base_headers, size=20, user_agent=None):
+        user_agent = user_agent or UserAgent()
+        self._headers = [{'User-Agent': user_agent.random, **base_headers} for _ in range(size)]
+        self._cycle = itertools.cycle(self._headers)
+        self._lock = threading.Lock()
+
+    def next(self):
+        """Return a copy of the next headers in the rotation, safe for the caller to modify."""
+        with self._lock:
+            return dict(next(self._cycle))
+
+
+_session = None
+_header_pools = {}
+_lock = threading.Lock()
+
+
+def get_session(pool_maxsize=16):
+    """Return the shared requests session, creating it on first use.
+
+    Connections are kept alive and reused per host, so repeat requests skip the TCP and TLS handshakes.
+    pool_maxsize should be at least the number of threads making requests at once.
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_maxsize)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+def _header_pool(name, base_headers):
+    with _lock:
+        if name not in _header_pools:
+            _header_pools[name] = HeaderPool(base_headers)
+        return _header_pools[name]
+
+
+def job_page_headers():
+    """Return the next set of job page request headers from the shared pool."""
+    return _header_pool('job_page', JOB_PAGE_HEADERS).next()
+
+
+def sitemap_headers():
+    """Return the next set of sitemap request headers from the shared pool."""
+    return _header_pool('sitemap', SITEMAP_HEADERS).next()
+
+
+def close_session():
+    """Close the shared session's pooled connections (a new session is created on next use)."""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
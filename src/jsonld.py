@@ -0,0 +1,179 @@
+# imports
+import html
+import json
+import logging
+import re
+from html.parser import HTMLParser
+
+# This file contains the JSON-LD fast path for job pages. Most job pages embed a schema.org JobPosting
+# in a <script type="application/ld+json"> block for search engines, with the title, employer, salary and
+# description already structured. Finding that block with one regex and decoding it with json is much
+# cheaper than building a DOM for the whole page, and it doesn't depend on the site's generated CSS class
+# names. parse_job_html() in scraper.py tries it first and only runs the CSS selectors for missing fields.
+
+JSONLD_PATTERN = re.compile(
+    r'<script[^>]*\btype\s*=\s*["\']?application/ld\+json["\']?[^>]*>(.*?)</script\s*>',
+    re.IGNORECASE | re.DOTALL,
+)
+
+# Keys of a job details dictionary, in the order extract_job_details builds them
+JOB_DETAIL_KEYS = ('job_title', 'employer', 'description', 'salary', 'requirements')
+
+# schema.org unitText values, as written in the site's own salary tags ("80,000 USD per year")
+SALARY_UNITS = {'HOUR': 'hour', 'DAY': 'day', 'WEEK': 'week', 'MONTH': 'month', 'YEAR': 'year'}
+
+
+class _TextCollector(HTMLParser):
+    """Collects the text of an HTML fragment the way BeautifulSoup's .text does, skipping scripts and styles."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('script', 'style', 'template'):
+            self._skipping += 1
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style', 'template') and self._skipping:
+            self._skipping -= 1
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self.parts.append(data)
+
+
+def html_to_text(fragment):
+    """Return the text of an HTML fragment (JobPosting descriptions are HTML, sometimes entity-escaped)."""
+    if '<' not in fragment and '&lt;' in fragment:
+        fragment = html.unescape(fragment)
+    collector = _TextCollector()
+    collector.feed(fragment)
+    collector.close()
+    return ''.join(collector.parts)
+
+
+def _is_job_posting(node):
+    node_type = node.get('@type')
+    return node_type == 'JobPosting' or (isinstance(node_type, list) and 'JobPosting' in node_type)
+
+
+def _find_in(node):
+    """Return the first JobPosting object in decoded JSON-LD (a list, an @graph or the object itself)."""
+    if isinstance(node, list):
+        for item in node:
+            found = _find_in(item)
+            if found is not None:
+                return found
+    elif isinstance(node, dict):
+        if _is_job_posting(node):
+            return node
+        return _find_in(node.get('@graph'))
+    return None
+
+
+def find_job_posting(html_content):
+    """Return the schema.org JobPosting embedded in raw page HTML (str or bytes) as a dictionary, or None."""
+    if isinstance(html_content, (bytes, bytearray)):
+        html_content = html_content.decode('utf-8', errors='replace')
+    for match in JSONLD_PATTERN.finditer(html_content):
+        try:
+            data = json.loads(match.group(1))
+        except ValueError as e:
+            logging.warning(f"Skipping malformed JSON-LD block: {e}")
+            continue
+        posting = _find_in(data)
+        if posting is not None:
+            return posting
+    return None
+
+
+def _format_amount(value):
+    amount = float(value)
+    return f"{amount:,.0f}" if amount.is_integer() else f"{amount:,.2f}"
+
+
+def format_salary(base_salary):
+    """Turn a JobPosting baseSalary (MonetaryAmount) into text like '50,000 - 70,000 USD per year', or None."""
+    if not isinstance(base_salary, dict):
+        return None
+    value = base_salary.get('value')
+    unit = None
+    if isinstance(value, dict):
+        unit = value.get('unitText')
+        minimum, maximum = value.get('minValue'), value.get('maxValue')
+        if minimum is None and maximum is None:
+            minimum = maximum = value.get('value')
+    else:
+        minimum = maximum = value
+    minimum, maximum = (minimum if minimum is not None else maximum), (maximum if maximum is not None else minimum)
+    if minimum is None:
+        return None
+    try:
+        text = _format_amount(minimum)
+        if float(maximum) != float(minimum):
+            text += f" - {_format_amount(maximum)}"
+    except (TypeError, ValueError):
+        return None
+    currency = base_salary.get('currency')
+    if currency:
+        text += f" {currency}"
+    if isinstance(unit, str) and unit.upper() in SALARY_UNITS:
+        text += f" per {SALARY_UNITS[unit.upper()]}"
+    return text
+
+
+def _skills(posting):
+    skills = posting.get('skills')
+    if isinstance(skills, str):
+        skills = skills.split(',')
+    if not isinstance(skills, list):
+        return None
+    names = [skill.get('name') if isinstance(skill, dict) else skill for skill in skills]
+    # Items that aren't text (such as {"name": null}) are skipped
+    return [name.strip() for name in names if isinstance(name, str) and name.strip()] or None
+
+
+def extract_job_details_jsonld(html_content):
+    """
+    Extract job details from a page's JSON-LD JobPosting, without building a DOM.
+
+    Returns a dictionary with the same keys and formats as extract_job_details, but only for the fields
+    the JobPosting actually has (so an empty dictionary if the page has none).
+    """
+    posting = find_job_posting(html_content)
+    if posting is None:
+        return {}
+
+    title = posting.get('title')
+    organization = posting.get('hiringOrganization')
+    if isinstance(organization, dict):
+        organization = organization.get('name')
+    description = posting.get('description')
+    if isinstance(description, str):
+        description = html_to_text(description).strip().replace('\n', ' ').replace('\r', ' ')
+
+    fields = {
+        'job_title': html.unescape(title) if isinstance(title, str) else None,
+        'employer': html.unescape(organization) if isinstance(organization, str) else None,
+        'description': description,
+        'salary': format_salary(posting.get('baseSalary')),
+        'requirements': _skills(posting),
+    }
+    job_details = {}
+    for key in JOB_DETAIL_KEYS:
+        value = fields[key]
+        if isinstance(value, str):
+            value = value.strip()
+        if value:
+            job_details[key] = value
+    return job_details
+
+
+def job_posting_seen(chunk, html_content):
+    """
+    read_body() stop_when predicate (http_client.py): True once the page read so far has a JobPosting with
+    every job detail, so the rest of the page isn't needed. Only checked when a chunk closes a script block.
+    """
+    return b'</script' in chunk and len(extract_job_details_jsonld(html_content)) == len(JOB_DETAIL_KEYS)
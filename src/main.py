@@ -1,54 +1,237 @@
 
 # imports
-import sys
+import argparse
+import os
 import logging
 import json
-from sitemap_parser import download_sitemaps, process_xml_file
+from sitemap_parser import download_sitemaps, process_frontier, process_xml_file
+from writers import open_writer
+from crawl_state import CrawlState
+from scraper import (set_extraction_backend, set_rate_limit, set_page_archive, set_rate_controller,
+                     set_page_limits, RATE_LIMIT_CALLS, RATE_LIMIT_PERIOD)
+from http_client import MAX_BODY_BYTES
+from rate_controller import AdaptiveRateController
+from archive import PageArchive, reextract_archive
+from checkpoint import RunJournal
+from dedup import NearDuplicateIndex
+from sharding import shard_path, shard_dir, merge_shards
+from metrics import metrics
+from structured_logging import configure_logging
+from contextlib import nullcontext
 
-# this file contains main script logic for downloading sitemaps, processing them, and writing scraped data to CSV
+# this file contains main script logic for downloading sitemaps, processing them, and writing scraped data to CSV (or JSONL/Parquet)
 
-# Set up logging to log to both file and console
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("job_scraper.log"),
-        logging.StreamHandler(sys.stdout)  # Log to console as well
-    ]
-)
+# Set up logging to log to both file and console. The options come from the "logging" object in config.json:
+# "format": "json" writes the log file as JSON Lines, "async": true moves formatting and writing to a background
+# thread, and "sample_rate" / "max_events_per_second" thin out the per-page events (see structured_logging.py)
+def setup_logging(log_file="job_scraper.log", format="text", sample_rate=1.0, max_events_per_second=None, **options):
+  if format not in ("text", "json"):
+    raise ValueError(f"Unknown log format: {format}. Choose 'text' or 'json'")
+  return configure_logging(log_file, structured=format == "json", async_logging=options.get("async", False),
+                           sample_rate=sample_rate, max_events_per_second=max_events_per_second)
 
 
-# Read variables from config.json
+# Read variables from config.json. Keys are the parameter names of main(): sitemap_url, output_dir,
+# output_csv and num_sitemaps are required, and any of the optional parameters can be set as well.
 
 def read_config(config_file):
   with open(config_file, 'r') as f:
     config_data = json.load(f)
   return config_data
 
-config_data = read_config('config.json')
-sitemap_url = config_data['sitemap_url']
-output_dir = config_data['output_dir']
-output_csv = config_data['output_csv']
-num_sitemaps = config_data['num_sitemaps']
 
-
-def main(sitemap_url, output_dir, output_csv, num_sitemaps=5):
+def main(sitemap_url, output_dir, output_csv, num_sitemaps=5, urls_per_sitemap=10, async_fetch=False, per_host_concurrency=4,
+         output_format=None, batch_size=500, flush_interval=30, crawl_state_db=None, sitemap_workers=3,
+         pipeline=False, fetch_workers=8, parse_workers=None, extraction_backend='bs4',
+         rate_limit_calls=RATE_LIMIT_CALLS, rate_limit_period=RATE_LIMIT_PERIOD, sitemap_delay=(3, 7),
+         metrics_summary='run_summary.json', metrics_port=None, profile_stages=False, archive_dir=None,
+         reextract=False, checkpoint=None, resume=False, shard_index=None, shard_count=None, merge=False,
+         adaptive_rate=False, max_rate=2.0, dedup_db=None, drop_duplicates=False, url_budget=None,
+         max_per_group=None, max_page_bytes=MAX_BODY_BYTES, stop_at_job_details=False):
   """
-  Downloads sitemaps, extracts job details, and saves them to a CSV file.
+  Downloads sitemaps, extracts job details, and saves them to a CSV, JSONL or Parquet file.
 
   Args:
       sitemap_url (str): URL of the sitemap index page from Monster.com.
       output_dir (str): Directory to save downloaded sitemap files.
-      output_csv (str): Path to the output CSV file.
+      output_csv (str): Path to the output file.
       num_sitemaps (int, optional): Number of sitemaps to download. Defaults to 5 for development stage.
+      urls_per_sitemap (int, optional): Job URLs scraped from each sitemap. Defaults to 10 for development stage.
+      async_fetch (bool, optional): Fetch job pages concurrently with the asyncio engine. Defaults to False.
+      per_host_concurrency (int, optional): Requests in flight per host when async_fetch is on. Defaults to 4.
+      output_format (str, optional): 'csv', 'jsonl' or 'parquet'. Defaults to the output file's extension.
+      batch_size (int, optional): Rows buffered before each write. Defaults to 500.
+      flush_interval (int, optional): Seconds after which a partial batch is written, checked by a background timer
+          even when no rows arrive. None turns it off. Defaults to 30.
+      crawl_state_db (str, optional): SQLite file recording what has been scraped. If set, URLs whose
+          sitemap lastmod is unchanged since their last successful scrape are skipped, and so are child
+          sitemaps that are unchanged since they were last processed. A sitemap only counts as processed if
+          none of its job URLs were left out by urls_per_sitemap or url_budget. Defaults to None.
+      sitemap_workers (int, optional): Number of sitemaps downloaded concurrently. Defaults to 3.
+      pipeline (bool, optional): Run fetching, parsing (on a process pool) and writing as separate stages.
+          Defaults to False.
+      fetch_workers (int, optional): Fetcher threads when pipeline is on. Defaults to 8.
+      parse_workers (int, optional): Parser processes when pipeline is on. Defaults to one per CPU.
+      extraction_backend (str, optional): 'bs4' or the faster 'lxml'. Defaults to 'bs4'.
+      rate_limit_calls (int, optional): Job page requests allowed per rate_limit_period. Defaults to 10.
+      rate_limit_period (int, optional): Length of the rate limit window in seconds. Defaults to 90.
+      sitemap_delay (tuple, optional): Min and max seconds between sitemap download starts. Defaults to (3, 7).
+      metrics_summary (str, optional): Path of the JSON run summary (per-stage timings, status codes, retries,
+          bytes and records written). Set to None to skip it. Defaults to 'run_summary.json'.
+      metrics_port (int, optional): If set, serve live metrics at http://127.0.0.1:<port>/metrics. Defaults to None.
+      profile_stages (bool, optional): Also record CPU time per stage, to tell CPU-bound stages from
+          waiting ones. Defaults to False.
+      archive_dir (str, optional): Directory of a compressed archive (archive.py) that the raw HTML of every
+          fetched job page is saved to. Defaults to None (no archive).
+      reextract (bool, optional): Instead of crawling, re-run the extraction over every page in archive_dir
+          with no network access and write the results to output_csv. Defaults to False.
+      checkpoint (str, optional): Path of a run journal (checkpoint.py) recording which sitemaps and URLs are
+          done and how much of the output file has been flushed. Defaults to None (no journal).
+      resume (bool, optional): Resume the interrupted run recorded in the checkpoint journal: its sitemap
+          files are reused, rows written after its last checkpoint are dropped from the output, and URLs it
+          finished are neither fetched nor written again. Defaults to False.
+      shard_index (int, optional): With shard_count, run as one worker of a sharded crawl (sharding.py), scraping
+          only the job URLs whose stable hash falls in this shard. Its output, sitemap directory, archive,
+          checkpoint, crawl state, dedup index and run summary get per-shard names (jobs.csv ->
+          jobs.shard-0-of-4.csv), so several workers can share a machine and a config. Defaults to None.
+      shard_count (int, optional): Number of shards in a sharded crawl. Defaults to None (no sharding).
+      merge (bool, optional): Instead of crawling, merge the shard_count output shards of output_csv into one
+          deduplicated file at output_csv. Defaults to False.
+      adaptive_rate (bool, optional): Pace sitemap and job page requests with an adaptive per-host rate
+          controller (rate_controller.py) instead of the fixed rate limit and sitemap_delay. It starts at
+          rate_limit_calls / rate_limit_period, speeds up while the host responds quickly, and backs off on
+          429 / 503, errors, rising latency and Retry-After. Defaults to False.
+      max_rate (float, optional): Requests per second per host the adaptive controller never exceeds.
+          Defaults to 2.0.
+      dedup_db (str, optional): SQLite file of a persistent near-duplicate index (dedup.py). If set, every record
+          is compared with all records written before it, in this and earlier runs, and the output gets a
+          Duplicate Cluster column shared by reposts of the same job. Defaults to None.
+      drop_duplicates (bool, optional): With dedup_db, leave near-duplicates out of the output instead of
+          just flagging them with their cluster. Defaults to False.
+      url_budget (int, optional): If set, replaces urls_per_sitemap with one budget for the whole run: every
+          sitemap is streamed into a global frontier (frontier.py) and the url_budget most recently modified job
+          URLs across all of them are scraped, newest first. Defaults to None (per-sitemap caps).
+      max_per_group (int, optional): With url_budget, the most URLs sharing a job slug (title and location, as
+          reposts of one job do) that the frontier keeps. Defaults to None (no cap).
+      max_page_bytes (int, optional): Largest decoded job page body read. Bigger pages are abandoned part way and
+          not retried. Defaults to 5 MiB.
+      stop_at_job_details (bool, optional): Stop reading a job page once its JSON-LD JobPosting has every job
+          detail. This saves bandwidth and memory, but the connection can't be reused. Ignored when archive_dir
+          is set, as the archive keeps whole pages. Defaults to False.
   """
 
-  # Download sitemaps
-  downloaded_files = download_sitemaps(sitemap_url, output_dir, num_sitemaps)
+  if reextract and not archive_dir:
+    raise ValueError("reextract needs an archive_dir to read pages from")
+  if resume and not checkpoint:
+    raise ValueError("resume needs the checkpoint journal of the run to resume")
+  if merge and not shard_count:
+    raise ValueError("merge needs the shard_count of the crawl to merge")
+
+  shard = None
+  if shard_count and not merge:
+    if shard_index is None or not 0 <= shard_index < shard_count:
+      raise ValueError(f"shard_index must be between 0 and {shard_count - 1}")
+    shard = (shard_index, shard_count)
+    output_csv = shard_path(output_csv, shard_index, shard_count)
+    output_dir = shard_dir(output_dir, shard_index, shard_count)
+    os.makedirs(output_dir, exist_ok=True)
+    archive_dir = archive_dir and shard_dir(archive_dir, shard_index, shard_count)
+    checkpoint = checkpoint and shard_path(checkpoint, shard_index, shard_count)
+    crawl_state_db = crawl_state_db and shard_path(crawl_state_db, shard_index, shard_count)
+    dedup_db = dedup_db and shard_path(dedup_db, shard_index, shard_count)
+    metrics_summary = metrics_summary and shard_path(metrics_summary, shard_index, shard_count)
+
+  metrics.reset()
+  metrics.profile_cpu = profile_stages
+  metrics_server = metrics.serve(metrics_port) if metrics_port else None
+
+  set_extraction_backend(extraction_backend)
+  set_rate_limit(rate_limit_calls, rate_limit_period)
+  set_page_limits(max_page_bytes, stop_at_job_details)
+  controller = None
+  if adaptive_rate:
+    controller = AdaptiveRateController(initial_rate=rate_limit_calls / rate_limit_period, max_rate=max_rate)
+    set_rate_controller(controller)
+
+  try:
+    if reextract:
+      reextract_archive(archive_dir, output_csv, output_format, batch_size, flush_interval, workers=parse_workers)
+      return
+    if merge:
+      merge_shards(output_csv, shard_count, output_format, batch_size)
+      return
 
-  # Process each downloaded sitemap
-  for sitemap_file in downloaded_files:
-    process_xml_file(sitemap_file, output_csv)
+    with (CrawlState(crawl_state_db) if crawl_state_db else nullcontext()) as crawl_state, \
+         (PageArchive(archive_dir) if archive_dir else nullcontext()) as archive, \
+         (RunJournal(checkpoint, resume) if checkpoint else nullcontext()) as journal, \
+         (NearDuplicateIndex(dedup_db) if dedup_db else nullcontext()) as dedup_index:
+      set_page_archive(archive)
+      if journal is not None and journal.resuming:
+        # Reuse the interrupted run's sitemap files, and drop any rows written after its last checkpoint
+        downloaded_files = journal.sitemaps
+        journal.rollback_output(output_csv, output_format)
+      else:
+        # Download sitemaps (only new or changed ones if crawl state is enabled)
+        downloaded_files = download_sitemaps(sitemap_url, output_dir, num_sitemaps, crawl_state=crawl_state,
+                                             max_workers=sitemap_workers, min_delay=sitemap_delay[0],
+                                             max_delay=sitemap_delay[1])
+        if journal is not None:
+          journal.start(downloaded_files, output_csv, output_format)
+
+      with open_writer(output_csv, output_format, batch_size, flush_interval, dedup_index=dedup_index,
+                       drop_duplicates=drop_duplicates) as writer:
+        # Progress is only recorded once rows are flushed, the journal first
+        if journal is not None:
+          writer.flush_listeners.append(journal.record_flushed)
+          writer.durable = True
+        if crawl_state is not None:
+          writer.flush_listeners.append(crawl_state.record_flushed)
+
+        if url_budget is not None:
+          # Scrape the most recent URLs across all sitemaps, then mark every sitemap done for this run
+          pending_files = [sitemap_file for sitemap_file in downloaded_files
+                           if journal is None or sitemap_file not in journal.completed_sitemaps]
+          drained_files = process_frontier(pending_files, output_csv, url_budget, max_per_group,
+                                           async_fetch=async_fetch, per_host_concurrency=per_host_concurrency,
+                                           writer=writer, crawl_state=crawl_state, pipeline=pipeline,
+                                           fetch_workers=fetch_workers, parse_workers=parse_workers,
+                                           journal=journal, shard=shard)
+          writer.flush()
+          for sitemap_file in pending_files:
+            if journal is not None:
+              journal.sitemap_done(sitemap_file)
+            # Only a sitemap whose URLs all fit in the budget may be skipped as unchanged next run
+            if crawl_state is not None and sitemap_file in drained_files:
+              crawl_state.mark_sitemap_processed(sitemap_file)
+          downloaded_files = []
+
+        # Process each downloaded sitemap, keeping one writer (and crawl state) open for the whole run
+        for sitemap_file in downloaded_files:
+          if journal is not None and sitemap_file in journal.completed_sitemaps:
+            logging.info(f"Sitemap {sitemap_file} was finished before the run was interrupted. Skipping...")
+            continue
+          drained = process_xml_file(sitemap_file, output_csv, urls_per_sitemap, async_fetch=async_fetch,
+                                     per_host_concurrency=per_host_concurrency, writer=writer,
+                                     crawl_state=crawl_state, pipeline=pipeline, fetch_workers=fetch_workers,
+                                     parse_workers=parse_workers, journal=journal, shard=shard)
+          writer.flush()
+          if journal is not None:
+            journal.sitemap_done(sitemap_file)
+          # A sitemap cut short by urls_per_sitemap must be read again next run, so it keeps no validators
+          if crawl_state is not None and drained:
+            crawl_state.mark_sitemap_processed(sitemap_file)
+  finally:
+    set_page_archive(None)
+    if controller is not None:
+      set_rate_controller(None)
+      logging.info(f"Final request rates (per second): {controller.rates()}")
+    # Write the run summary even if the run failed part way, as that is when it is most useful
+    if metrics_summary:
+      metrics.write_summary(metrics_summary)
+      logging.info(f"Run summary written to {metrics_summary}")
+    if metrics_server is not None:
+      metrics_server.shutdown()
+      metrics_server.server_close()
 
 
 
@@ -58,6 +241,24 @@ def main(sitemap_url, output_dir, output_csv, num_sitemaps=5):
 # ---------------------
 
 if __name__ == '__main__':
-    main(sitemap_url, output_dir, output_csv)
+    parser = argparse.ArgumentParser(description='Scrape job details from Monster.com sitemaps.')
+    parser.add_argument('--config', default='config.json', help='JSON file of main() arguments')
+    parser.add_argument('--resume', action='store_true',
+                        help='resume the interrupted run recorded in the checkpoint journal set in the config')
+    parser.add_argument('--shard', metavar='INDEX/COUNT',
+                        help='run as one worker of a sharded crawl, e.g. --shard 0/4')
+    parser.add_argument('--merge', type=int, metavar='COUNT', help='merge the output of a COUNT-shard crawl')
+    args = parser.parse_args()
+
+    config_data = read_config(args.config)
+    setup_logging(**config_data.pop('logging', {}))
+    if args.resume:
+        config_data['resume'] = True
+    if args.shard:
+        shard_index, shard_count = args.shard.split('/')
+        config_data['shard_index'], config_data['shard_count'] = int(shard_index), int(shard_count)
+    if args.merge:
+        config_data['shard_count'], config_data['merge'] = args.merge, True
+    main(**config_data)
 
-    print(f"Finished scraping job details. Saved to: {output_csv}")
+    print(f"Finished scraping job details. Saved to: {config_data['output_csv']}")
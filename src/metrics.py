@@ -0,0 +1,187 @@
+# imports
+import bisect
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# This file contains the run instrumentation: counters and latency histograms for each stage of a scrape
+# (sitemap download, XML parsing, HTTP fetch, rate-limit waiting, retry backoff, HTML parsing, writing),
+# a machine-readable summary written at the end of main(), and an optional /metrics endpoint
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, float('inf'))
+
+
+class Histogram:
+    """Fixed-bucket latency histogram that also tracks count, sum, min and max."""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """Estimate a quantile as the upper bound of the bucket it falls in (capped at the observed max)."""
+        if not self.count:
+            return None
+        target = q * self.count
+        running = 0
+        for bound, bucket_count in zip(BUCKETS, self.counts):
+            running += bucket_count
+            if running >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'total_seconds': round(self.sum, 6),
+            'mean_seconds': round(self.sum / self.count, 6) if self.count else None,
+            'min_seconds': self.min,
+            'max_seconds': self.max,
+            'p50_seconds': self.quantile(0.5),
+            'p99_seconds': self.quantile(0.99),
+        }
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+class Metrics:
+    """Thread-safe registry of labelled counters and histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clear all metrics and restart the run clock."""
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+            self.started_at = time.time()
+            self.profile_cpu = False
+
+    def inc(self, name, value=1, **labels):
+        """Add value to a counter, e.g. inc('http_responses', status=200)."""
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        """Record a duration in a histogram."""
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        """Time a block as one observation of stage_seconds{stage=...}.
+
+        With CPU profiling on, the CPU time used by the calling thread is also
+        added to the stage_cpu_seconds counter for the stage.
+        """
+        cpu_start = time.thread_time() if self.profile_cpu else None
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('stage_seconds', time.perf_counter() - start, stage=stage)
+            if cpu_start is not None:
+                self.inc('stage_cpu_seconds', time.thread_time() - cpu_start, stage=stage)
+
+    def timed_iter(self, iterable, stage):
+        """Yield from iterable, timing each step as one observation of the stage (excluding the consumer's time)."""
+        iterator = iter(iterable)
+        while True:
+            with self.timer(stage):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def summary(self):
+        """Return all metrics as a JSON-serialisable dictionary."""
+        with self._lock:
+            counters = {}
+            for (name, labels), value in sorted(self.counters.items()):
+                counters.setdefault(name, []).append({**dict(labels), 'value': round(value, 6)})
+            histograms = {}
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                histograms.setdefault(name, []).append({**dict(labels), **histogram.summary()})
+            return {
+                'started_at': self.started_at,
+                'wall_seconds': round(time.time() - self.started_at, 3),
+                'counters': counters,
+                'histograms': histograms,
+            }
+
+    def write_summary(self, path):
+        """Write summary() as JSON to path."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def prometheus_text(self):
+        """Render metrics in the Prometheus text exposition format."""
+        def render_labels(labels, extra=()):
+            pairs = [*labels, *extra]
+            return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}' if pairs else ''
+
+        lines = []
+        with self._lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                lines.append(f"job_scraper_{name}_total{render_labels(labels)} {value}")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                running = 0
+                for bound, bucket_count in zip(BUCKETS, histogram.counts):
+                    running += bucket_count
+                    le = '+Inf' if bound == float('inf') else bound
+                    lines.append(f"job_scraper_{name}_bucket{render_labels(labels, [('le', le)])} {running}")
+                lines.append(f"job_scraper_{name}_sum{render_labels(labels)} {histogram.sum}")
+                lines.append(f"job_scraper_{name}_count{render_labels(labels)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port, host='127.0.0.1'):
+        """Expose /metrics on a background HTTP server for scraping during a run. Returns the server."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes would otherwise fill the run log
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+        logging.info(f"Serving metrics at http://{host}:{server.server_address[1]}/metrics")
+        return server
+
+
+# Shared registry for the whole run
+metrics = Metrics()
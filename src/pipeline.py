@@ -0,0 +1,138 @@
+# imports
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import scraper
+from scraper import fetch_job_page, parse_job_html
+from metrics import metrics
+
+# This file contains a staged fetch -> parse -> write pipeline. Fetcher threads download raw HTML,
+# a process pool runs the CPU-bound extraction on every core, and a single writer thread persists records.
+# Bounded queues between the stages apply backpressure, so memory stays bounded however many URLs there are.
+
+_DONE = object()  # Sentinel marking the end of a stage's output
+
+
+def _timed_parse(html_content, backend):
+    """Parse in a worker process and return (job_details, seconds), as worker metrics don't reach the parent."""
+    start = time.perf_counter()
+    job_details = parse_job_html(html_content, backend)
+    return job_details, time.perf_counter() - start
+
+
+class _LockedIterator:
+    """Lets several fetcher threads pull from one iterator (such as a generator) safely."""
+
+    def __init__(self, iterable):
+        self._iterator = iter(iterable)
+        self._lock = threading.Lock()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        with self._lock:
+            return next(self._iterator)
+
+
+def run_pipeline(urls, on_result, on_failure=None, fetch_workers=8, parse_workers=None, queue_size=64,
+                 fetch=fetch_job_page, backend=None, retries=None):
+    """
+    Fetch, parse and persist job pages as three concurrent stages.
+
+    Args:
+        urls (iterable): Job page URLs. Consumed lazily by the fetcher threads.
+        on_result (callable): Called with (url, job_details) for each parsed page. Always called from the
+            single writer thread, so it can write to files without locking.
+        on_failure (callable, optional): Called with (url, status) for pages that could not be fetched or
+            parsed, also from the writer thread. status is the last HTTP status code received, or None.
+        fetch_workers (int, optional): Number of fetcher threads.
+        parse_workers (int, optional): Number of parser processes. Defaults to the number of CPUs.
+        queue_size (int, optional): Maximum raw pages waiting to be parsed, and parsed records waiting
+            to be written. Fetchers block when it is reached.
+        fetch (callable, optional): Function making one attempt at a URL and returning (raw HTML bytes or
+            None, HTTP status code or None).
+        backend (str, optional): Extraction backend for parse_job_html. Defaults to the configured one.
+        retries (RetryQueue, optional): Deferred retry queue (retry_queue.py) that failed fetches are put
+            back on, so fetchers move on to fresh URLs instead of sleeping. Defaults to None (no retries).
+    """
+    url_iter = _LockedIterator(retries.urls(urls) if retries is not None else urls)
+    backend = backend or scraper.EXTRACTION_BACKEND  # Passed explicitly as worker processes don't share globals
+    raw_queue = queue.Queue(maxsize=queue_size)
+    result_queue = queue.Queue()
+    in_flight = threading.BoundedSemaphore(queue_size)  # Pages submitted for parsing but not yet written
+
+    def fetcher():
+        for url in url_iter:
+            try:
+                html_content, status = fetch(url)
+            except Exception as e:
+                logging.error(f"An unexpected error occurred while fetching {url}: {e}")
+                html_content, status = None, None
+            if html_content:
+                if retries is not None:
+                    retries.succeeded(url)
+                raw_queue.put((url, html_content))  # Blocks while the parse stage is behind
+            elif retries is None or not retries.failed(url, status):
+                result_queue.put((url, None, status))
+
+    def writer():
+        while True:
+            item = result_queue.get()
+            if item is _DONE:
+                return
+            url, future, status = item  # future is None for a failed fetch, with its HTTP status
+            job_details = None
+            if future is not None:
+                try:
+                    job_details, seconds = future.result()
+                    metrics.observe('stage_seconds', seconds, stage='html_parse')
+                except Exception as e:
+                    logging.error(f"Error parsing {url}: {e}")
+                finally:
+                    in_flight.release()
+            try:
+                if job_details:
+                    on_result(url, job_details)
+                else:
+                    logging.warning(f"No details found for {url}. Skipping...")
+                    if on_failure is not None:
+                        on_failure(url, status)
+            except Exception as e:
+                logging.error(f"Error writing results for {url}: {e}")
+
+    # Spawned (not forked) workers, as forking while fetcher threads are running can deadlock
+    executor = ProcessPoolExecutor(max_workers=parse_workers or os.cpu_count(),
+                                   mp_context=multiprocessing.get_context('spawn'))
+    writer_thread = threading.Thread(target=writer, name='pipeline-writer')
+    fetcher_threads = [threading.Thread(target=fetcher, name=f'pipeline-fetcher-{i}', daemon=True)
+                       for i in range(fetch_workers)]
+    writer_thread.start()
+    for thread in fetcher_threads:
+        thread.start()
+
+    def close_raw_queue():
+        for thread in fetcher_threads:
+            thread.join()
+        raw_queue.put(_DONE)
+
+    threading.Thread(target=close_raw_queue, name='pipeline-fetch-join', daemon=True).start()
+
+    # Parse stage: hand raw pages to the process pool, never holding more than queue_size at once
+    try:
+        while True:
+            item = raw_queue.get()
+            if item is _DONE:
+                break
+            url, html_content = item
+            in_flight.acquire()
+            future = executor.submit(_timed_parse, html_content, backend)
+            future.add_done_callback(lambda f, url=url: result_queue.put((url, f, None)))
+    finally:
+        executor.shutdown(wait=True)
+        result_queue.put(_DONE)
+        writer_thread.join()
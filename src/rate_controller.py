@@ -0,0 +1,146 @@
+# imports
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from metrics import metrics
+
+# This file contains an adaptive per-host rate controller (AIMD, as in TCP congestion control). Each host's
+# request rate rises additively while responses are fast and successful, and is cut multiplicatively on
+# 429 / 503, connection errors or latency climbing well above its baseline. Retry-After headers pause the
+# host until the time the server asked for. The sitemap downloader and the job page fetchers (sync,
+# pipeline and async) all pace their requests through it when it is switched on.
+
+# Statuses that mean the server wants us to slow down
+PUSHBACK_STATUSES = {429, 503}
+
+
+def parse_retry_after(value):
+    """Return the seconds to wait from a Retry-After header (delta-seconds or an HTTP date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class _HostState:
+    def __init__(self, rate):
+        self.rate = rate
+        self.next_start = 0.0
+        self.blocked_until = 0.0
+        self.last_decrease = float('-inf')
+        self.latency = None   # Exponentially weighted moving average, seconds
+        self.baseline = None  # Slow-moving floor of the average: what a healthy response takes
+
+
+class AdaptiveRateController:
+    """
+    Paces requests to each host at an adaptive rate, in requests per second.
+
+    Args:
+        initial_rate (float): Starting rate for every host.
+        min_rate (float): Floor the rate is never cut below.
+        max_rate (float): Ceiling the rate never rises above, however healthy the host looks.
+        increase (float): Added to the rate after each fast, successful response.
+        decrease (float): Factor the rate is multiplied by on pushback (0 < decrease < 1).
+        latency_factor (float): Latency counts as rising once its average exceeds this multiple of the baseline.
+        cooldown (float): Seconds after a cut during which further pushback doesn't cut again, so a burst of
+            429s from requests already in flight counts as one signal.
+    """
+
+    def __init__(self, initial_rate=10 / 90, min_rate=0.01, max_rate=2.0, increase=0.05, decrease=0.5,
+                 latency_factor=2.0, cooldown=5.0):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.cooldown = cooldown
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host(self, url):
+        host = urlsplit(url).netloc
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(min(max(self.initial_rate, self.min_rate), self.max_rate))
+        return host, state
+
+    def _claim(self, url):
+        """Reserve the next request slot for url's host and return how long to wait for it."""
+        with self._lock:
+            _, state = self._host(url)
+            now = time.monotonic()
+            start = max(now, state.next_start, state.blocked_until)
+            state.next_start = start + 1 / state.rate
+        return start - now
+
+    def acquire(self, url):
+        """Block until a request to url's host may start."""
+        wait = self._claim(url)
+        if wait > 0:
+            with metrics.timer('rate_limit_wait'):
+                time.sleep(wait)
+
+    async def acquire_async(self, url):
+        """Wait, without blocking the event loop, until a request to url's host may start."""
+        wait = self._claim(url)
+        if wait > 0:
+            with metrics.timer('rate_limit_wait'):
+                await asyncio.sleep(wait)
+
+    def record(self, url, status, latency=None, retry_after=None):
+        """
+        Feed back the outcome of a request: HTTP status (None for a connection error or timeout), latency in
+        seconds until the response headers arrived, and the raw Retry-After header if there was one.
+        """
+        with self._lock:
+            host, state = self._host(url)
+            now = time.monotonic()
+
+            if latency is not None:
+                state.latency = latency if state.latency is None else 0.8 * state.latency + 0.2 * latency
+                if state.baseline is None or state.latency < state.baseline:
+                    state.baseline = state.latency
+                else:
+                    state.baseline += 0.01 * (state.latency - state.baseline)  # Adapt to lasting changes
+
+            delay = parse_retry_after(retry_after)
+            if delay is not None:
+                state.blocked_until = max(state.blocked_until, now + delay)
+                metrics.inc('retry_after_pauses', host=host)
+                logging.info(f"{host} asked us to retry after {delay:.0f}s")
+
+            if status is None or status in PUSHBACK_STATUSES:
+                reason = 'error' if status is None else status
+            elif (status < 400 and state.latency is not None
+                  and state.latency > self.latency_factor * state.baseline):
+                reason = 'latency'
+            else:
+                if status < 400:
+                    state.rate = min(self.max_rate, state.rate + self.increase)
+                return
+
+            if now - state.last_decrease >= self.cooldown:
+                state.rate = max(self.min_rate, state.rate * self.decrease)
+                state.last_decrease = now
+                metrics.inc('rate_decreases', host=host, reason=reason)
+                logging.info(f"Slowing requests to {host} to {state.rate:.2f}/s ({reason})")
+
+    def rates(self):
+        """Return the current rate of every host seen, in requests per second."""
+        with self._lock:
+            return {host: state.rate for host, state in self._hosts.items()}
@@ -0,0 +1,101 @@
+# imports
+import sys
+
+# This file contains a compact in-memory job record and a columnar batch of them. The extractors return one
+# dictionary per page, with the literal string 'None' for missing fields and a fresh list of skill strings;
+# held by the thousand (in a writer's batch or its tags), dict overhead and duplicate employer and skill
+# strings dominate memory. JobRecord keeps the five fields in __slots__, uses None for missing values and
+# interns the strings that repeat across postings, so every "Python" or "Tech Corp" is stored once.
+
+# Job details keys, in output column order
+FIELDS = ('job_title', 'employer', 'salary', 'description', 'requirements')
+
+# Placeholder the extractors and output files use for a missing field
+MISSING_TEXT = 'None'
+
+
+def _text(value, intern=False):
+    if value is None or value == MISSING_TEXT:
+        return None
+    value = str(value)
+    return sys.intern(value) if intern else value
+
+
+class JobRecord:
+    """
+    One job posting, with None for missing fields and requirements as a tuple of interned skill strings.
+
+    get() reads fields the way a job details dictionary does (missing values as 'None', requirements as a
+    list), so a record can go wherever a job details dictionary is read, such as the dedup index.
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self, job_title=None, employer=None, salary=None, description=None, requirements=None):
+        # Titles, employers, salaries and skills repeat across postings; descriptions are nearly always unique
+        self.job_title = _text(job_title, intern=True)
+        self.employer = _text(employer, intern=True)
+        self.salary = _text(salary, intern=True)
+        self.description = _text(description)
+        if isinstance(requirements, (list, tuple)):
+            requirements = tuple(sys.intern(str(skill)) for skill in requirements)
+        else:
+            requirements = None
+        self.requirements = requirements
+
+    @classmethod
+    def from_details(cls, job_details):
+        """Build a record from a job details dictionary (as returned by extract_job_details)."""
+        return cls(*(job_details.get(field) for field in FIELDS))
+
+    def get(self, field, default=MISSING_TEXT):
+        """Return a field as a job details dictionary holds it: 'None' if missing, requirements as a list."""
+        if field not in FIELDS:
+            return default
+        value = getattr(self, field)
+        if value is None:
+            return MISSING_TEXT
+        return list(value) if field == 'requirements' else value
+
+    def to_details(self):
+        """Return the record as a job details dictionary."""
+        return {field: self.get(field) for field in FIELDS}
+
+    def __eq__(self, other):
+        if not isinstance(other, JobRecord):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in FIELDS)
+
+    def __repr__(self):
+        return f"JobRecord({', '.join(f'{field}={getattr(self, field)!r}' for field in FIELDS)})"
+
+
+class JobBatch:
+    """
+    Columnar batch of job records: one list per field (plus any extra columns, such as a duplicate
+    cluster), which sinks write column by column without building a dictionary per row.
+    """
+
+    def __init__(self, extra_columns=()):
+        self.columns = {field: [] for field in (*FIELDS, *extra_columns)}
+        self._extra = [self.columns[name] for name in extra_columns]
+
+    def __len__(self):
+        return len(self.columns['job_title'])
+
+    def append(self, record, *extra):
+        """Add a JobRecord, followed by its values for the extra columns, in order."""
+        for field in FIELDS:
+            self.columns[field].append(getattr(record, field))
+        for column, value in zip(self._extra, extra):
+            column.append(value)
+
+    def column(self, name):
+        """Return a column's values, with None for missing ones (requirements as tuples)."""
+        return self.columns[name]
+
+    def text_column(self, name):
+        """Return a column's values as output text: 'None' for missing values, requirements as their list repr."""
+        if name == 'requirements':
+            return [MISSING_TEXT if skills is None else repr(list(skills)) for skills in self.columns[name]]
+        return [MISSING_TEXT if value is None else value for value in self.columns[name]]
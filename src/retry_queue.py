@@ -0,0 +1,115 @@
+# imports
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from metrics import metrics
+
+# This file contains a deferred retry queue. Instead of sleeping in place after a failed fetch (which leaves
+# the worker idle for the whole backoff), a failed URL is put in a time-ordered queue with its backoff delay
+# and the worker moves on to fresh URLs. Retries are handed out again as soon as they fall due, and workers
+# only wait once there are no fresh URLs left and every remaining retry is still in the future.
+
+# Statuses worth retrying later: no response at all, timeouts, throttling and server errors
+RETRYABLE_STATUSES = {408, 429}
+
+# Statuses meaning the page is gone for good. Recorded in the crawl state so later runs skip the URL
+PERMANENT_STATUSES = {404, 410}
+
+
+def is_retryable(status):
+    """Return True if a fetch that ended with this HTTP status (None for no response) may succeed later."""
+    return status is None or status in RETRYABLE_STATUSES or status >= 500
+
+
+class RetryQueue:
+    """
+    Thread-safe delay queue of URLs waiting to be retried, shared by all the workers of one fetch stage.
+
+    Args:
+        max_attempts (int): Attempts per URL, including the first, before giving up.
+        base_delay (float): Delay before the first retry; it doubles with each further attempt (plus up to
+            a second of jitter). Retries aren't delayed when a rate_controller is given, as it already
+            slows the host down and honours Retry-After.
+        max_delay (float): Longest delay before a retry.
+        rate_controller (AdaptiveRateController, optional): The controller pacing requests, if any.
+    """
+
+    def __init__(self, max_attempts=3, base_delay=4.0, max_delay=300.0, rate_controller=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rate_controller = rate_controller
+        self._heap = []  # (due time, sequence number, url)
+        self._sequence = itertools.count()
+        self._attempts = {}  # Attempts made so far, for URLs with a retry pending
+        self._in_flight = 0  # URLs handed out and not yet reported back
+        self._condition = threading.Condition()
+
+    def __len__(self):
+        with self._condition:
+            return len(self._heap)
+
+    def urls(self, fresh_urls):
+        """
+        Yield the URLs to fetch: retries that have fallen due first, then fresh URLs (consumed lazily), then
+        the remaining retries as they fall due. Every URL yielded must be reported back with succeeded() or
+        failed(), as a failure may add another retry.
+        """
+        fresh = iter(fresh_urls)
+        while True:
+            with self._condition:
+                url = self._pop_due()
+                while url is None and fresh is None:
+                    if not self._heap and not self._in_flight:
+                        return
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    with metrics.timer('retry_backoff'):  # Only time nobody can spend on other URLs
+                        self._condition.wait(timeout)
+                    url = self._pop_due()
+                if url is not None:
+                    self._in_flight += 1
+            if url is None:
+                url = next(fresh, None)
+                if url is None:
+                    fresh = None
+                    continue
+                with self._condition:
+                    self._in_flight += 1
+            yield url
+
+    def _pop_due(self):
+        if self._heap and self._heap[0][0] <= time.monotonic():
+            return heapq.heappop(self._heap)[2]
+        return None
+
+    def succeeded(self, url):
+        """Report that url was fetched."""
+        with self._condition:
+            self._in_flight -= 1
+            self._attempts.pop(url, None)
+            self._condition.notify_all()
+
+    def failed(self, url, status=None):
+        """
+        Report that fetching url failed with an HTTP status (None if there was no response). Returns True if
+        a retry has been scheduled, or False if the failure is final (not retryable, or out of attempts).
+        """
+        with self._condition:
+            self._in_flight -= 1
+            attempt = self._attempts.pop(url, 1)
+            if not is_retryable(status) or attempt >= self.max_attempts:
+                self._condition.notify_all()
+                return False
+            delay = 0.0
+            if self.rate_controller is None:
+                delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1) + random.uniform(0, 1))
+            self._attempts[url] = attempt + 1
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._sequence), url))
+            self._condition.notify_all()
+        metrics.inc('retries', kind='job_page')
+        logging.info("Retrying %s in %.0fs (attempt %d of %d)", url, delay, attempt + 1, self.max_attempts,
+                     extra={'event': 'retry_scheduled', 'url': url, 'stage': 'fetch', 'attempt': attempt + 1})
+        return True
@@ -0,0 +1,126 @@
+# imports
+import re
+
+# This file contains the salary extractor used when a job page has no dedicated salary tag. It finds the
+# first salary mentioned in free text (such as "Annual compensation $80,000 per year" or
+# "$50,000 - $70,000 per year") and normalises it to min, max, currency and period.
+#
+# The text is split into tokens by one regex with no nested or ambiguous quantifiers, so each character is
+# looked at a bounded number of times, and every token is then examined with a fixed-size look-around
+# window. Run time is therefore linear in the length of the text, however many "pay" or "rate" words it has.
+
+TOKEN_PATTERN = re.compile(r'''
+    (?P<money>[$£€]\ ?\d[\d,]*(?:\.\d+)?(?:[kK](?![^\W\d_]))?)   # $80,000  £25.50  €50k
+  | (?P<number>\d[\d,]*(?:\.\d+)?(?:[kK](?![^\W\d_]))?)         # 80,000 (only a salary if a currency code follows)
+  | (?P<word>[^\W\d_]+)
+  | (?P<dash>[-–—/])
+  | (?P<stop>[.;!?](?!\d))                                       # sentence breaks end a keyword's reach
+''', re.VERBOSE)
+
+# Words that introduce a salary, and how many tokens after one an amount may appear
+KEYWORDS = {'compensation', 'salary', 'salaries', 'pay', 'paid', 'rate', 'wage', 'wages', 'earn', 'earnings'}
+KEYWORD_REACH = 8
+
+CURRENCY_SYMBOLS = {'$': 'USD', '£': 'GBP', '€': 'EUR'}
+CURRENCY_CODES = {'USD', 'GBP', 'EUR', 'CAD', 'AUD'}
+
+# Period units after "per" / "a" / "an" / "/", and words naming a period on their own
+PERIOD_UNITS = {'hour': 'hour', 'hr': 'hour', 'week': 'week', 'wk': 'week', 'month': 'month', 'mo': 'month',
+                'year': 'year', 'yr': 'year', 'annum': 'year'}
+PERIOD_WORDS = {'hourly': 'hour', 'weekly': 'week', 'monthly': 'month', 'yearly': 'year', 'annually': 'year',
+                'annual': 'year', 'annum': 'year'}
+PERIOD_INTRODUCERS = {'per', 'a', 'an', '/'}
+
+
+def _amount(text):
+    """Turn an amount token ("$80,000", "50k", "25.50") into a number."""
+    digits = text.lstrip('$£€ ').rstrip(',')
+    multiplier = 1
+    if digits[-1] in 'kK':
+        digits, multiplier = digits[:-1], 1000
+    value = float(digits.replace(',', '')) * multiplier
+    return int(value) if value.is_integer() else value
+
+
+def _period_after(tokens, j):
+    """Return (period, index after it) for a period starting at tokens[j], or (None, j)."""
+    if j < len(tokens):
+        kind, text, _, _ = tokens[j]
+        word = text.lower()
+        if kind == 'word' and word in PERIOD_WORDS:
+            return PERIOD_WORDS[word], j + 1
+        if word in PERIOD_INTRODUCERS and j + 1 < len(tokens):
+            unit = tokens[j + 1][1].lower().rstrip('s')
+            if unit in PERIOD_UNITS:
+                return PERIOD_UNITS[unit], j + 2
+    return None, j
+
+
+def parse_salary(text):
+    """
+    Find the first salary in text and return it as a dictionary, or None.
+
+    The dictionary has min and max (numbers; equal unless a range was given), currency (ISO code),
+    period ('hour', 'week', 'month', 'year' or None) and raw (the matched text). An amount counts as a
+    salary if it follows a word like "salary" or "pay" within the same sentence, or is followed by a period.
+    """
+    return _find_salary(text)[0]
+
+
+def extract_salary_from_text(text):
+    """Return the first salary amount (or range) in text as written, e.g. "$80,000" or "80,000 USD", or 'None'."""
+    amount_text = _find_salary(text)[1]
+    return amount_text if amount_text else 'None'
+
+
+def _find_salary(text):
+    """Return (salary dictionary, text of just the amounts) for the first salary in text, or (None, None)."""
+    tokens = [(match.lastgroup, match.group(), match.start(), match.end())
+              for match in TOKEN_PATTERN.finditer(text)]
+    last_keyword = None
+
+    for i, (kind, token_text, start, _) in enumerate(tokens):
+        if kind == 'word' and token_text.lower() in KEYWORDS:
+            last_keyword = i
+            continue
+        if kind == 'stop':
+            last_keyword = None
+            continue
+        if kind not in ('money', 'number'):
+            continue
+
+        currency = CURRENCY_SYMBOLS.get(token_text[0])
+        minimum = maximum = _amount(token_text)
+        j = i + 1
+
+        # A range: "$50,000 - $70,000" or "$50,000 to $70,000"
+        if (j + 1 < len(tokens) and (tokens[j][0] == 'dash' or tokens[j][1].lower() == 'to')
+                and tokens[j + 1][0] in ('money', 'number')):
+            maximum = _amount(tokens[j + 1][1])
+            j += 2
+        if j < len(tokens) and tokens[j][1] in CURRENCY_CODES:
+            currency = tokens[j][1]
+            j += 1
+        amount_end = tokens[j - 1][3]  # Amounts plus any currency code, e.g. "80,000 USD"
+        if currency is None:
+            continue  # A bare number, not money
+
+        period, j = _period_after(tokens, j)
+        in_reach = last_keyword is not None and i - last_keyword <= KEYWORD_REACH
+        if not (in_reach or period):
+            continue
+
+        if period is None:
+            # "Annual compensation $80,000": look back through the words leading up to the amount
+            for _, word, _, _ in tokens[max(0, i - KEYWORD_REACH):i]:
+                period = PERIOD_WORDS.get(word.lower(), period)
+
+        salary = {
+            'min': min(minimum, maximum),
+            'max': max(minimum, maximum),
+            'currency': currency,
+            'period': period,
+            'raw': text[start:tokens[j - 1][3]],
+        }
+        return salary, text[start:amount_end]
+    return None, None
@@ -3,16 +3,122 @@
 import logging
 import time
 import random
-from fake_useragent import UserAgent
 from validators import url as validate_url
-from ratelimit import limits, sleep_and_retry
+from ratelimit import limits, RateLimitException
+from functools import wraps
 from contextlib import contextmanager
 import requests
+from http_client import get_session, job_page_headers, read_body, ResponseTooLarge, REQUEST_TIMEOUT, MAX_BODY_BYTES
 from bs4 import BeautifulSoup
-import re
+from metrics import metrics
+from salary import extract_salary_from_text
+from jsonld import extract_job_details_jsonld, job_posting_seen, JOB_DETAIL_KEYS
+from retry_queue import PERMANENT_STATUSES
 
 # This file contains functions related to scraping a job page and returning details
 
+# Politeness budget shared by the sync scraper and the async fetch engine
+RATE_LIMIT_CALLS = 10
+RATE_LIMIT_PERIOD = 90
+
+# One limiter instance decorates every job page fetch function, so they all draw on the same budget
+rate_limit = limits(calls=RATE_LIMIT_CALLS, period=RATE_LIMIT_PERIOD)
+
+def set_rate_limit(calls, period):
+    """Change the politeness budget to `calls` job page requests per `period` seconds."""
+    global RATE_LIMIT_CALLS, RATE_LIMIT_PERIOD
+    RATE_LIMIT_CALLS, RATE_LIMIT_PERIOD = calls, period
+    rate_limit.clamped_calls = max(1, int(calls))
+    rate_limit.period = period
+
+def sleep_and_retry(func):
+    """Like ratelimit.sleep_and_retry: wait out the rate limit and retry, recording the time spent blocked."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except RateLimitException as e:
+                metrics.inc('rate_limit_waits')
+                with metrics.timer('rate_limit_wait'):
+                    time.sleep(e.period_remaining)
+    return wrapper
+
+# Optional AdaptiveRateController (rate_controller.py). When set, it paces every job page and sitemap
+# request per host in place of the fixed budget above and the fixed backoff between retries
+RATE_CONTROLLER = None
+
+def set_rate_controller(controller):
+    """Pace requests with an adaptive rate controller from now on (None to go back to the fixed budget)."""
+    global RATE_CONTROLLER
+    RATE_CONTROLLER = controller
+
+def paced(func):
+    """Apply the fixed politeness budget to func, unless an adaptive rate controller is pacing requests instead."""
+    limited = sleep_and_retry(rate_limit(func))
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if RATE_CONTROLLER is not None:
+            return func(*args, **kwargs)
+        return limited(*args, **kwargs)
+    return wrapper
+
+# HTML extraction backend: 'bs4' (BeautifulSoup, the default) or 'lxml' (fast_extract.py, same output)
+EXTRACTION_BACKEND = 'bs4'
+
+def set_extraction_backend(backend):
+    """Choose the HTML extraction backend used for all job pages."""
+    global EXTRACTION_BACKEND
+    if backend not in ('bs4', 'lxml'):
+        raise ValueError(f"Unknown extraction backend: {backend}. Choose 'bs4' or 'lxml'")
+    EXTRACTION_BACKEND = backend
+
+def parse_job_html(html_content, backend=None):
+    """
+    Extract job details from raw job page HTML.
+
+    The page's JSON-LD JobPosting (jsonld.py) is read first, without building a DOM. Only if it is missing
+    or lacks some fields is the page parsed with the chosen (or configured) backend's CSS selectors, and
+    then just to fill in those fields.
+    """
+    backend = backend or EXTRACTION_BACKEND
+    with metrics.timer('html_parse'):
+        job_details = extract_job_details_jsonld(html_content)
+        if len(job_details) == len(JOB_DETAIL_KEYS):
+            metrics.inc('extractions', path='jsonld')
+            return job_details
+        metrics.inc('extractions', path='jsonld+selectors' if job_details else 'selectors')
+        if backend == 'lxml':
+            from fast_extract import extract_job_details_fast  # Imported lazily as lxml is optional
+            selected = extract_job_details_fast(html_content)
+        else:
+            selected = extract_job_details(BeautifulSoup(html_content, 'html.parser'))
+        selected.update(job_details)
+        return selected
+
+# Optional PageArchive (archive.py) that every successfully fetched job page is stored in
+PAGE_ARCHIVE = None
+
+def set_page_archive(archive):
+    """Archive the raw HTML of every job page fetched from now on (None to stop archiving)."""
+    global PAGE_ARCHIVE
+    PAGE_ARCHIVE = archive
+
+# Job page body limits: the largest decoded body read, and whether to stop reading once the JSON-LD
+# JobPosting has every job detail (which closes the connection rather than returning it to the pool)
+MAX_PAGE_BYTES = MAX_BODY_BYTES
+STOP_AT_JOB_DETAILS = False
+
+def set_page_limits(max_page_bytes=MAX_BODY_BYTES, stop_at_job_details=False):
+    """Cap job page bodies at max_page_bytes, and optionally stop reading them once the job details are in."""
+    global MAX_PAGE_BYTES, STOP_AT_JOB_DETAILS
+    MAX_PAGE_BYTES, STOP_AT_JOB_DETAILS = max_page_bytes, stop_at_job_details
+
+def page_stop_condition():
+    """Return read_body()'s stop_when predicate for job pages, or None to read them in full."""
+    # Archived pages are always read in full, so the archive keeps whole pages
+    return job_posting_seen if STOP_AT_JOB_DETAILS and PAGE_ARCHIVE is None else None
+
 # define scraping function
 
 @contextmanager
@@ -46,77 +152,138 @@ def scrape_job_page(url, max_retries=3, html_content=None, disable_logging=False
     else:
         return _scrape_job_page_core(url, max_retries, html_content)
 
-@limits(calls=10, period=90)
+@paced
 def _scrape_job_page_core(url, max_retries, html_content):
     """Core logic for scraping job page to be reused by the main function."""
 
     # If html_content is provided, skip requests and parse directly
     if html_content:
-        job_soup = BeautifulSoup(html_content, 'html.parser')
-        job_details = extract_job_details(job_soup)
-        logging.info("Successfully parsed job details from static HTML content.")
+        job_details = parse_job_html(html_content)
+        logging.info("Successfully parsed job details from static HTML content.",
+                     extra={'event': 'page_scraped', 'stage': 'parse'})
         return job_details
 
     if not validate_url(url):
         logging.error(f"Invalid job page URL: {url}")
         return None
 
-    # Set up headers and user-agent for scraping
-    ua = UserAgent()
-    headers = {
-        'User-Agent': ua.random,
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Referer': 'https://www.monster.com',
-        'Connection': 'keep-alive',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Upgrade-Insecure-Requests': '1',
-    }
+    def parse(html, response):
+        job_details = parse_job_html(html)
+        logging.info("Successfully scraped job details for %s", url,
+                     extra={'event': 'page_scraped', 'url': url, 'stage': 'parse'})
+        return job_details
 
-    delay = 2
-    attempt = 0
+    return _fetch_with_retries(url, max_retries, parse)
+
+@paced
+@paced
+def fetch_job_page(url):
+    """
+    Make a single attempt at fetching a job page, leaving any retry to the caller (see retry_queue.py).
 
-    @sleep_and_retry
-    def fetch_and_parse():
-        logging.info(f"Fetching URL: {url} (Attempt {attempt + 1})")
-        response = requests.get(url, headers=headers)
+    Returns (html, status): the raw HTML bytes, or None on failure, and the HTTP status code, or None if
+    there was no response.
+    """
+    if not validate_url(url):
+        logging.error(f"Invalid job page URL: {url}")
+        return None, None
+    try:
+        return _fetch_once(url, job_page_headers(), 0, lambda html, response: (html, response.status_code))
+    except requests.exceptions.RequestException as e:
+        logging.error(f"Error scraping {url}: {e}")
+        return None, e.response.status_code if e.response is not None else None
+    except Exception as e:
+        logging.error(f"An unexpected error occurred while scraping {url}: {e}")
+        return None, None
+
+def scrape_job_page_once(url):
+    """Make a single attempt at scraping a job page. Returns (job_details, status); job_details is None on failure."""
+    html_content, status = fetch_job_page(url)
+    if html_content is None:
+        return None, status
+    try:
+        job_details = parse_job_html(html_content)
+    except Exception as e:
+        logging.error(f"Error parsing {url}: {e}")
+        return None, status
+    logging.info("Successfully scraped job details for %s", url,
+                 extra={'event': 'page_scraped', 'url': url, 'stage': 'parse'})
+    return job_details, status
+
+def _fetch_once(url, headers, attempt, handle_response):
+    """
+    Fetch url once and return handle_response(html, response), raising on request errors, HTTP error
+    statuses and bodies over MAX_PAGE_BYTES. The body is streamed and decoded by read_body().
+    """
+    controller = RATE_CONTROLLER
+    if controller is not None:
+        controller.acquire(url)
+    metrics.inc('fetches', kind='job_page')
+    start = time.perf_counter()
+    try:
+        with metrics.timer('http_fetch'):
+            response = get_session().get(url, headers=headers, timeout=REQUEST_TIMEOUT, stream=True)
+    except requests.exceptions.RequestException:
+        if controller is not None:
+            controller.record(url, None)
+        raise
+    try:
+        metrics.inc('http_responses', kind='job_page', status=response.status_code)
+        if controller is not None:
+            controller.record(url, response.status_code, response.elapsed.total_seconds(),
+                              response.headers.get('Retry-After'))
         response.raise_for_status()
-        job_soup = BeautifulSoup(response.content, 'html.parser')
-        job_details = extract_job_details(job_soup)
-        logging.info(f"Successfully scraped job details for {url}")
-        return job_details
+        stop_when = page_stop_condition()
+        with metrics.timer('http_body'):
+            html, wire_bytes = read_body(response, MAX_PAGE_BYTES, stop_when)
+    except ResponseTooLarge:
+        metrics.inc('responses_too_large', kind='job_page')
+        raise
+    finally:
+        response.close()
+    metrics.inc('bytes_received', len(html), kind='job_page')
+    metrics.inc('bytes_on_wire', wire_bytes, kind='job_page')
+    logging.info("Fetched URL: %s (Attempt %d): HTTP %d, %d bytes", url, attempt + 1, response.status_code, len(html),
+                 extra={'event': 'page_fetched', 'url': url, 'stage': 'fetch', 'status': response.status_code,
+                        'attempt': attempt + 1, 'duration': time.perf_counter() - start})
+    if PAGE_ARCHIVE is not None:
+        PAGE_ARCHIVE.store(url, html)
+    return handle_response(html, response)
+
+def _fetch_with_retries(url, max_retries, handle_response):
+    """Fetch url with exponential backoff on request errors and return handle_response(response)."""
+
+    # Take the next rotating headers from the shared pool
+    headers = job_page_headers()
+
+    delay = 2
+    attempt = 0
 
     while attempt < max_retries:
         try:
-            return fetch_and_parse()
+            return _fetch_once(url, headers, attempt, handle_response)
         except requests.exceptions.RequestException as e:
             attempt += 1
-            logging.error(f"Error scraping {url}. Attempt {attempt} failed: {e}")
-            time.sleep(delay * (2 ** attempt) + random.uniform(0, 1))
+            logging.error("Error scraping %s. Attempt %d failed: %s", url, attempt, e,
+                          extra={'url': url, 'stage': 'fetch', 'attempt': attempt,
+                                 'status': e.response.status_code if e.response is not None else None})
+            status = e.response.status_code if e.response is not None else None
+            if status in PERMANENT_STATUSES or isinstance(e, ResponseTooLarge):
+                break  # The page is gone (or too large); retrying won't change that
+            metrics.inc('retries', kind='job_page')
+            if RATE_CONTROLLER is not None:
+                continue  # The controller has already slowed down (and paused for any Retry-After)
+            with metrics.timer('retry_backoff'):
+                time.sleep(delay * (2 ** attempt) + random.uniform(0, 1))
         except Exception as e:
             logging.error(f"An unexpected error occurred while scraping {url}: {e}")
             break
 
-    logging.error(f"Failed to scrape {url} after {max_retries} attempts.")
+    logging.error(f"Failed to scrape {url} after {attempt} attempts.")
     return None
 
 
-# define regex pattern for salary-like information and search function for salary info - include time unit (hour, week, month, year) after the salary amount
-
-salary_pattern = re.compile(
-    r'(?i)(compensation|salary|pay|rate)[\s\w]*?(:?|\s) (\$[\d,]+(?:\.\d{2})?)(\s*(?:per|weekly|monthly|yearly|hourly|annually)?\s*){1,4}((hour|week|month|year))?'
-)
-
-# define function to search for salary details
-def extract_salary_from_text(text):
-    """Applies regex to extract salary-like info from a text (job title or description)."""
-    match = salary_pattern.search(text)
-    if match:
-        # This constructs the salary string with the time unit
-        salary_amount = match.group(2)  # This returns the salary amount found
-        time_unit = match.group(3) if match.group(3) else ''  # Optional time unit
-        return f"{salary_amount} {time_unit}".strip()  # Combine and return
-    return 'None'
+# Salary extraction from free text (title/description) lives in salary.py
 
 
 # define function to extract elements from job page
@@ -163,12 +330,14 @@ def extract_job_details(job_soup):
         )
         if salary_element:
             job_details['salary'] = salary_element.text.strip()
-            logging.info(f"extracted salary element from field: {job_details['salary']}")
+            logging.info("extracted salary element from field: %s", job_details['salary'],
+                         extra={'event': 'salary_extracted', 'stage': 'extract'})
         else:
             # Fallback to search the job title and description
             job_title = job_details.get('job_title', '')
             job_details['salary'] = extract_salary_from_text(job_title + ' ' + job_description)
-            logging.info(f"fallback search identified salary: {job_details['salary']}")
+            logging.info("fallback search identified salary: %s", job_details['salary'],
+                         extra={'event': 'salary_extracted', 'stage': 'extract'})
     except Exception as e:
         job_details['salary'] = 'None'
         logging.error(f"Error extracting salary: {e}")
@@ -0,0 +1,91 @@
+# imports
+import glob
+import hashlib
+import logging
+import os
+from crawl_state import content_hash
+from writers import FIELDNAMES, open_writer, iter_rows, replace_output, row_to_job_details, staging_path
+
+# This file contains the helpers for spreading a crawl across several machines (or processes). Each
+# worker owns the job URLs whose stable hash falls in its shard, writes its own output shard, and
+# merge_shards() combines the shards into one deduplicated dataset afterwards.
+
+
+def shard_of(url, shard_count):
+    """Return the shard (0 to shard_count - 1) that owns url. Stable across processes, machines and runs."""
+    digest = hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % shard_count
+
+
+def shard_path(path, shard_index, shard_count):
+    """Return the per-shard version of a file path (jobs.csv -> jobs.shard-0-of-4.csv)."""
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.shard-{shard_index}-of-{shard_count}{ext}"
+
+
+def shard_dir(path, shard_index, shard_count):
+    """Return the per-shard version of a directory (sitemaps -> sitemaps/shard-0-of-4)."""
+    return os.path.join(path, f"shard-{shard_index}-of-{shard_count}")
+
+
+def find_shards(output_path, shard_count):
+    """
+    Return the shard files written for output_path, including numbered Parquet files. Raises
+    FileNotFoundError if any shard has no output, as merging without it would lose its records.
+    """
+    stem, ext = os.path.splitext(output_path)
+    paths = []
+    missing = []
+    for shard_index in range(shard_count):
+        shard_stem = f"{stem}.shard-{shard_index}-of-{shard_count}"
+        found = glob.glob(glob.escape(shard_stem) + ext) + sorted(glob.glob(glob.escape(shard_stem) + '.*' + ext))
+        if not found:
+            missing.append(shard_index)
+        paths += found
+    if missing:
+        raise FileNotFoundError(f"No output found for shard(s) {', '.join(map(str, missing))} of {shard_count} "
+                                f"next to {output_path}; check the shard count")
+    return paths
+
+
+def shard_fieldnames(paths):
+    """Return the output columns of the shard files: FIELDNAMES plus any extra ones, such as Duplicate Cluster."""
+    fieldnames = list(FIELDNAMES)
+    for path in paths:
+        rows = iter_rows(path)
+        first_row = next(rows, None)
+        rows.close()
+        fieldnames += [name for name in first_row or () if name not in fieldnames]
+    return fieldnames
+
+
+def merge_shards(output_path, shard_count, output_format=None, batch_size=500):
+    """
+    Combine the output shards of a sharded crawl into one dataset at output_path, dropping duplicate records.
+
+    Shards are found next to output_path with its extension (CSV, JSONL or Parquet), and their columns
+    are kept. The merged file is written next to output_path and then renamed over it, so merging again
+    replaces the dataset rather than adding to it. If any shard is missing, FileNotFoundError is raised
+    before output_path is touched. Returns the number of records written.
+    """
+    paths = find_shards(output_path, shard_count)
+    fieldnames = shard_fieldnames(paths)
+    extra_columns = fieldnames[len(FIELDNAMES):]
+    merging_path = staging_path(output_path)
+
+    seen = set()
+    duplicates = 0
+    with open_writer(merging_path, output_format, batch_size, fieldnames=fieldnames) as writer:
+        for path in paths:
+            for row in iter_rows(path):
+                job_details = row_to_job_details(row)
+                digest = content_hash(job_details)
+                if digest in seen:
+                    duplicates += 1
+                    continue
+                seen.add(digest)
+                writer.write(job_details, extra=[row.get(name) for name in extra_columns])
+    replace_output(writer.sink.path, output_path, output_format)
+    logging.info(f"Merged {shard_count} shards into {output_path}: {writer.rows_written} records, "
+                 f"{duplicates} duplicates dropped")
+    return writer.rows_written
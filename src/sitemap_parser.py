@@ -1,139 +1,445 @@
 
 # imports
-import csv
 import requests
 import logging
 import time
-from scraper import process_job_url
+import scraper
+from scraper import scrape_job_page_once
+from async_fetcher import scrape_job_pages
+from pipeline import run_pipeline
+from retry_queue import RetryQueue
+from frontier import CrawlFrontier
+from writers import open_writer
+from records import JobRecord
 import xml.etree.ElementTree as ET
 from datetime import datetime, timedelta
 import random
-from fake_useragent import UserAgent
+from http_client import get_session, sitemap_headers, REQUEST_TIMEOUT
+from metrics import metrics
+from sharding import shard_of
 from validators import url as validate_url
 import os
 import gzip
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 
-# This file contains functions to download sitemap files, parse them for URLs, and save scraped details to csv file,
+# This file contains functions to download sitemap files, parse them for URLs, and save scraped details to the output file,
 
 # define functions to go through the URLs in xml.gz file, scraping elements from each URL and saving in csv file
 
+SITEMAP_NAMESPACE = {'ns': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
+
+
+def default_cutoff_date():
+    """Oldest sitemap lastmod date still scraped: one week ago."""
+    return datetime.now().date() - timedelta(weeks=1)
+
 def prepare_files(xml_gz_file, output_csv):
     """Prepare absolute paths and open output CSV file."""
     xml_gz_file = os.path.abspath(xml_gz_file)
     output_csv = os.path.abspath(output_csv)
     return xml_gz_file, output_csv
 
-def parse_xml_and_filter_urls(xml_gz_file, namespace, cutoff_date, max_urls=10):
-    """Parse XML file, filter URLs by date, and yield valid URLs."""
-    with gzip.open(xml_gz_file, 'rt', encoding='utf-8') as f:
-        tree = ET.parse(f)
-        root = tree.getroot()
-        processed_urls = 0
+def filter_url_entry(url, lastmod_text, cutoff_date):
+    """Return True if a sitemap entry is a valid, recent job ad URL."""
+    if not validate_url(url):  # Skips invalid URLs
+        logging.warning(f"Invalid URL format: {url}")
+        return False
+
+    try:
+        lastmod_date = datetime.strptime(lastmod_text[:10], '%Y-%m-%d').date()
+    except ValueError:
+        logging.warning(f"Skipping URL due to invalid date format: {url}")
+        return False
 
-        for url_elem in root.findall('ns:url', namespace):
-            if processed_urls >= max_urls:
-                break
-            loc_elem = url_elem.find('ns:loc', namespace)
-            lastmod_elem = url_elem.find('ns:lastmod', namespace)
+    if lastmod_date < cutoff_date or 'sitemaps' in url:
+        return False  # Skip outdated or irrelevant URLs
+    return True
 
+def iter_url_entries(xml_gz_file, namespace):
+    """Stream (loc, lastmod) pairs from a sitemap, clearing each <url> element once it has been read."""
+    url_tag = f"{{{namespace['ns']}}}url"
+    with gzip.open(xml_gz_file, 'rb') as f:
+        context = ET.iterparse(f, events=('start', 'end'))
+        _, root = next(context)  # Keep a handle on the root so finished entries can be detached
+        for event, elem in context:
+            if event != 'end' or elem.tag != url_tag:
+                continue
+            loc_elem = elem.find('ns:loc', namespace)
+            lastmod_elem = elem.find('ns:lastmod', namespace)
             if loc_elem is not None and lastmod_elem is not None:
-                url = loc_elem.text
+                yield loc_elem.text, lastmod_elem.text
+            root.clear()  # Drop processed entries so memory stays flat however big the sitemap is
+
+def filter_job_entries(xml_gz_file, namespace, cutoff_date, max_urls=10, streaming=True, crawl_state=None,
+                       journal=None, shard=None, keep_done=False):
+    """Parse XML file, filter entries by date, and yield (url, lastmod) pairs for valid URLs.
+
+    By default the sitemap is parsed incrementally, so the first entry is yielded before the
+    rest of the file has been read. Set streaming=False to load the whole tree with ET.parse.
+    If a CrawlState is given, URLs whose lastmod is unchanged since their last successful
+    scrape, or since they last answered 404 / 410, are skipped (and don't count towards max_urls). If a RunJournal is given, URLs
+    already done by the interrupted run being resumed are skipped too, but do count towards
+    max_urls, so the resumed run covers exactly the URLs the original run would have. They are
+    checked before the crawl state, which has recorded them since. With keep_done=True they are
+    yielded instead of skipped, for a caller that skips them itself.
+    With shard=(shard_index, shard_count), only URLs owned by that shard (see sharding.py)
+    are yielded; max_urls then counts this shard's URLs only.
+    The generator returns True once the whole file has been read, or False if max_urls cut it short.
+    """
+    if streaming:
+        entries = iter_url_entries(xml_gz_file, namespace)
+    else:
+        with gzip.open(xml_gz_file, 'rt', encoding='utf-8') as f:
+            root = ET.parse(f).getroot()
+        entries = (
+            (url_elem.find('ns:loc', namespace).text, url_elem.find('ns:lastmod', namespace).text)
+            for url_elem in root.findall('ns:url', namespace)
+            if url_elem.find('ns:loc', namespace) is not None and url_elem.find('ns:lastmod', namespace) is not None
+        )
+
+    processed_urls = 0
+    for url, lastmod_text in metrics.timed_iter(entries, 'xml_parse'):
+        if processed_urls >= max_urls:
+            return False  # Entries remain past the cap
+        if not filter_url_entry(url, lastmod_text, cutoff_date):
+            metrics.inc('sitemap_entries', outcome='filtered')
+            continue
+        if shard is not None and shard_of(url, shard[1]) != shard[0]:
+            metrics.inc('sitemap_entries', outcome='other_shard')
+            continue
+        if journal is not None and journal.is_done(url):
+            processed_urls += 1
+            if keep_done:
+                yield url, lastmod_text
+            else:
+                metrics.inc('sitemap_entries', outcome='resumed')
+            continue  # Done before the interrupted run stopped
+        if crawl_state is not None:
+            # Already scraped this version of the posting, or it answered 404 / 410 last time
+            skip_reason = crawl_state.skip_reason(url, lastmod_text)
+            if skip_reason is not None:
+                metrics.inc('sitemap_entries', outcome=skip_reason)
+                continue
+        processed_urls += 1
+        metrics.inc('sitemap_entries', outcome='accepted')
+        yield url, lastmod_text
+    return True
+
+def parse_xml_and_filter_urls(xml_gz_file, namespace, cutoff_date, max_urls=10, streaming=True, crawl_state=None,
+                              shard=None):
+    """Parse XML file, filter URLs by date, and yield valid URLs. See filter_job_entries for options."""
+    for url, _ in filter_job_entries(xml_gz_file, namespace, cutoff_date, max_urls, streaming, crawl_state,
+                                     shard=shard):
+        yield url
+
+
+
+
+class PolitenessGate:
+    """Thread-safe gate that spaces request start times by a random delay, shared by download workers."""
+
+    def __init__(self, min_delay=3, max_delay=7):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self._next_start = 0.0
+        self._lock = threading.Lock()
 
-                if not validate_url(url):  # Skips invalid URLs
-                    logging.warning(f"Invalid URL format: {url}")
-                    continue
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + random.uniform(self.min_delay, self.max_delay)
+        with metrics.timer('politeness_wait'):
+            time.sleep(start - now)
 
-                try:
-                    lastmod_date = datetime.strptime(lastmod_elem.text[:10], '%Y-%m-%d').date()
-                except ValueError:
-                    logging.warning(f"Skipping URL due to invalid date format: {url}")
-                    continue
 
-                if lastmod_date < cutoff_date or 'sitemaps' in url:
-                    continue  # Skip outdated or irrelevant URLs
+def _get(url, **kwargs):
+    """GET url through the shared session, reporting the outcome to the adaptive rate controller if one is set."""
+    controller = scraper.RATE_CONTROLLER
+    try:
+        response = get_session().get(url, timeout=REQUEST_TIMEOUT, **kwargs)
+    except requests.exceptions.RequestException:
+        if controller is not None:
+            controller.record(url, None)
+        raise
+    if controller is not None:
+        controller.record(url, response.status_code, response.elapsed.total_seconds(),
+                          response.headers.get('Retry-After'))
+    return response
 
-                processed_urls += 1
-                yield url
 
+def download_sitemap_file(sitemap_url, file_name, headers, previous=None, chunk_size=64 * 1024):
+    """
+    Stream one sitemap to disk, sending conditional GET validators from a previous download if known.
 
+    Returns (etag, last_modified) validators for the new file, or None if the server replied
+    304 Not Modified. The body is written to a .part file and moved into place when complete.
+    """
+    request_headers = dict(headers)
+    if previous:
+        if previous.get('etag'):
+            request_headers['If-None-Match'] = previous['etag']
+        if previous.get('last_modified'):
+            request_headers['If-Modified-Since'] = previous['last_modified']
+
+    with metrics.timer('sitemap_download'), \
+            _get(sitemap_url, headers=request_headers, stream=True) as response:
+        metrics.inc('http_responses', kind='sitemap', status=response.status_code)
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        part_file = file_name + '.part'
+        size = 0
+        with open(part_file, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                f.write(chunk)
+                size += len(chunk)
+        os.replace(part_file, file_name)
+        metrics.inc('bytes_received', size, kind='sitemap')
+        return response.headers.get('ETag'), response.headers.get('Last-Modified')
 
 
 # Define function to download XML.gz files (sitemaps) from Monster.com page including rotating headers and random sleep delay).
-def download_sitemaps(sitemap_url, output_dir, num_sitemaps=5):
-    """Download XML sitemap files from a sitemap index page and return a list of downloaded file paths."""
+def download_sitemaps(sitemap_url, output_dir, num_sitemaps=5, crawl_state=None, max_workers=3,
+                      min_delay=3, max_delay=7):
+    """
+    Download XML sitemap files from a sitemap index page and return a list of downloaded file paths.
+
+    Up to max_workers sitemaps download at once, with request starts spaced min_delay-max_delay
+    seconds apart (or paced by the adaptive rate controller, if one is set). Bodies are streamed to
+    disk rather than held in memory.
 
-    ua = UserAgent()  # Create an instance of UserAgent
-    headers = {
-        'User-Agent': ua.random,  # Use a random User-Agent
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Accept': 'application/xml;q=0.9,text/html;q=0.8,*/*;q=0.7',
-    }
+    If a CrawlState is given, child sitemaps whose index <lastmod> is unchanged since they were
+    last processed are skipped, and the rest are fetched with conditional GET (ETag /
+    Last-Modified), so 304 responses are skipped too. New validators are staged on the crawl
+    state and only saved once main() calls crawl_state.mark_sitemap_processed(file_name).
+    """
+
+    headers = sitemap_headers()  # Rotating headers from the shared pool
 
     # Initial request to get the sitemap index
-    response = requests.get(sitemap_url, headers=headers)
+    controller = scraper.RATE_CONTROLLER
+    if controller is not None:
+        controller.acquire(sitemap_url)
+    response = _get(sitemap_url, headers=headers)
     response.raise_for_status()  # Ensure the request was successful
 
     sitemap_root = ET.fromstring(response.content)
     ns = {'ns': "http://www.sitemaps.org/schemas/sitemap/0.9"}
 
-    # Retrieve URLs with validation
-    sitemap_urls = []
-    for loc in sitemap_root.findall('ns:sitemap/ns:loc', ns)[:num_sitemaps]:
-        sitemap_loc = loc.text
+    # Retrieve URLs (with their index lastmod) with validation
+    sitemap_entries = []
+    for sitemap_elem in sitemap_root.findall('ns:sitemap', ns)[:num_sitemaps]:
+        loc_elem = sitemap_elem.find('ns:loc', ns)
+        lastmod_elem = sitemap_elem.find('ns:lastmod', ns)
+        sitemap_loc = loc_elem.text if loc_elem is not None else None
+        index_lastmod = lastmod_elem.text if lastmod_elem is not None else None
         if validate_url(sitemap_loc):  # Validate each sitemap URL
-            sitemap_urls.append(sitemap_loc)
+            sitemap_entries.append((sitemap_loc, index_lastmod))
         else:
             logging.warning(f"Skipping invalid sitemap URL: {sitemap_loc}")
 
-    downloaded_files = []  # To store paths of downloaded files
+    gate = PolitenessGate(min_delay, max_delay)
+
+    def download(index, sitemap_loc, index_lastmod):
+        previous = crawl_state.get_sitemap(sitemap_loc) if crawl_state is not None else None
+        if previous and index_lastmod and previous['index_lastmod'] == index_lastmod:
+            logging.info(f"Sitemap {index} unchanged since last run (lastmod {index_lastmod}). Skipping...")
+            return None
 
-    for index, sitemap_url in enumerate(sitemap_urls, start=1):
+        file_name = os.path.join(output_dir, f"sitemap_{index}.xml.gz")
         try:
-            logging.info(f"Downloading sitemap {index}: {sitemap_url}")
-            sitemap_response = requests.get(sitemap_url, headers=headers)
-            sitemap_response.raise_for_status()
+            if controller is not None:
+                controller.acquire(sitemap_loc)  # Adaptive pacing replaces the fixed random delay
+            else:
+                gate.wait()
+            logging.info(f"Downloading sitemap {index}: {sitemap_loc}")
+            validators = download_sitemap_file(sitemap_loc, file_name, headers, previous)
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Failed to download {sitemap_loc}. Error: {e}")
+            return None
 
-            # Save each XML.gz file in the output directory
-            file_name = os.path.join(output_dir, f"sitemap_{index}.xml.gz")
-            with open(file_name, 'wb') as f:
-                f.write(sitemap_response.content)
+        if validators is None:
+            logging.info(f"Sitemap {index} not modified (304). Skipping...")
+            return None
 
-            downloaded_files.append(file_name)  # Append path to the list
-            logging.info(f"Saved sitemap {index} to {file_name}")
+        if crawl_state is not None:
+            etag, last_modified = validators
+            crawl_state.stage_sitemap(file_name, sitemap_loc, index_lastmod, etag, last_modified)
+        logging.info(f"Saved sitemap {index} to {file_name}")
+        return file_name
 
-            # Random delay between requests
-            time.sleep(random.uniform(3, 7))  # Random delay between 3 to 7 seconds
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(download, index, sitemap_loc, index_lastmod)
+            for index, (sitemap_loc, index_lastmod) in enumerate(sitemap_entries, start=1)
+        ]
+        results = [future.result() for future in futures]
 
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Failed to download {sitemap_url}. Error: {e}")
-
-    return downloaded_files  # Return the list of downloaded file paths
-
-
-def write_to_csv(output_csv, fieldnames, job_details):
-    """Write job details to CSV file."""
-    with open(output_csv, mode='a', newline='', encoding='utf-8') as csv_file:
-        writer = csv.DictWriter(csv_file, fieldnames=fieldnames, quoting=csv.QUOTE_ALL)
-        if csv_file.tell() == 0:
-            writer.writeheader()  # Write header if file is empty
-        writer.writerow({
-            'Job Title': job_details.get('job_title', 'None'),
-            'Employer': job_details.get('employer', 'None'),
-            'Salary': job_details.get('salary', 'None'),
-            'Description': job_details.get('description', 'None'),
-            'Requirements': job_details.get('requirements', 'None')
-        })
-
-def process_xml_file(xml_gz_file, output_csv, num_urls=10):
-    """Main function to process XML file and extract job data."""
+    # Return the list of downloaded file paths, in index order
+    return [file_name for file_name in results if file_name is not None]
+
+
+def process_xml_file(xml_gz_file, output_csv, num_urls=10, async_fetch=False, per_host_concurrency=4,
+                     writer=None, crawl_state=None, pipeline=False, fetch_workers=8, parse_workers=None,
+                     journal=None, shard=None):
+    """Main function to process XML file and extract job data.
+
+    Scrapes the first num_urls recent job URLs of one sitemap file. See process_entries for the
+    fetch modes and the writer, crawl state and journal options, and process_frontier for
+    choosing the most recent URLs across several sitemaps instead.
+
+    With shard=(shard_index, shard_count), only the job URLs owned by that shard are scraped.
+
+    Returns True if every job URL in the file was taken, or False if num_urls cut it short.
+    """
     xml_gz_file, output_csv = prepare_files(xml_gz_file, output_csv)
-    namespace = {'ns': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
-    today = datetime.now().date()
-    cutoff_date = today - timedelta(weeks=1)
-    fieldnames = ['Job Title', 'Employer', 'Salary', 'Description', 'Requirements']
-
-    for url in parse_xml_and_filter_urls(xml_gz_file, namespace, cutoff_date, num_urls):
-        job_details = process_job_url(url)
-        if job_details:
-            write_to_csv(output_csv, fieldnames, job_details)
+    read_whole_file = []
+
+    def entries():
+        read_whole_file.append((yield from filter_job_entries(
+            xml_gz_file, SITEMAP_NAMESPACE, default_cutoff_date(), num_urls,
+            crawl_state=crawl_state, journal=journal, shard=shard)))
+
+    process_entries(entries(), output_csv, async_fetch, per_host_concurrency, writer, crawl_state, pipeline,
+                    fetch_workers, parse_workers, journal)
+    return read_whole_file == [True]
+
+
+def build_frontier(xml_gz_files, url_budget, max_per_group=None, crawl_state=None, shard=None, journal=None):
+    """
+    Stream every sitemap file through a CrawlFrontier (frontier.py) holding the url_budget most recent
+    job URLs across all of them, with at most max_per_group URLs sharing a job slug.
+
+    Entries are filtered as in filter_job_entries. URLs the given journal marks as done by the run
+    being resumed stay in the frontier, even though the crawl state has recorded them since, so it
+    selects exactly the URLs the interrupted run did; process_frontier skips them.
+    The frontier's `truncated` set names the files that had URLs left out by the budget.
+    """
+    frontier = CrawlFrontier(url_budget, max_per_group)
+    cutoff = default_cutoff_date()
+    for xml_gz_file in xml_gz_files:
+        for url, lastmod in filter_job_entries(os.path.abspath(xml_gz_file), SITEMAP_NAMESPACE, cutoff,
+                                               max_urls=float('inf'), crawl_state=crawl_state, journal=journal,
+                                               shard=shard, keep_done=True):
+            frontier.offer(url, lastmod, source=xml_gz_file)
+    metrics.inc('frontier_urls', len(frontier), outcome='selected')
+    metrics.inc('frontier_urls', frontier.offered - len(frontier), outcome='dropped')
+    logging.info(f"Frontier holds the {len(frontier)} most recent of {frontier.offered} job URLs "
+                 f"across {len(xml_gz_files)} sitemaps")
+    return frontier
+
+
+def process_frontier(xml_gz_files, output_csv, url_budget, max_per_group=None, async_fetch=False,
+                     per_host_concurrency=4, writer=None, crawl_state=None, pipeline=False, fetch_workers=8,
+                     parse_workers=None, journal=None, shard=None):
+    """
+    Scrape the url_budget most recently modified job URLs across all the sitemap files, newest first,
+    instead of the first few URLs of each file. See build_frontier and process_entries for the options.
+
+    Returns the sitemap files whose every job URL fit in the budget, the only ones scraped in full.
+    """
+    output_csv = os.path.abspath(output_csv)
+    frontier = build_frontier(xml_gz_files, url_budget, max_per_group, crawl_state, shard, journal)
+
+    def entries():
+        for url, lastmod in frontier.entries():
+            if journal is not None and journal.is_done(url):
+                metrics.inc('sitemap_entries', outcome='resumed')
+                continue  # Done before the interrupted run stopped
+            yield url, lastmod
+
+    process_entries(entries(), output_csv, async_fetch, per_host_concurrency, writer, crawl_state, pipeline,
+                    fetch_workers, parse_workers, journal)
+    return [xml_gz_file for xml_gz_file in xml_gz_files if xml_gz_file not in frontier.truncated]
+
+
+def process_entries(entries, output_csv, async_fetch=False, per_host_concurrency=4, writer=None,
+                    crawl_state=None, pipeline=False, fetch_workers=8, parse_workers=None, journal=None):
+    """Scrape job pages for an iterable of (url, lastmod) pairs and write the job details.
+
+    With async_fetch=True, job pages are fetched concurrently (up to per_host_concurrency
+    requests in flight per host) instead of one at a time.
+
+    With pipeline=True, fetching, parsing and writing run as separate stages (see pipeline.py):
+    fetch_workers threads download pages and parse_workers processes (default: one per CPU)
+    extract job details, so HTML parsing no longer holds up the network.
+
+    In the sync and pipeline modes a failed fetch doesn't sleep in place: the URL goes on a
+    deferred RetryQueue (retry_queue.py) and is fetched again once its backoff has passed, while
+    fresh URLs are fetched in the meantime. The async engine backs off per request, without
+    blocking other requests. A page answering 404 / 410 isn't retried in any mode.
+
+    Records go to `writer` (a BatchWriter from writers.py) if one is passed in, so a single
+    writer can stay open across several sitemaps. Otherwise a writer is opened for output_csv,
+    with the format taken from its extension (.csv, .jsonl or .parquet), and closed at the end.
+
+    If a CrawlState (crawl_state.py) is passed in, every fetch outcome is recorded in it, so pages
+    that are gone (404 / 410) are skipped next run too. Successes are recorded once their rows have been flushed,
+    through the writer's flush listeners: a writer passed in should already have
+    crawl_state.record_flushed attached (main() does this), and an own writer gets it here.
+
+    If a RunJournal (checkpoint.py) is passed in, failures are noted in it. As with the crawl
+    state, a writer passed in should have journal.record_flushed attached, ahead of
+    crawl_state.record_flushed, and be durable.
+    """
+    if async_fetch and pipeline:
+        raise ValueError("Choose either async_fetch or pipeline, not both")
+
+    owns_writer = writer is None
+    if owns_writer:
+        writer = open_writer(output_csv)
+        if journal is not None:
+            writer.flush_listeners.append(journal.record_flushed)
+            writer.durable = True
+        if crawl_state is not None:
+            writer.flush_listeners.append(crawl_state.record_flushed)
+
+    lastmods = {}  # lastmod of each URL handed to the fetcher, until its outcome is recorded
+
+    def handle_result(url, job_details):
+        metrics.inc('pages', outcome='scraped')
+        record = JobRecord.from_details(job_details)  # One compact copy, for both the batch and the crawl state
+        writer.write(record, tag=(url, lastmods.pop(url, None), record))
+
+    def handle_failure(url, status=None):
+        metrics.inc('pages', outcome='failed')
+        if crawl_state is not None:
+            crawl_state.record(url, lastmods.pop(url, None), status)
+        if journal is not None:
+            journal.record_failed(url)
+
+    def urls():
+        for url, lastmod in entries:
+            lastmods[url] = lastmod
+            yield url
+
+    try:
+        if async_fetch:
+            scrape_job_pages(
+                urls(),
+                handle_result,
+                on_failure=handle_failure,
+                per_host_concurrency=per_host_concurrency,
+            )
+            return
+
+        retries = RetryQueue(rate_controller=scraper.RATE_CONTROLLER)
+        if pipeline:
+            run_pipeline(urls(), handle_result, on_failure=handle_failure,
+                         fetch_workers=fetch_workers, parse_workers=parse_workers, retries=retries)
+            return
+
+        for url in retries.urls(urls()):
+            job_details, status = scrape_job_page_once(url)
+            if job_details:
+                retries.succeeded(url)
+                handle_result(url, job_details)
+            elif not retries.failed(url, status):
+                logging.warning(f"No details found for {url}. Skipping...")
+                handle_failure(url, status)
+    finally:
+        if owns_writer:
+            writer.close()
@@ -0,0 +1,143 @@
+# imports
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from metrics import metrics
+
+# This file contains the logging mode for high fetch rates. Log records are handed to a background thread
+# through a queue, so formatting them and writing to the file and console happen off the scraping threads,
+# the file can be written as structured JSON Lines, and the per-page events (fetches, extractions), which
+# carry an `event` field, can be sampled and rate-limited before they are even queued.
+
+# Structured fields copied from a record's `extra` into its JSON line when present
+STRUCTURED_FIELDS = ('event', 'url', 'stage', 'status', 'attempt', 'duration')
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as one JSON object: time, level, logger, message and any structured fields."""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = round(value, 6) if field == 'duration' else value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class EventSampler(logging.Filter):
+    """
+    Keeps a sample_rate fraction of per-page events (records with an `event` field, below WARNING), and
+    at most max_per_second of them. Warnings, errors and records without an event always pass.
+    Dropped events are counted in the log_events_dropped metric.
+    """
+
+    def __init__(self, sample_rate=1.0, max_per_second=None):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.max_per_second = max_per_second
+        self._tokens = max_per_second or 0.0
+        self._refilled = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take_token(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.max_per_second, self._tokens + (now - self._refilled) * self.max_per_second)
+            self._refilled = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def filter(self, record):
+        event = getattr(record, 'event', None)
+        if event is None or record.levelno >= logging.WARNING:
+            return True
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            metrics.inc('log_events_dropped', event=event, reason='sampled')
+            return False
+        if self.max_per_second is not None and not self._take_token():
+            metrics.inc('log_events_dropped', event=event, reason='rate_limited')
+            return False
+        return True
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread. The standard one merges the message and
+    its arguments before queueing, on the logging thread; records here only carry strings and numbers,
+    so they are queued as they are.
+    """
+
+    listener = None
+
+    def prepare(self, record):
+        return record
+
+
+class LogListener(QueueListener):
+    """QueueListener that can be stopped more than once (by the caller and again at exit)."""
+
+    def stop(self):
+        if self._thread is not None:
+            super().stop()
+
+
+def configure_logging(log_file, structured=False, async_logging=False, sample_rate=1.0, max_events_per_second=None,
+                      level=logging.INFO):
+    """
+    Log to log_file and the console, as text or (structured=True) with JSON Lines in the file.
+
+    With async_logging=True, records go through a queue to a QueueListener thread that formats and writes
+    them; it is stopped (draining the queue) at interpreter exit, or by calling stop() on the returned
+    listener. sample_rate and max_events_per_second thin out per-page events (see EventSampler).
+    Returns the listener, or None for synchronous logging.
+    """
+    text_format = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+    file_handler = logging.FileHandler(log_file)
+    file_handler.setFormatter(JsonFormatter() if structured else text_format)
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(text_format)
+    handlers = [file_handler, console_handler]
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        if getattr(handler, 'listener', None) is not None:
+            handler.listener.stop()  # Drain the queue of an earlier configuration
+    for old_filter in list(root.filters):
+        if isinstance(old_filter, EventSampler):
+            root.removeFilter(old_filter)
+
+    sampler = EventSampler(sample_rate, max_events_per_second)
+    if not async_logging:
+        root.addFilter(sampler)  # Per-page events are logged on the root logger, so filtering there covers them
+        for handler in handlers:
+            root.addHandler(handler)
+        return None
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(sampler)  # Dropped events are never queued
+    root.addHandler(queue_handler)
+    listener = queue_handler.listener = LogListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
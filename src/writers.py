@@ -0,0 +1,387 @@
+# imports
+import ast
+import csv
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from metrics import metrics
+from records import FIELDS, JobBatch, JobRecord
+
+# This file contains a buffered writer for job records, with pluggable CSV, JSONL and Parquet sinks.
+# Rows are buffered as a columnar JobBatch (records.py), which each sink writes column by column.
+
+# Output column names, in the order they are written
+FIELDNAMES = ['Job Title', 'Employer', 'Salary', 'Description', 'Requirements']
+
+# Extra column written when near-duplicate detection (dedup.py) is on
+DUPLICATE_CLUSTER_FIELD = 'Duplicate Cluster'
+
+# JobBatch column behind each output column (extra columns keep their output name)
+BATCH_COLUMNS = dict(zip(FIELDNAMES, FIELDS))
+
+# Rows a Parquet part holds before it is closed and the next one started, when flushes needn't be durable
+PARQUET_PART_ROWS = 500_000
+
+
+def batch_columns(batch, fieldnames):
+    """Return a batch's columns in fieldnames order, as output text."""
+    return [batch.text_column(BATCH_COLUMNS.get(name, name)) for name in fieldnames]
+
+
+def row_to_job_details(row):
+    """Map an output row read back from any sink to a job details dictionary (the inverse of job_details_to_row)."""
+    requirements = row.get('Requirements')
+    if isinstance(requirements, str) and requirements.startswith('['):
+        requirements = ast.literal_eval(requirements)  # CSV stores the list as its Python repr
+    return {
+        'job_title': row.get('Job Title', 'None'),
+        'employer': row.get('Employer', 'None'),
+        'salary': row.get('Salary', 'None'),
+        'description': row.get('Description', 'None'),
+        'requirements': 'None' if requirements is None else requirements
+    }
+
+
+def _requirements_lists(batch):
+    """The Requirements column as real lists, with None for missing values (JSONL and Parquet keep lists)."""
+    return [None if skills is None else list(skills) for skills in batch.column('requirements')]
+
+
+class CsvSink:
+    """Appends rows to a CSV file, writing the header only if the file is empty."""
+
+    def __init__(self, path, fieldnames=FIELDNAMES):
+        self.path = path
+        self.fieldnames = fieldnames
+        self._file = open(path, mode='a', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file, quoting=csv.QUOTE_ALL)
+        if self._file.tell() == 0:
+            self._writer.writerow(fieldnames)
+
+    def write_batch(self, batch):
+        self._writer.writerows(zip(*batch_columns(batch, self.fieldnames)))
+        self._file.flush()
+
+    def sync(self, durable=True):
+        """Force written rows to disk and return the file size, which only ever covers whole rows."""
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+
+class JsonlSink:
+    """Appends rows as one JSON object per line, keeping Requirements as a list."""
+
+    def __init__(self, path, fieldnames=FIELDNAMES):
+        self.path = path
+        self.fieldnames = fieldnames
+        self._file = open(path, mode='a', encoding='utf-8')
+
+    def write_batch(self, batch):
+        columns = batch_columns(batch, self.fieldnames)
+        columns[self.fieldnames.index('Requirements')] = _requirements_lists(batch)
+        lines = [json.dumps(dict(zip(self.fieldnames, values)), ensure_ascii=False) + '\n'
+                 for values in zip(*columns)]
+        self._file.writelines(lines)
+        self._file.flush()
+
+    def sync(self, durable=True):
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+
+def _numbered_parquet_parts(path):
+    """(number, path) of each part file of a Parquet output: path itself is 0, jobs.1.parquet is 1, ..."""
+    stem, ext = os.path.splitext(path)
+    parts = [(0, path)] if os.path.exists(path) else []
+    for part in glob.glob(glob.escape(stem) + '.*' + ext):
+        number = part[len(stem) + 1:-len(ext)]
+        if number.isdigit():
+            parts.append((int(number), part))
+    return sorted(parts)
+
+
+def parquet_parts(path):
+    """Return the part files of a Parquet output in the order they were written (jobs.parquet, jobs.1.parquet, ...)."""
+    return [part for _, part in _numbered_parquet_parts(path)]
+
+
+class ParquetSink:
+    """Writes rows to compressed Parquet part files, one row group per flushed batch.
+
+    Requirements is stored as a list<string> column. Parquet files cannot be appended to,
+    so if the path already exists the next numbered name (jobs.1.parquet, ...) is used.
+    A Parquet file can't be read until its footer is written on close, so sync(durable=True)
+    closes the part being written and the next batch starts a new part: rows reported to a
+    checkpoint journal are always readable, even if the process dies. Otherwise a part is only
+    closed once it holds part_rows rows, so most runs write one file. Either way, readers must
+    read every part of the output (see parquet_parts()), not just the path given.
+    """
+
+    def __init__(self, path, fieldnames=FIELDNAMES, compression='zstd', part_rows=PARQUET_PART_ROWS):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet output requires pyarrow: pip install pyarrow") from e
+        self._pa = pa
+        self._pq = pq
+        self.fieldnames = fieldnames
+        self.base_path = path
+        self.compression = compression
+        self.part_rows = part_rows
+        self.schema = pa.schema([
+            (name, pa.list_(pa.string()) if name == 'Requirements' else pa.string())
+            for name in fieldnames
+        ])
+        self._open_part()
+
+    def _open_part(self):
+        parts = _numbered_parquet_parts(self.base_path)
+        if parts:
+            stem, ext = os.path.splitext(self.base_path)
+            self.path = f"{stem}.{parts[-1][0] + 1}{ext}"
+        else:
+            self.path = self.base_path
+        self._writer = self._pq.ParquetWriter(self.path, self.schema, compression=self.compression)
+        self._rows_in_part = 0
+        logging.info(f"Writing Parquet output to {self.path}")
+
+    def write_batch(self, batch):
+        if self._writer is None:
+            self._open_part()
+        columns = batch_columns(batch, self.fieldnames)
+        columns[self.fieldnames.index('Requirements')] = _requirements_lists(batch)
+        self._writer.write_table(self._pa.table(dict(zip(self.fieldnames, columns)), schema=self.schema))
+        self._rows_in_part += len(batch)
+
+    def sync(self, durable=True):
+        """
+        Close the part being written, so every row so far is readable, and return the number of parts.
+        With durable=False the part is left open until it holds part_rows rows.
+        """
+        if self._writer is not None and (durable or self._rows_in_part >= self.part_rows):
+            self._writer.close()
+            self._writer = None
+            with open(self.path, 'rb') as f:
+                os.fsync(f.fileno())
+        return len(parquet_parts(self.base_path))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+# Sink classes by output format name / file extension
+SINKS = {
+    'csv': CsvSink,
+    'jsonl': JsonlSink,
+    'parquet': ParquetSink,
+}
+
+
+class BatchWriter:
+    """
+    Long-lived job record writer that buffers rows and flushes them to a sink in batches.
+
+    A batch is flushed once it holds batch_size rows, or once flush_interval seconds have passed
+    since the last flush, and always on close(). The interval is checked by a background timer
+    thread as well as on write, so rows don't wait for the next write when pages arrive slowly
+    (or not at all, while every URL left is backing off). Set flush_interval=None to turn it off.
+    Writes and flushes are serialised by a lock.
+
+    Each row can carry a tag (such as its URL). After a batch has been written and synced to disk,
+    every callable in flush_listeners is called with the batch's tags and the sink's position
+    (the output file size, or None for Parquet), so progress is only recorded once rows are safe.
+    Set durable when a listener needs every reported row readable after a crash (a RunJournal does):
+    a Parquet sink then closes a part on every flush, rather than only once it holds part_rows rows.
+
+    With a NearDuplicateIndex (dedup.py), every row is checked against the records written before it
+    and gets a Duplicate Cluster ID; near-duplicates are dropped instead if drop_duplicates is set
+    (their tags still reach the flush listeners, so they count as done). The index is committed after
+    each flush, in step with the output file.
+    """
+
+    def __init__(self, sink, batch_size=500, flush_interval=30, dedup_index=None, drop_duplicates=False):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dedup_index = dedup_index
+        self.drop_duplicates = drop_duplicates
+        self._extra_columns = [name for name in sink.fieldnames if name not in BATCH_COLUMNS]
+        self._batch = JobBatch(self._extra_columns)
+        self._tags = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.RLock()
+        self._closed = threading.Event()
+        self.rows_written = 0
+        self.flush_listeners = []
+        self.durable = False
+        self._timer = None
+        if flush_interval:
+            self._timer = threading.Thread(target=self._flush_periodically, name='batch-writer-flush', daemon=True)
+            self._timer.start()
+
+    def write(self, job_details, tag=None, extra=()):
+        """
+        Buffer one job details dictionary (or JobRecord), flushing if the batch is full or stale.
+        extra holds the row's values for any extra output columns, unless a dedup index fills them in.
+        """
+        record = job_details if isinstance(job_details, JobRecord) else JobRecord.from_details(job_details)
+        with self._lock:
+            if self.dedup_index is not None:
+                cluster, duplicate = self.dedup_index.add(record)
+                if duplicate:
+                    metrics.inc('near_duplicates', action='dropped' if self.drop_duplicates else 'flagged')
+                if duplicate and self.drop_duplicates:
+                    record = None
+                extra = (cluster,)
+            if record is not None:
+                self._batch.append(record, *extra)
+            self._tags.append(tag)
+            if len(self._batch) >= self.batch_size:
+                self.flush()
+            else:
+                self.flush_if_stale()
+
+    def flush_if_stale(self):
+        """Flush if flush_interval seconds have passed since the last flush."""
+        with self._lock:
+            if self.flush_interval and time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+
+    def _flush_periodically(self):
+        # Wake when the batch would go stale, rather than on a fixed tick, so no row waits much past the interval
+        delay = self.flush_interval
+        while not self._closed.wait(delay):
+            try:
+                self.flush_if_stale()
+                delay = max(0.0, self._last_flush + self.flush_interval - time.monotonic())
+            except Exception:
+                logging.exception("Timed flush failed; the rows stay buffered for the next flush")
+                delay = self.flush_interval
+
+    def flush(self):
+        """Write all buffered rows to the sink."""
+        with self._lock:
+            if self._tags:
+                if len(self._batch):
+                    with metrics.timer('write'):
+                        self.sink.write_batch(self._batch)
+                    metrics.inc('records_written', len(self._batch))
+                    self.rows_written += len(self._batch)
+                tags = [tag for tag in self._tags if tag is not None]
+                self._batch = JobBatch(self._extra_columns)
+                self._tags = []
+                if self.flush_listeners:
+                    position = self.sink.sync(durable=self.durable)
+                    for listener in self.flush_listeners:
+                        listener(tags, position)
+                if self.dedup_index is not None:
+                    self.dedup_index.commit()
+            self._last_flush = time.monotonic()
+
+    def close(self):
+        """Stop the flush timer, flush remaining rows and close the sink."""
+        self._closed.set()
+        if self._timer is not None:
+            self._timer.join()
+        with self._lock:
+            try:
+                self.flush()
+            finally:
+                self.sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def format_of(path, output_format=None):
+    """Return output_format, or the format named by path's extension (CSV if it has none)."""
+    return output_format or os.path.splitext(path)[1].lstrip('.').lower() or 'csv'
+
+
+def output_position(path, output_format=None):
+    """Return how much of an output is on disk, as sinks' sync() reports it: the file size, or the number of Parquet parts."""
+    if format_of(path, output_format) == 'parquet':
+        return len(parquet_parts(path))
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def staging_path(output_path):
+    """
+    Return a side file next to output_path in which to build a replacement for it (jobs.csv -> jobs.partial.csv),
+    removing any left by a run that failed part way. Move it into place with replace_output().
+    """
+    stem, ext = os.path.splitext(output_path)
+    path = f"{stem}.partial{ext}"
+    if os.path.exists(path):
+        os.remove(path)
+    return path
+
+
+def replace_output(staged_path, output_path, output_format=None):
+    """Atomically replace output_path with a finished staged file; for Parquet, drop the old output's other parts."""
+    os.replace(staged_path, output_path)
+    if format_of(output_path, output_format) == 'parquet':
+        for part in parquet_parts(output_path)[1:]:
+            os.remove(part)
+
+
+def truncate_output(path, position, output_format=None):
+    """Cut an output back to an earlier output_position, dropping everything written after it."""
+    if format_of(path, output_format) == 'parquet':
+        for part in parquet_parts(path)[position:]:
+            logging.info(f"Removing {part}, written after the last checkpoint")
+            os.remove(part)
+    elif os.path.exists(path) and os.path.getsize(path) > position:
+        logging.info(f"Dropping {os.path.getsize(path) - position} bytes written to {path} after the last checkpoint")
+        with open(path, 'r+b') as f:
+            f.truncate(position)
+
+
+def iter_rows(path, input_format=None):
+    """Yield the rows of a CSV, JSONL or Parquet output file as dictionaries, streaming the file."""
+    input_format = format_of(path, input_format)
+    if input_format == 'csv':
+        with open(path, newline='', encoding='utf-8') as f:
+            yield from csv.DictReader(f)
+    elif input_format == 'jsonl':
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif input_format == 'parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches():
+            yield from batch.to_pylist()
+    else:
+        raise ValueError(f"Unsupported output format: {input_format}. Choose from {', '.join(SINKS)}")
+
+
+def open_writer(output_path, output_format=None, batch_size=500, flush_interval=30, dedup_index=None,
+                drop_duplicates=False, fieldnames=None):
+    """
+    Open a BatchWriter for output_path, inferring the format from the file extension if not given.
+    With a dedup_index, the output gets a Duplicate Cluster column (see BatchWriter). fieldnames
+    overrides the output columns, such as to copy the header of an existing output file.
+    """
+    output_format = format_of(output_path, output_format)
+    if output_format not in SINKS:
+        raise ValueError(f"Unsupported output format: {output_format}. Choose from {', '.join(SINKS)}")
+    if fieldnames is None:
+        fieldnames = FIELDNAMES + [DUPLICATE_CLUSTER_FIELD] if dedup_index is not None else FIELDNAMES
+    sink = SINKS[output_format](os.path.abspath(output_path), fieldnames)
+    return BatchWriter(sink, batch_size=batch_size, flush_interval=flush_interval, dedup_index=dedup_index,
+                       drop_duplicates=drop_duplicates)
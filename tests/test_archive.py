@@ -0,0 +1,75 @@
+import unittest
+import csv
+import tempfile
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from archive import PageArchive, reextract_archive
+
+
+def job_page(title):
+    return f'''
+    <html>
+        <body>
+            <h2 class="header-style__JobViewHeaderJobName-sc-c5940466-9">{title}</h2>
+            <li class="header-style__JobViewHeaderCompanyName-sc-c5940466-12">Tech Corp</li>
+            <div class="description-styles__DescriptionContainerInner-sc-78eb761c-2">
+                Develop and maintain software solutions
+            </div>
+        </body>
+    </html>
+    '''.encode('utf-8')
+
+
+class TestPageArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.archive_dir = os.path.join(self.tmp_dir.name, 'archive')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_store_and_read_back_across_segments(self):
+        with PageArchive(self.archive_dir, max_segment_bytes=300) as archive:
+            for i in range(5):
+                self.assertTrue(archive.store(f'https://example.com/job-{i}', job_page(f'Job {i}')))
+            # Unchanged pages aren't stored twice; changed ones replace the latest version
+            self.assertFalse(archive.store('https://example.com/job-0', job_page('Job 0')))
+            self.assertTrue(archive.store('https://example.com/job-1', job_page('Job 1 (updated)')))
+
+        segments = [name for name in os.listdir(self.archive_dir) if name.startswith('segment-')]
+        self.assertGreater(len(segments), 1)
+
+        # Reopening carries on from the stored index
+        with PageArchive(self.archive_dir) as archive:
+            self.assertEqual(len(archive), 5)
+            self.assertEqual(archive.get('https://example.com/job-3'), job_page('Job 3'))
+            self.assertEqual(archive.get('https://example.com/job-1'), job_page('Job 1 (updated)'))
+            self.assertIsNone(archive.get('https://example.com/missing'))
+            pages = dict(archive)
+        self.assertEqual(len(pages), 5)
+        self.assertEqual(pages['https://example.com/job-1'], job_page('Job 1 (updated)'))
+
+    def test_reextract_archive_writes_fresh_output(self):
+        with PageArchive(self.archive_dir) as archive:
+            for i in range(20):
+                archive.store(f'https://example.com/job-{i}', job_page(f'Job {i}'))
+            archive.store('https://example.com/blank', b'<html></html>')
+
+        output_csv = os.path.join(self.tmp_dir.name, 'jobs.csv')
+        with open(output_csv, 'w', encoding='utf-8') as f:
+            f.write('"Job Title"\n"Stale row from the crawl"\n')
+        for _ in range(2):  # Re-extracting again replaces the output too
+            rows_written = reextract_archive(self.archive_dir, output_csv, workers=2)
+
+        self.assertEqual(rows_written, 21)
+        with open(output_csv, newline='', encoding='utf-8') as f:
+            titles = [row['Job Title'] for row in csv.DictReader(f)]
+        self.assertEqual(len(titles), 21)
+        self.assertEqual(sorted(titles[:20]), sorted(f'Job {i}' for i in range(20)))
+        self.assertEqual(titles[20], 'None')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from aiohttp import web
+import scraper
+from async_fetcher import scrape_job_pages, scrape_job_pages_async
+
+
+class TestAsyncFetcher(unittest.TestCase):
+    # Mock job page served by the local test server
+    mock_html_content = '''
+    <html>
+        <body>
+            <h2 class="header-style__JobViewHeaderJobName-sc-c5940466-9">Software Engineer</h2>
+            <li class="header-style__JobViewHeaderCompanyName-sc-c5940466-12">Tech Corp</li>
+            <div class="description-styles__DescriptionContainerInner-sc-78eb761c-2">
+                Develop and maintain software solutions
+            </div>
+            <ul class="skill-list-clamped-styles__SkillsContainerInner-sc-5a5d6754-0">
+                <li>Python</li>
+            </ul>
+        </body>
+    </html>
+    '''
+
+    def run_against_server(self, num_urls, per_host_concurrency, fail_first=False):
+        """Serve mock job pages locally and scrape them, returning results and peak in-flight count."""
+        state = {'in_flight': 0, 'peak': 0, 'failed': set()}
+
+        async def handler(request):
+            state['in_flight'] += 1
+            state['peak'] = max(state['peak'], state['in_flight'])
+            await asyncio.sleep(0.05)
+            state['in_flight'] -= 1
+            job_id = request.match_info['job_id']
+            if fail_first and job_id not in state['failed']:
+                state['failed'].add(job_id)
+                return web.Response(status=503)
+            return web.Response(text=self.mock_html_content, content_type='text/html')
+
+        async def scenario():
+            app = web.Application()
+            app.router.add_get('/job/{job_id}', handler)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, '127.0.0.1', 0)
+            await site.start()
+            port = runner.addresses[0][1]
+            results = []
+            try:
+                urls = (f"http://127.0.0.1:{port}/job/{i}" for i in range(num_urls))
+                await scrape_job_pages_async(
+                    urls, lambda url, details: results.append((url, details)),
+                    per_host_concurrency=per_host_concurrency, calls=1000, period=1, retry_delay=0,
+                )
+            finally:
+                await runner.cleanup()
+            return results
+
+        return asyncio.run(scenario()), state['peak']
+
+    def test_scrape_job_pages_respects_per_host_concurrency(self):
+        results, peak = self.run_against_server(num_urls=12, per_host_concurrency=3)
+
+        self.assertEqual(len(results), 12)
+        self.assertLessEqual(peak, 3)
+        self.assertGreater(peak, 1)  # Requests really were overlapped
+        self.assertEqual(results[0][1]['job_title'], 'Software Engineer')
+        self.assertEqual(results[0][1]['requirements'], ['Python'])
+
+    def test_scrape_job_pages_retries_server_errors(self):
+        results, _ = self.run_against_server(num_urls=2, per_host_concurrency=2, fail_first=True)
+
+        self.assertEqual(len(results), 2)
+
+    def test_politeness_budget_carries_over_between_calls(self):
+        request_times = []
+        page = self.mock_html_content.encode('utf-8')
+
+        class JobPageHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                request_times.append(time.monotonic())
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html')
+                self.send_header('Content-Length', str(len(page)))
+                self.end_headers()
+                self.wfile.write(page)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), JobPageHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        saved = (scraper.RATE_LIMIT_CALLS, scraper.RATE_LIMIT_PERIOD)
+        scraper.set_rate_limit(3, 1)
+        try:
+            results = []
+            start = time.monotonic()
+            for sitemap in range(3):  # One call per sitemap, as process_xml_file makes them
+                urls = [f'http://127.0.0.1:{server.server_address[1]}/job/{sitemap}-{i}' for i in range(2)]
+                scrape_job_pages(urls, lambda url, details: results.append(url))
+            elapsed = time.monotonic() - start
+        finally:
+            scraper.set_rate_limit(*saved)
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(len(results), 6)
+        self.assertEqual(len(request_times), 6)
+        # Three requests per second across all the calls: each call alone is within budget,
+        # so only a budget carried over from the earlier calls makes the last one wait
+        self.assertGreaterEqual(elapsed, 0.9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+import unittest
+import csv
+import gzip
+import tempfile
+from datetime import datetime
+from unittest import mock
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from checkpoint import RunJournal
+from main import main
+from writers import BatchWriter, parquet_parts
+
+
+def write_sitemap(path, urls):
+    lastmod = datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ')
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>'
+                '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">')
+        for url in urls:
+            f.write(f'<url><loc>{url}</loc><lastmod>{lastmod}</lastmod></url>')
+        f.write('</urlset>')
+
+
+class TestRunJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.journal_path = os.path.join(self.tmp_dir.name, 'run.journal')
+        self.output_csv = os.path.join(self.tmp_dir.name, 'jobs.csv')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_replay_and_rollback_after_crash(self):
+        with open(self.output_csv, 'w') as f:
+            f.write('header\n')
+        with RunJournal(self.journal_path) as journal:
+            journal.start(['sitemap_1.xml.gz', 'sitemap_2.xml.gz'], self.output_csv)
+            with open(self.output_csv, 'a') as f:
+                f.write('row a\nrow b\n')
+            journal.record_flushed([('https://example.com/a',), ('https://example.com/b',)],
+                                   os.path.getsize(self.output_csv))
+            journal.record_failed('https://example.com/c')
+            journal.sitemap_done('sitemap_1.xml.gz')
+
+        # The process dies after writing an unjournalled row and half a journal entry
+        with open(self.output_csv, 'a') as f:
+            f.write('row d\n')
+        with open(self.journal_path, 'a') as f:
+            f.write('{"event": "flu')
+
+        with RunJournal(self.journal_path, resume=True) as journal:
+            self.assertTrue(journal.resuming)
+            self.assertEqual(journal.sitemaps, ['sitemap_1.xml.gz', 'sitemap_2.xml.gz'])
+            self.assertEqual(journal.completed_sitemaps, {'sitemap_1.xml.gz'})
+            self.assertEqual(journal.done_urls, {'https://example.com/a', 'https://example.com/b',
+                                                 'https://example.com/c'})
+            journal.rollback_output(self.output_csv)
+
+        with open(self.output_csv) as f:
+            self.assertEqual(f.read(), 'header\nrow a\nrow b\n')
+
+    def test_resume_after_interrupted_run(self):
+        sitemaps = []
+        for i in range(2):
+            path = os.path.join(self.tmp_dir.name, f'sitemap_{i}.xml.gz')
+            write_sitemap(path, [f'https://www.monster.com/job-openings/job-{i}-{j}' for j in range(5)])
+            sitemaps.append(path)
+
+        fetched = []
+
+        def fake_scrape_job_page_once(url, fail_at=None):
+            if len(fetched) == fail_at:
+                raise RuntimeError("Process killed")
+            fetched.append(url.rsplit('/', 1)[1])
+            return {'job_title': url.rsplit('/', 1)[1], 'employer': 'Tech Corp', 'salary': 'None',
+                    'description': 'None', 'requirements': 'None'}, 200
+
+        def run(resume, fail_at=None):
+            with mock.patch('main.download_sitemaps', return_value=sitemaps), \
+                    mock.patch('sitemap_parser.scrape_job_page_once', lambda url: fake_scrape_job_page_once(url, fail_at)):
+                main('https://www.monster.com/sitemap.xml', self.tmp_dir.name, self.output_csv, batch_size=2,
+                     checkpoint=self.journal_path, resume=resume, metrics_summary=None)
+
+        with self.assertRaises(RuntimeError):
+            run(resume=False, fail_at=7)
+        run(resume=True)
+
+        with open(self.output_csv, newline='', encoding='utf-8') as f:
+            titles = [row['Job Title'] for row in csv.DictReader(f)]
+        expected = [f'job-{i}-{j}' for i in range(2) for j in range(5)]
+        self.assertEqual(sorted(titles), expected)  # No duplicates and nothing missing
+        self.assertEqual(sorted(fetched), expected)  # Nothing fetched twice
+
+    def test_resume_with_crawl_state_keeps_the_url_cap(self):
+        sitemap = os.path.join(self.tmp_dir.name, 'sitemap_0.xml.gz')
+        write_sitemap(sitemap, [f'https://www.monster.com/job-openings/job-{i}' for i in range(6)])
+        fetched = []
+
+        def fake_scrape_job_page_once(url, fail_at=None):
+            if len(fetched) == fail_at:
+                raise RuntimeError("Process killed")
+            fetched.append(url.rsplit('/', 1)[1])
+            return {'job_title': url.rsplit('/', 1)[1], 'employer': 'Tech Corp', 'salary': 'None',
+                    'description': 'None', 'requirements': 'None'}, 200
+
+        def run(resume, fail_at=None, **options):
+            with mock.patch('main.download_sitemaps', return_value=[sitemap]), \
+                    mock.patch('sitemap_parser.scrape_job_page_once', lambda url: fake_scrape_job_page_once(url, fail_at)):
+                main('https://www.monster.com/sitemap.xml', self.tmp_dir.name, self.output_csv, batch_size=2,
+                     flush_interval=None, checkpoint=self.journal_path, resume=resume, metrics_summary=None,
+                     crawl_state_db=os.path.join(self.tmp_dir.name, 'state.db'), **options)
+
+        for options in [{'urls_per_sitemap': 4}, {'url_budget': 4}]:
+            with self.subTest(**options):
+                fetched.clear()
+                for name in ['state.db', 'run.journal', 'jobs.csv']:
+                    if os.path.exists(os.path.join(self.tmp_dir.name, name)):
+                        os.remove(os.path.join(self.tmp_dir.name, name))
+                # The process dies without closing the writer, after one flushed batch and part of a second
+                with mock.patch.object(BatchWriter, 'close'), self.assertRaises(RuntimeError):
+                    run(resume=False, fail_at=3, **options)
+                fetched.clear()
+                run(resume=True, **options)
+
+                with open(self.output_csv, newline='', encoding='utf-8') as f:
+                    titles = [row['Job Title'] for row in csv.DictReader(f)]
+                # The flushed URLs, now in the crawl state too, still count towards the cap of 4
+                self.assertEqual(len(titles), 4)
+                self.assertEqual(len(set(titles)), 4)
+                self.assertEqual(len(fetched), 2)
+
+    def test_parquet_output_survives_a_crash(self):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest("pyarrow not installed")
+        output_parquet = os.path.join(self.tmp_dir.name, 'jobs.parquet')
+        urls = [f'https://www.monster.com/job-openings/job-{i}' for i in range(8)]
+        sitemap = os.path.join(self.tmp_dir.name, 'sitemap_0.xml.gz')
+        write_sitemap(sitemap, urls)
+        fetched = []
+
+        def fake_scrape_job_page_once(url, fail_at=None):
+            if len(fetched) == fail_at:
+                raise RuntimeError("Process killed")
+            fetched.append(url.rsplit('/', 1)[1])
+            return {'job_title': url.rsplit('/', 1)[1], 'employer': 'Tech Corp', 'salary': 'None',
+                    'description': 'None', 'requirements': ['Python']}, 200
+
+        def run(resume, fail_at=None):
+            with mock.patch('main.download_sitemaps', return_value=[sitemap]), \
+                    mock.patch('sitemap_parser.scrape_job_page_once', lambda url: fake_scrape_job_page_once(url, fail_at)):
+                main('https://www.monster.com/sitemap.xml', self.tmp_dir.name, output_parquet, batch_size=2,
+                     flush_interval=None, checkpoint=self.journal_path, resume=resume, metrics_summary=None,
+                     crawl_state_db=os.path.join(self.tmp_dir.name, 'state.db'))
+
+        # The process dies without closing the writer, after three flushed batches and part of a fourth
+        with mock.patch.object(BatchWriter, 'close'), self.assertRaises(RuntimeError):
+            run(resume=False, fail_at=7)
+        with open(os.path.join(self.tmp_dir.name, 'jobs.9.parquet'), 'wb') as f:
+            f.write(b'PAR1')  # A part cut off before its footer was written
+        flushed = [pq.read_table(part).column('Job Title').to_pylist() for part in parquet_parts(output_parquet)[:3]]
+        self.assertEqual(flushed, [['job-0', 'job-1'], ['job-2', 'job-3'], ['job-4', 'job-5']])
+
+        fetched.clear()
+        run(resume=True)
+        titles = [title for part in parquet_parts(output_parquet)
+                  for title in pq.read_table(part).column('Job Title').to_pylist()]
+        self.assertEqual(sorted(titles), [f'job-{i}' for i in range(8)])  # No duplicates and nothing missing
+        self.assertEqual(fetched, ['job-6', 'job-7'])  # Only the unflushed row is fetched again
+
+
+if __name__ == '__main__':
+    unittest.main()
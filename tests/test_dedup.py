@@ -0,0 +1,80 @@
+import unittest
+import csv
+import random
+import tempfile
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from dedup import NearDuplicateIndex, job_signature, similarity
+from writers import open_writer
+
+
+def job(description, employer='Tech Corp', title='Data Engineer'):
+    return {'job_title': title, 'employer': employer, 'salary': 'None', 'description': description,
+            'requirements': ['Python']}
+
+
+rng = random.Random(0)
+VOCABULARY = ['build', 'maintain', 'data', 'pipelines', 'team', 'cloud', 'platform', 'customers', 'reliable',
+              'design', 'review', 'code', 'deliver', 'features', 'support', 'analytics', 'secure', 'scale']
+DESCRIPTION = ' '.join(rng.choice(VOCABULARY) for _ in range(200))
+REPOST = DESCRIPTION.replace('team', 'squad', 1) + ' Posted 2 days ago.'
+OTHER = ' '.join(rng.choice(VOCABULARY) for _ in range(200))
+
+
+class TestNearDuplicateIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, 'dedup.db')
+        self.output_csv = os.path.join(self.tmp_dir.name, 'jobs.csv')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_signatures_of_reposts_are_similar(self):
+        original = job_signature(job(DESCRIPTION))
+        self.assertGreaterEqual(similarity(original, job_signature(job(REPOST))), 0.8)
+        self.assertLess(similarity(original, job_signature(job(OTHER))), 0.2)
+        self.assertLess(similarity(original, job_signature(job(DESCRIPTION, employer='Initech'))), 1)
+        self.assertIsNone(job_signature({'job_title': 'None'}))  # Too short to fingerprint
+
+    def test_writer_flags_duplicate_clusters_across_runs(self):
+        with NearDuplicateIndex(self.db_path) as index, open_writer(self.output_csv, dedup_index=index) as writer:
+            for description in (DESCRIPTION, REPOST, OTHER):
+                writer.write(job(description))
+
+        with NearDuplicateIndex(self.db_path) as index:
+            self.assertEqual(len(index), 3)
+            cluster, score = index.find(job(REPOST))
+            self.assertGreaterEqual(score, 0.8)
+
+        with open(self.output_csv, newline='', encoding='utf-8') as f:
+            clusters = [row['Duplicate Cluster'] for row in csv.DictReader(f)]
+        self.assertEqual(clusters[0], clusters[1])
+        self.assertNotEqual(clusters[0], clusters[2])
+        self.assertEqual(cluster, clusters[0])
+
+    def test_writer_drops_duplicates_but_reports_their_tags(self):
+        flushed = []
+        with NearDuplicateIndex(self.db_path) as index, \
+                open_writer(self.output_csv, dedup_index=index, drop_duplicates=True) as writer:
+            writer.flush_listeners.append(lambda tags, position: flushed.extend(tags))
+            for url, description in (('a', DESCRIPTION), ('b', REPOST), ('c', OTHER)):
+                writer.write(job(description), tag=url)
+
+        with open(self.output_csv, newline='', encoding='utf-8') as f:
+            self.assertEqual(len(list(csv.DictReader(f))), 2)
+        self.assertEqual(flushed, ['a', 'b', 'c'])  # The dropped repost still counts as done
+
+    def test_uncommitted_additions_are_not_kept(self):
+        index = NearDuplicateIndex(self.db_path)
+        index.add(job(DESCRIPTION))
+        index._conn.rollback()  # As if the process died before the writer flushed
+        index.close()
+        with NearDuplicateIndex(self.db_path) as index:
+            self.assertEqual(index.add(job(DESCRIPTION))[1], False)
+
+
+if __name__ == '__main__':
+    unittest.main()
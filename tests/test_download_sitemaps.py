@@ -0,0 +1,92 @@
+import unittest
+import gzip
+import tempfile
+import threading
+import sys
+import os
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from sitemap_parser import download_sitemaps
+from crawl_state import CrawlState
+
+
+class MockSitemapHandler(BaseHTTPRequestHandler):
+    """Serves a sitemap index and gzipped child sitemaps, honouring If-None-Match."""
+    index_lastmods = {}
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append(self.path)
+        port = self.server.server_address[1]
+        if self.path == '/sitemap_index.xml':
+            entries = ''.join(
+                f'<sitemap><loc>http://127.0.0.1:{port}/child_{i}.xml.gz</loc><lastmod>{lastmod}</lastmod></sitemap>'
+                for i, lastmod in sorted(self.index_lastmods.items())
+            )
+            body = f'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</sitemapindex>'.encode()
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        etag = f'"{self.path}-v1"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = gzip.compress(b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"></urlset>' * 1000)
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep test output clean
+
+
+class TestDownloadSitemaps(unittest.TestCase):
+    def setUp(self):
+        MockSitemapHandler.index_lastmods = {1: '2024-01-10', 2: '2024-01-10', 3: '2024-01-10'}
+        MockSitemapHandler.requests_seen = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), MockSitemapHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.index_url = f'http://127.0.0.1:{self.server.server_address[1]}/sitemap_index.xml'
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp_dir.cleanup()
+
+    def download(self, crawl_state=None):
+        return download_sitemaps(self.index_url, self.tmp_dir.name, num_sitemaps=5, crawl_state=crawl_state,
+                                 min_delay=0, max_delay=0)
+
+    def test_download_sitemaps_streams_files_in_index_order(self):
+        downloaded_files = self.download()
+
+        self.assertEqual([os.path.basename(f) for f in downloaded_files],
+                         ['sitemap_1.xml.gz', 'sitemap_2.xml.gz', 'sitemap_3.xml.gz'])
+        with gzip.open(downloaded_files[0], 'rb') as f:
+            self.assertTrue(f.read().startswith(b'<urlset'))
+        self.assertFalse(any(name.endswith('.part') for name in os.listdir(self.tmp_dir.name)))
+
+    def test_download_sitemaps_skips_unchanged_sitemaps(self):
+        with CrawlState(os.path.join(self.tmp_dir.name, 'state.sqlite')) as crawl_state:
+            for file_name in self.download(crawl_state):
+                crawl_state.mark_sitemap_processed(file_name)
+
+            # Child 1 is unchanged, child 2 has a new index lastmod but the same ETag, child 3 was never processed
+            MockSitemapHandler.index_lastmods[2] = '2024-01-11'
+            crawl_state._conn.execute("DELETE FROM sitemaps WHERE url LIKE '%child_3%'")
+            MockSitemapHandler.requests_seen = []
+            downloaded_files = self.download(crawl_state)
+
+        self.assertEqual([os.path.basename(f) for f in downloaded_files], ['sitemap_3.xml.gz'])
+        self.assertNotIn('/child_1.xml.gz', MockSitemapHandler.requests_seen)  # Skipped on index lastmod
+        self.assertIn('/child_2.xml.gz', MockSitemapHandler.requests_seen)  # Fetched, answered 304
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+from bs4 import BeautifulSoup
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from scraper import extract_job_details, parse_job_html
+from fast_extract import extract_job_details_fast
+
+
+class TestExtractJobDetailsFast(unittest.TestCase):
+    # Fixtures from test_extract_job_details.py and test_scrape_job_page.py, plus markup edge cases
+    fixtures = {
+        'complete': """
+        <html>
+            <body>
+                <h2 class="header-style__JobViewHeaderJobName-sc-c5940466-9">Software Engineer</h2>
+                <li class="header-style__JobViewHeaderCompanyName-sc-c5940466-12">Tech Corp</li>
+                <div class="description-styles__DescriptionContainerInner-sc-78eb761c-2">
+                    Develop and maintain software solutions
+                </div>
+                <ul class="header-style__JobViewHeaderTagsContainer-sc-c5940466-11">
+                    <li><span class="indexmodern__TagLabel-sc-6pvrvp-1 bkgNmO ds-tag-label">80,000 USD</span></li>
+                </ul>
+                <ul class="skill-list-clamped-styles__SkillsContainerInner-sc-5a5d6754-0">
+                    <li>Python</li>
+                    <li>Django</li>
+                </ul>
+            </body>
+        </html>
+        """,
+        'missing_fields': '''
+        <html>
+            <body>
+                <h2 class="header-style__JobViewHeaderJobName-sc-c5940466-9">Software Engineer</h2>
+                <!-- Missing employer and salary elements -->
+                <ul class="skill-list-clamped-styles__SkillsContainerInner-sc-5a5d6754-0">
+                    <li>Python</li>
+                    <li>Django</li>
+                </ul>
+            </body>
+        </html>
+        ''',
+        'salary_in_description': """
+        <html>
+            <body>
+                <h2 class="header-style__JobViewHeaderJobName-sc-c5940466-9">Software Engineer</h2>
+                <li class="header-style__JobViewHeaderCompanyName-sc-c5940466-12">Tech Corp</li>
+                <div class="description-styles__DescriptionContainerInner-sc-78eb761c-2">
+                    Develop and maintain software solutions. Annual compensation $80,000 per year.
+                </div>
+                <ul class="skill-list-clamped-styles__SkillsContainerInner-sc-5a5d6754-0">
+                    <li>Python</li>
+                    <li>Django</li>
+                </ul>
+            </body>
+        </html>
+        """,
+        'nested_employer': '''
+        <html>
+            <body>
+                <h2 class="header-style__JobViewHeaderJobName-sc-c5940466-9">Software Engineer</h2>
+                <ul>
+                    <li class="header-style__JobViewHeaderCompanyName-sc-c5940466-12">Tech Corp</li>
+                </ul>
+                <div class="description-styles__DescriptionContainerInner-sc-78eb761c-2">
+                    Develop and maintain software solutions, with an annual compensation of 80,000 USD per year.
+                </div>
+                <ul class="skill-list-clamped-styles__SkillsContainerInner-sc-5a5d6754-0">
+                    <li>Python</li>
+                    <li>Django</li>
+                </ul>
+                <ul class="header-style__JobViewHeaderTagsContainer-sc-c5940466-11">
+                    <li><span class="indexmodern__TagLabel-sc-6pvrvp-1 bkgNmO ds-tag-label">80,000 USD per year</span></li>
+                </ul>
+            </body>
+        </html>
+        ''',
+        'markup_edge_cases': '''
+        <html>
+            <body>
+                <h2 class="extra header-style__JobViewHeaderJobName-sc-c5940466-9">Data &amp; <b>ML</b> <i>Engineer</i><!-- note --></h2>
+                <div class="description-styles__DescriptionContainerInner-sc-78eb761c-2">Line one<br>Line two
+                    <script>var tracking = 1;</script><style>.a { color: red; }</style>
+                    Pay rate: $25.50 per hour&nbsp;plus benefits
+                </div>
+                <ul class="skill-list-clamped-styles__SkillsContainerInner-sc-5a5d6754-0">
+                    <li>Python unmatched</li>
+                    <li>   </li>
+                    <li><span>SQL</span></li>
+                </ul>
+            </body>
+        </html>
+        ''',
+        'non_ascii_without_charset': '''
+        <html>
+            <body>
+                <h2 class="header-style__JobViewHeaderJobName-sc-c5940466-9">Café Manager – Zürich</h2>
+                <li class="header-style__JobViewHeaderCompanyName-sc-c5940466-12">Bäckerei Müller</li>
+            </body>
+        </html>
+        ''',
+        'xhtml_declaration': '''<?xml version="1.0" encoding="utf-8"?>
+        <html>
+            <body>
+                <h2 class="header-style__JobViewHeaderJobName-sc-c5940466-9">Café Manager</h2>
+            </body>
+        </html>
+        ''',
+        'empty': '',
+    }
+
+    def test_fast_extraction_matches_beautifulsoup(self):
+        for name, html in self.fixtures.items():
+            with self.subTest(fixture=name):
+                expected = extract_job_details(BeautifulSoup(html, 'html.parser'))
+                self.assertEqual(extract_job_details_fast(html), expected)
+                self.assertEqual(extract_job_details_fast(html.encode('utf-8')), expected)
+
+    def test_bytes_are_decoded_by_their_declared_charset(self):
+        html = ('<html><head><meta charset="iso-8859-1"></head><body>'
+                '<h2 class="header-style__JobViewHeaderJobName-sc-c5940466-9">Café Manager</h2></body></html>')
+        self.assertEqual(extract_job_details_fast(html.encode('latin-1'))['job_title'], 'Café Manager')
+
+    def test_parse_job_html_backends_agree(self):
+        html = self.fixtures['complete']
+        self.assertEqual(parse_job_html(html, backend='lxml'), parse_job_html(html, backend='bs4'))
+
+
+if __name__ == '__main__':
+    unittest.main()
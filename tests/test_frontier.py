@@ -0,0 +1,132 @@
+import unittest
+import csv
+import gzip
+import random
+import tempfile
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from frontier import CrawlFrontier, job_slug, lastmod_key
+from sitemap_parser import build_frontier, process_frontier
+from crawl_state import CrawlState
+
+
+def greedy(offers, budget, max_per_group=None):
+    """The selection a frontier should make, from sorting every offer up front."""
+    newest = {}
+    for sequence, (url, lastmod) in enumerate(offers):
+        key = (lastmod_key(lastmod), -sequence)
+        if url not in newest or key > newest[url][0]:
+            newest[url] = (key, lastmod)
+    selected, groups = [], {}
+    for url, (key, lastmod) in sorted(newest.items(), key=lambda item: item[1][0], reverse=True):
+        group = job_slug(url)
+        if len(selected) < budget and (not max_per_group or groups.get(group, 0) < max_per_group):
+            selected.append((url, lastmod))
+            groups[group] = groups.get(group, 0) + 1
+    return selected
+
+
+def write_sitemap(path, entries):
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>'
+                '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">')
+        for url, lastmod in entries:
+            f.write(f'<url><loc>{url}</loc><lastmod>{lastmod}</lastmod></url>')
+        f.write('</urlset>')
+
+
+class TestCrawlFrontier(unittest.TestCase):
+
+    def test_selection_matches_sorting_everything(self):
+        rng = random.Random(0)
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        slugs = [f'data-engineer-city-{i}' for i in range(8)]
+        for budget, max_per_group in ((5, None), (20, 3), (50, 1), (1000, 2)):
+            with self.subTest(budget=budget, max_per_group=max_per_group):
+                offers = [
+                    (f'https://www.monster.com/job-openings/{rng.choice(slugs)}--{rng.randrange(300)}',
+                     (start + timedelta(minutes=rng.randrange(500))).strftime('%Y-%m-%dT%H:%M:%SZ'))
+                    for _ in range(2000)
+                ]
+                frontier = CrawlFrontier(budget, max_per_group)
+                for url, lastmod in offers:
+                    frontier.offer(url, lastmod)
+                self.assertEqual(frontier.entries(), greedy(offers, budget, max_per_group))
+
+    def test_truncated_sources(self):
+        frontier = CrawlFrontier(2)
+        frontier.offer('https://www.monster.com/job-openings/a--1', '2024-01-01', source='a.xml.gz')
+        frontier.offer('https://www.monster.com/job-openings/b--1', '2024-01-03', source='b.xml.gz')
+        frontier.offer('https://www.monster.com/job-openings/b--1', '2024-01-02', source='c.xml.gz')  # Kept as is
+        self.assertEqual(frontier.truncated, set())
+        frontier.offer('https://www.monster.com/job-openings/d--1', '2024-01-04', source='d.xml.gz')  # Evicts a--1
+        frontier.offer('https://www.monster.com/job-openings/e--1', '2023-12-01', source='e.xml.gz')  # Too old
+        self.assertEqual(frontier.truncated, {'a.xml.gz', 'e.xml.gz'})
+
+    def test_lastmod_formats(self):
+        self.assertEqual(lastmod_key('2024-01-10T12:00:00Z'), lastmod_key('2024-01-10T13:00:00+01:00'))
+        self.assertLess(lastmod_key('2024-01-10'), lastmod_key('2024-01-10T00:00:01Z'))
+        self.assertIsNone(lastmod_key('yesterday'))
+        self.assertEqual(job_slug('https://www.monster.com/job-openings/data-engineer-ny--abc123/'), 'data-engineer-ny')
+
+
+class TestProcessFrontier(unittest.TestCase):
+
+    def test_most_recent_urls_across_sitemaps_are_scraped_first(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        sitemaps = []
+        for index in range(3):
+            entries = [(f'https://www.monster.com/job-openings/job-{index}-{i}--{i}',
+                        (now - timedelta(hours=3 * i + index)).strftime('%Y-%m-%dT%H:%M:%SZ')) for i in range(10)]
+            sitemaps.append(os.path.join(tmp_dir.name, f'sitemap_{index}.xml.gz'))
+            write_sitemap(sitemaps[-1], entries)
+        output_csv = os.path.join(tmp_dir.name, 'jobs.csv')
+
+        fetched = []
+
+        def fake_scrape(url):
+            fetched.append(url)
+            return {'job_title': url, 'employer': 'Tech Corp', 'salary': 'None', 'description': 'x',
+                    'requirements': []}, 200
+
+        with mock.patch('sitemap_parser.scrape_job_page_once', side_effect=fake_scrape):
+            drained = process_frontier(sitemaps, output_csv, url_budget=4)
+
+        # Hours old: job-0-0 0, job-1-0 1, job-2-0 2, job-0-1 3
+        self.assertEqual([url.rsplit('/', 1)[1] for url in fetched],
+                         ['job-0-0--0', 'job-1-0--0', 'job-2-0--0', 'job-0-1--1'])
+        with open(output_csv, newline='', encoding='utf-8') as f:
+            self.assertEqual(len(list(csv.DictReader(f))), 4)
+        self.assertEqual(drained, [])  # Every sitemap had URLs left out
+
+        fetched.clear()
+        with mock.patch('sitemap_parser.scrape_job_page_once', side_effect=fake_scrape):
+            drained = process_frontier(sitemaps, output_csv, url_budget=30)
+        self.assertEqual((len(fetched), drained), (30, sitemaps))
+
+    def test_crawl_state_is_looked_up_once_per_entry(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        lastmod = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        urls = [f'https://www.monster.com/job-openings/job-{i}--{i}' for i in range(6)]
+        sitemap = os.path.join(tmp_dir.name, 'sitemap.xml.gz')
+        write_sitemap(sitemap, [(url, lastmod) for url in urls])
+
+        with CrawlState(os.path.join(tmp_dir.name, 'state.db')) as crawl_state:
+            crawl_state.record(urls[0], lastmod, 200, {'job_title': 'Software Engineer'})
+            crawl_state.record(urls[1], lastmod, 410)
+            crawl_state.record(urls[2], lastmod, 503)
+            with mock.patch.object(crawl_state, 'skip_reason', wraps=crawl_state.skip_reason) as skip_reason:
+                frontier = build_frontier([sitemap], url_budget=10, crawl_state=crawl_state)
+
+        self.assertEqual(sorted(url for url, _ in frontier.entries()), urls[2:])
+        self.assertEqual(skip_reason.call_count, len(urls))
+
+
+if __name__ == '__main__':
+    unittest.main()
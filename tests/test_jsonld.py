@@ -0,0 +1,88 @@
+import unittest
+import json
+from unittest import mock
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from jsonld import extract_job_details_jsonld, format_salary
+from scraper import parse_job_html
+
+
+def job_page(posting, body=''):
+    """A job page with the given JobPosting (or raw JSON-LD text) in its head."""
+    block = posting if isinstance(posting, str) else json.dumps(posting)
+    return f'''<html><head><script type="application/ld+json">{block}</script></head>
+    <body>{body}</body></html>'''.encode('utf-8')
+
+
+POSTING = {
+    '@context': 'https://schema.org',
+    '@type': 'JobPosting',
+    'title': 'Data Engineer',
+    'hiringOrganization': {'@type': 'Organization', 'name': 'Tech Corp &amp; Sons'},
+    'description': '<p>Build pipelines.</p>\n<p>Pay reviewed yearly.</p>',
+    'skills': 'Python, SQL ,Airflow',
+    'baseSalary': {'@type': 'MonetaryAmount', 'currency': 'USD',
+                   'value': {'@type': 'QuantitativeValue', 'minValue': 50000, 'maxValue': 70000, 'unitText': 'YEAR'}},
+}
+
+# Requirements only in the styled markup, as on pages whose JobPosting has no skills
+SKILLS_MARKUP = '''<ul class="skill-list-clamped-styles__SkillsContainerInner-sc-5a5d6754-0">
+    <li>Python</li><li>Spark</li></ul>'''
+
+
+class TestJsonLdExtraction(unittest.TestCase):
+
+    def test_job_posting_maps_to_job_details(self):
+        expected = {
+            'job_title': 'Data Engineer',
+            'employer': 'Tech Corp & Sons',
+            'description': 'Build pipelines. Pay reviewed yearly.',
+            'salary': '50,000 - 70,000 USD per year',
+            'requirements': ['Python', 'SQL', 'Airflow'],
+        }
+        self.assertEqual(extract_job_details_jsonld(job_page(POSTING)), expected)
+
+        # No DOM is built when the JobPosting has every field
+        with mock.patch('scraper.BeautifulSoup') as soup:
+            self.assertEqual(parse_job_html(job_page(POSTING), backend='bs4'), expected)
+        soup.assert_not_called()
+
+    def test_missing_fields_fall_back_to_selectors(self):
+        posting = {key: value for key, value in POSTING.items() if key != 'skills'}
+        for backend in ('bs4', 'lxml'):
+            with self.subTest(backend=backend):
+                job_details = parse_job_html(job_page(posting, SKILLS_MARKUP), backend=backend)
+                self.assertEqual(job_details['requirements'], ['Python', 'Spark'])
+                self.assertEqual(job_details['job_title'], 'Data Engineer')  # JSON-LD still wins where present
+
+    def test_non_text_skills_are_skipped(self):
+        posting = dict(POSTING, skills=[{'name': None}, {'name': 'SQL'}, None, 3, ' Python '])
+        self.assertEqual(extract_job_details_jsonld(job_page(posting))['requirements'], ['SQL', 'Python'])
+        posting = dict(POSTING, skills=[{'name': None}])
+        job_details = parse_job_html(job_page(posting, SKILLS_MARKUP), backend='lxml')
+        self.assertEqual(job_details['requirements'], ['Python', 'Spark'])  # Falls back to the selectors
+
+    def test_posting_is_found_in_graphs_and_lists(self):
+        for data in ({'@graph': [{'@type': 'WebPage'}, POSTING]}, [{'@type': 'BreadcrumbList'}, POSTING],
+                     dict(POSTING, **{'@type': ['JobPosting', 'Thing']})):
+            with self.subTest(data=str(data)[:40]):
+                self.assertEqual(extract_job_details_jsonld(job_page(data))['job_title'], 'Data Engineer')
+
+    def test_pages_without_a_usable_posting(self):
+        self.assertEqual(extract_job_details_jsonld(b'<html><body>No structured data</body></html>'), {})
+        self.assertEqual(extract_job_details_jsonld(job_page('{"@type": "JobPosting", broken')), {})
+        self.assertEqual(extract_job_details_jsonld(job_page({'@type': 'Organization', 'name': 'Tech Corp'})), {})
+
+    def test_format_salary(self):
+        self.assertEqual(format_salary({'currency': 'USD', 'value': {'value': 80000, 'unitText': 'YEAR'}}),
+                         '80,000 USD per year')
+        self.assertEqual(format_salary({'currency': 'GBP', 'value': 25.5}), '25.50 GBP')
+        self.assertEqual(format_salary({'currency': 'USD', 'value': {'minValue': 20, 'unitText': 'HOUR'}}),
+                         '20 USD per hour')
+        self.assertIsNone(format_salary({'currency': 'USD'}))
+        self.assertIsNone(format_salary('competitive'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import json
+import tempfile
+import time
+import urllib.request
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from metrics import Metrics, Histogram
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = Metrics()
+
+    def test_counters_are_kept_per_label_set(self):
+        self.metrics.inc('http_responses', kind='job_page', status=200)
+        self.metrics.inc('http_responses', kind='job_page', status=200)
+        self.metrics.inc('http_responses', kind='job_page', status=429)
+        self.metrics.inc('bytes_received', 1024, kind='sitemap')
+
+        counters = self.metrics.summary()['counters']
+        self.assertEqual(counters['http_responses'], [
+            {'kind': 'job_page', 'status': 200, 'value': 2},
+            {'kind': 'job_page', 'status': 429, 'value': 1},
+        ])
+        self.assertEqual(counters['bytes_received'], [{'kind': 'sitemap', 'value': 1024}])
+
+    def test_timer_records_stage_and_cpu_time(self):
+        self.metrics.profile_cpu = True
+        with self.metrics.timer('html_parse'):
+            time.sleep(0.01)
+
+        summary = self.metrics.summary()
+        stage = summary['histograms']['stage_seconds'][0]
+        self.assertEqual(stage['stage'], 'html_parse')
+        self.assertEqual(stage['count'], 1)
+        self.assertGreaterEqual(stage['total_seconds'], 0.01)
+        # Sleeping uses next to no CPU
+        self.assertLess(summary['counters']['stage_cpu_seconds'][0]['value'], 0.01)
+
+    def test_timed_iter_excludes_consumer_time(self):
+        for _ in self.metrics.timed_iter(range(3), 'xml_parse'):
+            time.sleep(0.02)
+
+        stage = self.metrics.summary()['histograms']['stage_seconds'][0]
+        self.assertEqual(stage['count'], 4)  # Three items plus the final StopIteration
+        self.assertLess(stage['total_seconds'], 0.02)
+
+    def test_histogram_quantiles(self):
+        histogram = Histogram()
+        for value in [0.002] * 98 + [3, 7]:
+            histogram.observe(value)
+        self.assertEqual(histogram.quantile(0.5), 0.005)
+        self.assertEqual(histogram.quantile(0.99), 5)
+        self.assertEqual(histogram.max, 7)
+
+    def test_write_summary_and_serve(self):
+        self.metrics.inc('records_written', 5)
+        with self.metrics.timer('write'):
+            pass
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'run_summary.json')
+            self.metrics.write_summary(path)
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(json.load(f)['counters']['records_written'], [{'value': 5}])
+
+        server = self.metrics.serve(0)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url) as response:
+                body = response.read().decode('utf-8')
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertIn('job_scraper_records_written_total 5', body)
+        self.assertIn('job_scraper_stage_seconds_count{stage="write"} 1', body)
+        self.assertIn('job_scraper_stage_seconds_bucket{stage="write",le="+Inf"} 1', body)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import gzip
+import tempfile
+import sys
+import os
+from datetime import date
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from sitemap_parser import filter_job_entries, parse_xml_and_filter_urls
+from crawl_state import CrawlState
+
+
+class TestParseXmlAndFilterUrls(unittest.TestCase):
+    namespace = {'ns': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
+    cutoff_date = date(2024, 1, 8)
+
+    # Mock sitemap mixing recent, outdated, malformed and irrelevant entries
+    mock_sitemap = '''<?xml version="1.0" encoding="UTF-8"?>
+    <urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+        <url><loc>https://www.monster.com/job-openings/recent-1</loc><lastmod>2024-01-10T00:00:00Z</lastmod></url>
+        <url><loc>https://www.monster.com/job-openings/old</loc><lastmod>2023-12-01T00:00:00Z</lastmod></url>
+        <url><loc>not a url</loc><lastmod>2024-01-10</lastmod></url>
+        <url><loc>https://www.monster.com/job-openings/bad-date</loc><lastmod>yesterday</lastmod></url>
+        <url><loc>https://www.monster.com/sitemaps/other.xml.gz</loc><lastmod>2024-01-10</lastmod></url>
+        <url><loc>https://www.monster.com/job-openings/no-lastmod</loc></url>
+        <url><loc>https://www.monster.com/job-openings/recent-2</loc><lastmod>2024-01-09</lastmod></url>
+        <url><loc>https://www.monster.com/job-openings/recent-3</loc><lastmod>2024-01-08</lastmod></url>
+    </urlset>
+    '''
+
+    def setUp(self):
+        tmp = tempfile.NamedTemporaryFile(suffix='.xml.gz', delete=False)
+        tmp.close()
+        with gzip.open(tmp.name, 'wt', encoding='utf-8') as f:
+            f.write(self.mock_sitemap)
+        self.sitemap_file = tmp.name
+
+    def tearDown(self):
+        os.remove(self.sitemap_file)
+
+    def test_streaming_filters_entries(self):
+        urls = list(parse_xml_and_filter_urls(self.sitemap_file, self.namespace, self.cutoff_date))
+
+        self.assertEqual(urls, [
+            'https://www.monster.com/job-openings/recent-1',
+            'https://www.monster.com/job-openings/recent-2',
+            'https://www.monster.com/job-openings/recent-3',
+        ])
+
+    def test_streaming_matches_full_parse(self):
+        for max_urls in (1, 2, 10):
+            streamed = list(parse_xml_and_filter_urls(self.sitemap_file, self.namespace, self.cutoff_date, max_urls))
+            full = list(parse_xml_and_filter_urls(
+                self.sitemap_file, self.namespace, self.cutoff_date, max_urls, streaming=False))
+            self.assertEqual(streamed, full)
+
+    def test_reports_whether_the_cap_cut_the_file_short(self):
+        for max_urls, read_whole_file in ((2, False), (3, True), (10, True)):
+            with self.subTest(max_urls=max_urls):
+                entries = filter_job_entries(self.sitemap_file, self.namespace, self.cutoff_date, max_urls)
+                with self.assertRaises(StopIteration) as stop:
+                    while True:
+                        next(entries)
+                self.assertIs(stop.exception.value, read_whole_file)
+
+    def test_crawl_state_skips_unchanged_entries(self):
+        db_path = self.sitemap_file + '.sqlite'
+        try:
+            with CrawlState(db_path) as crawl_state:
+                # recent-1 was scraped at this lastmod, recent-2 at an older one, recent-3 failed
+                crawl_state.record('https://www.monster.com/job-openings/recent-1', '2024-01-10T00:00:00Z', 200,
+                                   {'job_title': 'Software Engineer'})
+                crawl_state.record('https://www.monster.com/job-openings/recent-2', '2024-01-01', 200,
+                                   {'job_title': 'Data Analyst'})
+                crawl_state.record('https://www.monster.com/job-openings/recent-3', '2024-01-08', None)
+
+                urls = list(parse_xml_and_filter_urls(
+                    self.sitemap_file, self.namespace, self.cutoff_date, crawl_state=crawl_state))
+
+                # recent-2 now answers 410 at its current lastmod; each entry is decided from one lookup
+                crawl_state.record('https://www.monster.com/job-openings/recent-2', '2024-01-09', 410)
+                with patch.object(crawl_state, 'skip_reason', wraps=crawl_state.skip_reason) as skip_reason:
+                    remaining = list(parse_xml_and_filter_urls(
+                        self.sitemap_file, self.namespace, self.cutoff_date, crawl_state=crawl_state))
+        finally:
+            os.remove(db_path)
+
+        self.assertEqual(urls, [
+            'https://www.monster.com/job-openings/recent-2',
+            'https://www.monster.com/job-openings/recent-3',
+        ])
+        self.assertEqual(remaining, ['https://www.monster.com/job-openings/recent-3'])
+        self.assertEqual(skip_reason.call_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import threading
+import time
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from pipeline import run_pipeline
+
+
+# Mock job page returned by the fake fetcher
+MOCK_HTML_CONTENT = b'''
+<html>
+    <body>
+        <h2 class="header-style__JobViewHeaderJobName-sc-c5940466-9">Software Engineer</h2>
+        <li class="header-style__JobViewHeaderCompanyName-sc-c5940466-12">Tech Corp</li>
+        <div class="description-styles__DescriptionContainerInner-sc-78eb761c-2">
+            Develop and maintain software solutions
+        </div>
+        <ul class="skill-list-clamped-styles__SkillsContainerInner-sc-5a5d6754-0">
+            <li>Python</li>
+        </ul>
+    </body>
+</html>
+'''
+
+
+class TestRunPipeline(unittest.TestCase):
+    def test_pipeline_parses_and_writes_every_page(self):
+        writer_threads = set()
+        results = {}
+        failures = []
+
+        def fake_fetch(url):
+            time.sleep(0.01)
+            return (None, 404) if url.endswith('/404') else (MOCK_HTML_CONTENT, 200)
+
+        def on_result(url, job_details):
+            writer_threads.add(threading.current_thread().name)
+            results[url] = job_details
+
+        urls = [f'https://www.monster.com/job-openings/{i}' for i in range(20)] + ['https://www.monster.com/404']
+        run_pipeline(urls, on_result, on_failure=lambda url, status: failures.append(url),
+                     fetch_workers=4, parse_workers=2, queue_size=4, fetch=fake_fetch)
+
+        self.assertEqual(len(results), 20)
+        self.assertEqual(failures, ['https://www.monster.com/404'])
+        self.assertEqual(writer_threads, {'pipeline-writer'})  # One writer stage only
+        self.assertEqual(results['https://www.monster.com/job-openings/0']['requirements'], ['Python'])
+
+    def test_pipeline_applies_backpressure_to_fetchers(self):
+        fetched = []
+
+        def fake_fetch(url):
+            fetched.append(url)
+            return MOCK_HTML_CONTENT, 200
+
+        def slow_writer(url, job_details):
+            time.sleep(0.05)
+
+        urls = (f'https://www.monster.com/job-openings/{i}' for i in range(30))
+        thread = threading.Thread(target=run_pipeline, args=(urls, slow_writer),
+                                  kwargs={'fetch_workers': 2, 'parse_workers': 1, 'queue_size': 2, 'fetch': fake_fetch})
+        thread.start()
+        time.sleep(1)
+        # Fetchers can only run a bounded distance ahead of the slow writer
+        self.assertLess(len(fetched), 30)
+        thread.join()
+        self.assertEqual(len(fetched), 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
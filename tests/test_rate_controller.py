@@ -0,0 +1,105 @@
+import unittest
+import threading
+import time
+import sys
+import os
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import scraper
+from rate_controller import AdaptiveRateController, parse_retry_after
+
+URL = 'https://www.monster.com/job-openings/job-1'
+
+
+class ThrottlingHandler(BaseHTTPRequestHandler):
+    """Answers the first request with 429 and a one second Retry-After, then serves a page."""
+    requests_seen = 0
+
+    def do_GET(self):
+        type(self).requests_seen += 1
+        if self.requests_seen == 1:
+            self.send_response(429)
+            self.send_header('Retry-After', '1')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = b'<html><h2>Data Engineer</h2></html>'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep test output clean
+
+
+class TestAdaptiveRateController(unittest.TestCase):
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after('120'), 120.0)
+        self.assertAlmostEqual(parse_retry_after(formatdate(time.time() + 30, usegmt=True)), 30, delta=2)
+        self.assertEqual(parse_retry_after(formatdate(time.time() - 30, usegmt=True)), 0.0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after('soon'))
+
+    def test_additive_increase_and_multiplicative_decrease(self):
+        controller = AdaptiveRateController(initial_rate=1.0, max_rate=1.2, increase=0.1, decrease=0.5, cooldown=60)
+        for _ in range(5):
+            controller.record(URL, 200, latency=0.1)
+        self.assertAlmostEqual(controller.rates()['www.monster.com'], 1.2)  # Capped at max_rate
+
+        controller.record(URL, 429)
+        controller.record(URL, 503)  # Within the cooldown: one burst of pushback is one cut
+        controller.record(URL, None)
+        self.assertAlmostEqual(controller.rates()['www.monster.com'], 0.6)
+
+        controller.record(URL, 404, latency=0.1)  # Neither success nor pushback: rate unchanged
+        self.assertAlmostEqual(controller.rates()['www.monster.com'], 0.6)
+
+    def test_rising_latency_slows_down(self):
+        controller = AdaptiveRateController(initial_rate=1.0, decrease=0.5, latency_factor=2.0, cooldown=0)
+        for _ in range(5):
+            controller.record(URL, 200, latency=0.1)
+        rate = controller.rates()['www.monster.com']
+        for _ in range(10):
+            controller.record(URL, 200, latency=1.0)
+        self.assertLess(controller.rates()['www.monster.com'], rate / 2)
+
+    def test_hosts_are_paced_independently(self):
+        controller = AdaptiveRateController(initial_rate=0.5)
+        self.assertEqual(controller._claim(URL), 0)
+        self.assertAlmostEqual(controller._claim(URL), 2.0, delta=0.05)
+        self.assertEqual(controller._claim('https://example.com/job'), 0)
+
+    def test_retry_after_pauses_the_host(self):
+        controller = AdaptiveRateController(initial_rate=100.0)
+        controller.record(URL, 429, retry_after='3')
+        self.assertAlmostEqual(controller._claim(URL), 3.0, delta=0.05)
+
+    def test_fetch_waits_out_retry_after(self):
+        ThrottlingHandler.requests_seen = 0
+        server = ThreadingHTTPServer(('127.0.0.1', 0), ThrottlingHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_address[1]}/job-openings/job-1'
+        controller = AdaptiveRateController(initial_rate=100.0, max_rate=100.0)
+        scraper.set_rate_controller(controller)
+        try:
+            self.assertEqual(scraper.fetch_job_page(url), (None, 429))
+            start = time.monotonic()
+            html, status = scraper.fetch_job_page(url)  # The retry, as the RetryQueue would make it
+            elapsed = time.monotonic() - start
+        finally:
+            scraper.set_rate_controller(None)
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual((html, status), (b'<html><h2>Data Engineer</h2></html>', 200))
+        self.assertEqual(ThrottlingHandler.requests_seen, 2)
+        self.assertGreaterEqual(elapsed, 0.9)  # The controller paused the host for Retry-After
+        self.assertLess(elapsed, 3.0)
+        self.assertLess(controller.rates()[f'127.0.0.1:{server.server_address[1]}'], 100.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
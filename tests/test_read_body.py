@@ -0,0 +1,108 @@
+import unittest
+import gzip
+import json
+import threading
+import zlib
+import sys
+import os
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import requests
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+import scraper
+from http_client import read_body, ResponseTooLarge, ACCEPT_ENCODING, brotli
+from jsonld import job_posting_seen
+from rate_controller import AdaptiveRateController
+
+POSTING = {'@type': 'JobPosting', 'title': 'Data Engineer', 'hiringOrganization': {'name': 'Tech Corp'},
+           'description': 'Build pipelines.', 'skills': 'Python',
+           'baseSalary': {'currency': 'USD', 'value': {'value': 80000, 'unitText': 'YEAR'}}}
+PAGE = (b'<html><head><script type="application/ld+json">' + json.dumps(POSTING).encode() +
+        b'</script></head><body>' + b'<p>Filler text about the company.</p>' * 20000 + b'</body></html>')
+
+
+def deflate(data, wbits):
+    compressor = zlib.compressobj(wbits=wbits)
+    return compressor.compress(data) + compressor.flush()
+
+
+ENCODINGS = {
+    'gzip': gzip.compress,
+    'deflate': lambda data: deflate(data, zlib.MAX_WBITS),
+    'raw-deflate': lambda data: deflate(data, -zlib.MAX_WBITS),  # Sent as "deflate" by some servers
+}
+if brotli is not None:
+    ENCODINGS['br'] = brotli.compress
+
+
+class EncodingHandler(BaseHTTPRequestHandler):
+    """Serves PAGE at /<encoding>, and an oversized page at /big."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        name = self.path.strip('/')
+        body = b'x' * 200_000 if name == 'big' else ENCODINGS.get(name, lambda data: data)(PAGE)
+        self.send_response(200)
+        if name in ENCODINGS:
+            self.send_header('Content-Encoding', 'deflate' if name == 'raw-deflate' else name)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client stopped reading early
+
+    def log_message(self, format, *args):
+        pass  # Keep test output clean
+
+
+class TestReadBody(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), EncodingHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def get(self, path):
+        response = requests.get(f'{self.base_url}/{path}', stream=True, timeout=10)
+        self.addCleanup(response.close)
+        return response
+
+    def test_every_advertised_encoding_is_decoded(self):
+        self.assertEqual('br' in ACCEPT_ENCODING, brotli is not None)
+        for name in ['identity', *ENCODINGS]:
+            with self.subTest(encoding=name):
+                content, wire_bytes = read_body(self.get(name))
+                self.assertEqual(content, PAGE)
+                if name != 'identity':
+                    self.assertLess(wire_bytes, len(PAGE) / 10)
+
+    def test_bodies_over_the_limit_are_abandoned(self):
+        with self.assertRaises(ResponseTooLarge):
+            read_body(self.get('big'), max_bytes=100_000)  # Refused on Content-Length
+        with self.assertRaises(ResponseTooLarge):
+            read_body(self.get('gzip'), max_bytes=100_000)  # Small on the wire, too large once decoded
+
+        # A fetch of an oversized page fails once, without retries
+        scraper.set_rate_controller(AdaptiveRateController(initial_rate=100.0, max_rate=100.0))
+        scraper.set_page_limits(max_page_bytes=100_000)
+        try:
+            self.assertIsNone(scraper.scrape_job_page(f'{self.base_url}/big'))
+            self.assertEqual(scraper.fetch_job_page(f'{self.base_url}/big'), (None, 200))
+        finally:
+            scraper.set_rate_controller(None)
+            scraper.set_page_limits()
+
+    def test_reading_stops_once_the_job_posting_is_in(self):
+        content, _ = read_body(self.get('identity'), stop_when=job_posting_seen)
+        self.assertLess(len(content), len(PAGE) / 10)
+        self.assertEqual(scraper.parse_job_html(content)['job_title'], 'Data Engineer')
+
+
+if __name__ == '__main__':
+    unittest.main()
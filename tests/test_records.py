@@ -0,0 +1,49 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from records import JobBatch, JobRecord
+from crawl_state import content_hash
+
+
+def parsed(text):
+    """A new copy of text, as a parser would produce it."""
+    return text.encode('utf-8').decode('utf-8')
+
+
+class TestJobRecord(unittest.TestCase):
+    job_details = {
+        'job_title': 'Software Engineer',
+        'employer': 'Tech Corp',
+        'description': 'Develop and maintain software solutions',
+        'salary': 'None',
+        'requirements': ['Python', 'Django']
+    }
+
+    def test_repeated_strings_are_stored_once(self):
+        first = JobRecord.from_details({'employer': parsed('Tech Corp'), 'requirements': [parsed('Python')]})
+        second = JobRecord.from_details({'employer': parsed('Tech Corp'), 'requirements': [parsed('Python')]})
+        self.assertIs(first.employer, second.employer)
+        self.assertIs(first.requirements[0], second.requirements[0])
+        with self.assertRaises(AttributeError):
+            first.location = 'New York'  # No per-record __dict__
+
+    def test_missing_values_round_trip(self):
+        record = JobRecord.from_details(self.job_details)
+        self.assertIsNone(record.salary)
+        self.assertIsNone(JobRecord.from_details({'requirements': 'None'}).requirements)
+        self.assertEqual(record.to_details(), self.job_details)
+        self.assertEqual(content_hash(record), content_hash(self.job_details))  # Crawl state hashes are unchanged
+
+    def test_batch_columns(self):
+        batch = JobBatch(extra_columns=['Duplicate Cluster'])
+        batch.append(JobRecord.from_details(self.job_details), 'abc')
+        batch.append(JobRecord(job_title='Data Analyst'), None)
+        self.assertEqual(len(batch), 2)
+        self.assertEqual(batch.column('requirements'), [('Python', 'Django'), None])
+        self.assertEqual(batch.text_column('requirements'), ["['Python', 'Django']", 'None'])
+        self.assertEqual(batch.text_column('Duplicate Cluster'), ['abc', 'None'])
+
+
+if __name__ == '__main__':
+    unittest.main()
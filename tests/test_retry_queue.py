@@ -0,0 +1,94 @@
+import unittest
+import gzip
+import tempfile
+import time
+from datetime import datetime
+from unittest import mock
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from retry_queue import RetryQueue
+from crawl_state import CrawlState
+from sitemap_parser import process_xml_file
+
+
+def write_sitemap(path, urls):
+    lastmod = datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ')
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>'
+                '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">')
+        for url in urls:
+            f.write(f'<url><loc>{url}</loc><lastmod>{lastmod}</lastmod></url>')
+        f.write('</urlset>')
+
+
+class TestRetryQueue(unittest.TestCase):
+
+    def test_failed_urls_wait_while_fresh_urls_are_fetched(self):
+        retries = RetryQueue(base_delay=0.2)
+        fetched = []
+        start = time.monotonic()
+        for url in retries.urls(['a', 'b', 'c']):
+            fetched.append(url)
+            if url == 'a' and fetched.count('a') == 1:
+                self.assertTrue(retries.failed(url, 503))
+            else:
+                retries.succeeded(url)
+
+        self.assertEqual(fetched, ['a', 'b', 'c', 'a'])  # No idling before b and c
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)  # The retry still waited out its backoff
+        self.assertEqual(len(retries), 0)
+
+    def test_permanent_and_exhausted_failures_are_final(self):
+        retries = RetryQueue(max_attempts=2, base_delay=0)
+        fetched = []
+        for url in retries.urls(['gone', 'flaky', 'forbidden']):
+            fetched.append(url)
+            status = {'gone': 404, 'flaky': None, 'forbidden': 403}[url]
+            scheduled = retries.failed(url, status)
+            self.assertEqual(scheduled, url == 'flaky' and fetched.count('flaky') == 1)
+
+        self.assertEqual(fetched, ['gone', 'flaky', 'forbidden', 'flaky'])
+
+
+class TestProcessXmlFileRetries(unittest.TestCase):
+
+    def test_gone_pages_are_recorded_and_skipped_next_run(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        sitemap = os.path.join(tmp_dir.name, 'sitemap_1.xml.gz')
+        output_csv = os.path.join(tmp_dir.name, 'jobs.csv')
+        urls = [f'https://www.monster.com/job-openings/{name}' for name in ('ok', 'flaky', 'gone')]
+        write_sitemap(sitemap, urls)
+        fetched = []
+
+        def fake_scrape_job_page_once(url):
+            name = url.rsplit('/', 1)[1]
+            fetched.append(name)
+            if name == 'gone' or (name == 'flaky' and fetched.count('flaky') == 1):
+                return None, 404 if name == 'gone' else 503
+            return {'job_title': name, 'employer': 'Tech Corp', 'salary': 'None', 'description': 'None',
+                    'requirements': 'None'}, 200
+
+        with CrawlState(os.path.join(tmp_dir.name, 'state.db')) as crawl_state, \
+                mock.patch('sitemap_parser.scrape_job_page_once', fake_scrape_job_page_once), \
+                mock.patch('sitemap_parser.RetryQueue', lambda rate_controller: RetryQueue(base_delay=0)):
+            self.assertTrue(process_xml_file(sitemap, output_csv, num_urls=10, crawl_state=crawl_state))
+            self.assertEqual(fetched, ['ok', 'flaky', 'gone', 'flaky'])
+            self.assertEqual(crawl_state.get(urls[1])['status'], 200)
+            self.assertEqual(crawl_state.get(urls[2])['status'], 404)
+
+            # Nothing changed in the sitemap, so the next run has nothing left to fetch
+            fetched.clear()
+            process_xml_file(sitemap, output_csv, num_urls=10, crawl_state=crawl_state)
+            self.assertEqual(fetched, [])
+
+            # With a cap of one URL, a sitemap of two is cut short
+            write_sitemap(sitemap, ['https://www.monster.com/job-openings/new-1',
+                                    'https://www.monster.com/job-openings/new-2'])
+            self.assertFalse(process_xml_file(sitemap, output_csv, num_urls=1, crawl_state=crawl_state))
+            self.assertEqual(fetched, ['new-1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
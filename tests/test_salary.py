@@ -0,0 +1,47 @@
+import unittest
+import time
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from salary import parse_salary, extract_salary_from_text
+
+
+class TestParseSalary(unittest.TestCase):
+
+    def test_normalised_salaries(self):
+        cases = {
+            'Annual compensation $80,000 per year.': (80000, 80000, 'USD', 'year', '$80,000 per year'),
+            'Pay: $50,000 - $70,000 per year': (50000, 70000, 'USD', 'year', '$50,000 - $70,000 per year'),
+            'Salary 80,000 USD per year': (80000, 80000, 'USD', 'year', '80,000 USD per year'),
+            'Pay rate $25.50/hr, great team': (25.5, 25.5, 'USD', 'hour', '$25.50/hr'),
+            'Earn £30k to £35k annually': (30000, 35000, 'GBP', 'year', '£30k to £35k annually'),
+            'Starting wage €2,400 a month': (2400, 2400, 'EUR', 'month', '€2,400 a month'),
+            'Salary $90,000 DOE': (90000, 90000, 'USD', None, '$90,000'),
+        }
+        for text, (minimum, maximum, currency, period, raw) in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(parse_salary(text), {'min': minimum, 'max': maximum, 'currency': currency,
+                                                      'period': period, 'raw': raw})
+
+    def test_amounts_that_are_not_salaries(self):
+        for text in ['We pay well. Call 555 1234 today', 'Posted 3 days ago, $5 coupon inside',
+                     'Great pay. Parking costs $5', 'Salary: competitive', '']:
+            with self.subTest(text=text):
+                self.assertIsNone(parse_salary(text))
+                self.assertEqual(extract_salary_from_text(text), 'None')
+
+    def test_extract_salary_from_text_keeps_amount_format(self):
+        self.assertEqual(extract_salary_from_text('Annual compensation $80,000 per year.'), '$80,000')
+        self.assertEqual(extract_salary_from_text('$50,000 - $70,000 per year'), '$50,000 - $70,000')
+        self.assertEqual(extract_salary_from_text('Salary 80,000 USD per year'), '80,000 USD')
+
+    def test_linear_time_on_adversarial_text(self):
+        # Keyword-dense text with no amount made the old regex backtrack quadratically (seconds at 50k chars)
+        text = 'competitive pay and rate of pay reviewed with salary and compensation per year ' * 2500
+        start = time.perf_counter()
+        self.assertIsNone(parse_salary(text))
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,6 +6,7 @@ import requests
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
 from src.scraper import scrape_job_page
 
 class TestScrapeJobPage(TestCase):
@@ -33,16 +34,20 @@ class TestScrapeJobPage(TestCase):
 
 
 
-    @mock.patch('Monster_job_scraper_main.requests.get')
-    def test_scrape_job_page_retries(self, mock_get):
+    @mock.patch('src.scraper.get_session')
+    def test_scrape_job_page_retries(self, mock_get_session):
+        mock_get = mock_get_session.return_value.get
+
         # Mock a 500 error response initially, then a successful response with HTML content
         mock_response_500 = mock.Mock()
         mock_response_500.status_code = 500
         mock_response_500.raise_for_status.side_effect = requests.exceptions.HTTPError()
 
+        # Job pages are streamed and decoded by read_body(), so the body comes from raw.stream()
         mock_response_200 = mock.Mock()
         mock_response_200.status_code = 200
-        mock_response_200.content = self.mock_html_content
+        mock_response_200.headers = {'Content-Type': 'text/html; charset=utf-8'}
+        mock_response_200.raw.stream.return_value = iter([self.mock_html_content.encode('utf-8')])
 
         # Simulate retry: return a 500 error on the first call and success on the second call
         mock_get.side_effect = [mock_response_500, mock_response_200]
@@ -52,6 +57,8 @@ class TestScrapeJobPage(TestCase):
 
         # Ensure requests.get was called twice (one retry)
         self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(dummy_request['job_title'], 'Software Engineer')
+        self.assertEqual(dummy_request['requirements'], ['Python', 'Django'])
 
     def test_scrape_job_page_parsing(self):
         # Test parsing directly with mock HTML content, without using requests.get
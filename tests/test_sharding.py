@@ -0,0 +1,101 @@
+import unittest
+import gzip
+import json
+import tempfile
+from collections import Counter
+from datetime import datetime, timedelta
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from sharding import shard_of, shard_path, merge_shards
+from sitemap_parser import parse_xml_and_filter_urls
+from writers import DUPLICATE_CLUSTER_FIELD, FIELDNAMES, iter_rows, open_writer
+
+
+class TestSharding(unittest.TestCase):
+    urls = [f'https://www.monster.com/job-openings/job-{i}' for i in range(1000)]
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_shard_of_is_stable_and_balanced(self):
+        # Fixed values: every worker, on any machine, must agree on who owns a URL
+        self.assertEqual(shard_of('https://www.monster.com/job-openings/job-1', 4), 3)
+        self.assertEqual(shard_of('https://www.monster.com/job-openings/job-2', 4), 1)
+
+        counts = Counter(shard_of(url, 4) for url in self.urls)
+        self.assertEqual(set(counts), {0, 1, 2, 3})
+        for count in counts.values():
+            self.assertAlmostEqual(count, 250, delta=50)
+
+    def test_shards_partition_sitemap_urls(self):
+        sitemap_file = os.path.join(self.tmp_dir.name, 'sitemap.xml.gz')
+        lastmod = datetime.now().strftime('%Y-%m-%d')
+        with gzip.open(sitemap_file, 'wt', encoding='utf-8') as f:
+            f.write('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">')
+            f.writelines(f'<url><loc>{url}</loc><lastmod>{lastmod}</lastmod></url>' for url in self.urls[:100])
+            f.write('</urlset>')
+
+        namespace = {'ns': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
+        cutoff_date = (datetime.now() - timedelta(weeks=1)).date()
+        shards = [
+            list(parse_xml_and_filter_urls(sitemap_file, namespace, cutoff_date, max_urls=100,
+                                           shard=(shard_index, 3)))
+            for shard_index in range(3)
+        ]
+        self.assertEqual(sorted(url for shard in shards for url in shard), sorted(self.urls[:100]))
+        for shard_index, shard in enumerate(shards):
+            self.assertTrue(all(shard_of(url, 3) == shard_index for url in shard))
+
+    def test_merge_shards_drops_duplicates(self):
+        output_path = os.path.join(self.tmp_dir.name, 'jobs.jsonl')
+        jobs = [{'job_title': f'Job {i}', 'employer': 'Tech Corp', 'salary': 'None', 'description': 'None',
+                 'requirements': ['Python', 'SQL'] if i % 2 else 'None'} for i in range(6)]
+        # Job 2 was posted under two URLs that landed in different shards
+        shard_jobs = [jobs[0:3], jobs[3:6] + [jobs[2]]]
+        for shard_index, shard in enumerate(shard_jobs):
+            with open_writer(shard_path(output_path, shard_index, 2)) as writer:
+                for job_details in shard:
+                    writer.write(job_details)
+
+        self.assertEqual(merge_shards(output_path, 2), 6)
+        with open(output_path, encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual([row['Job Title'] for row in rows], [f'Job {i}' for i in range(6)])
+        self.assertEqual(rows[1]['Requirements'], ['Python', 'SQL'])
+        self.assertIsNone(rows[0]['Requirements'])
+
+    def test_merging_again_replaces_the_output_and_keeps_clusters(self):
+        output_path = os.path.join(self.tmp_dir.name, 'jobs.csv')
+        fieldnames = FIELDNAMES + [DUPLICATE_CLUSTER_FIELD]
+        for shard_index in range(2):
+            with open_writer(shard_path(output_path, shard_index, 2), fieldnames=fieldnames) as writer:
+                for i in range(3):
+                    writer.write({'job_title': f'Job {shard_index}-{i}'}, extra=[f'cluster-{i}'])
+
+        for _ in range(2):
+            self.assertEqual(merge_shards(output_path, 2), 6)
+        rows = list(iter_rows(output_path))
+        self.assertEqual(len(rows), 6)  # Not doubled by the second merge
+        self.assertEqual(list(rows[0]), fieldnames)
+        self.assertEqual([row[DUPLICATE_CLUSTER_FIELD] for row in rows], [f'cluster-{i}' for i in range(3)] * 2)
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)),
+                         ['jobs.csv', 'jobs.shard-0-of-2.csv', 'jobs.shard-1-of-2.csv'])
+
+    def test_missing_shards_leave_the_output_alone(self):
+        output_path = os.path.join(self.tmp_dir.name, 'jobs.csv')
+        with open_writer(output_path) as writer:
+            writer.write({'job_title': 'Software Engineer'})
+        with open_writer(shard_path(output_path, 0, 3)) as writer:
+            writer.write({'job_title': 'Data Analyst'})
+
+        with self.assertRaises(FileNotFoundError):
+            merge_shards(output_path, 3)  # Shards 1 and 2 were never written
+        self.assertEqual([row['Job Title'] for row in iter_rows(output_path)], ['Software Engineer'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import json
+import logging
+import tempfile
+import threading
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from structured_logging import configure_logging
+from metrics import metrics
+
+
+class FormattedOn:
+    """Log argument that remembers which thread turned it into text."""
+
+    def __init__(self):
+        self.threads = []
+
+    def __str__(self):
+        self.threads.append(threading.current_thread().name)
+        return 'https://www.monster.com/job-openings/job-1'
+
+
+class TestStructuredLogging(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.tmp_dir.name, 'job_scraper.log')
+        root = logging.getLogger()
+        saved = (list(root.handlers), list(root.filters), root.level)
+
+        def restore():
+            for handler in list(root.handlers):
+                root.removeHandler(handler)
+                handler.close()
+            root.handlers[:], root.filters[:] = saved[0], saved[1]
+            root.setLevel(saved[2])
+            self.tmp_dir.cleanup()
+        self.addCleanup(restore)
+
+    def read_log(self):
+        with open(self.log_file, encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_records_are_formatted_and_written_off_the_logging_thread(self):
+        listener = configure_logging(self.log_file, structured=True, async_logging=True)
+        url = FormattedOn()
+        logging.info("Fetched URL: %s", url, extra={'event': 'page_fetched', 'url': 'job-1', 'stage': 'fetch',
+                                                   'status': 200, 'duration': 0.1234567})
+        logging.error("Error scraping %s", 'job-2', extra={'url': 'job-2', 'stage': 'fetch'})
+        listener.stop()
+        listener.stop()  # Stopping again (as at exit) is harmless
+
+        first, second = self.read_log()
+        self.assertEqual(first['message'], 'Fetched URL: https://www.monster.com/job-openings/job-1')
+        self.assertEqual((first['event'], first['url'], first['stage'], first['status'], first['duration']),
+                         ('page_fetched', 'job-1', 'fetch', 200, 0.123457))
+        self.assertEqual((second['level'], second['url']), ('ERROR', 'job-2'))
+        self.assertNotIn(threading.current_thread().name, url.threads)  # Formatted by the listener thread
+
+    def test_per_page_events_are_sampled_and_rate_limited(self):
+        metrics.reset()
+        configure_logging(self.log_file, structured=True, sample_rate=0.0)
+        logging.info("Fetched URL: %s", 'job-1', extra={'event': 'page_fetched'})
+        logging.warning("Fetched URL: %s", 'job-2', extra={'event': 'page_fetched'})  # Warnings always pass
+        logging.info("Run summary written")  # So do records that aren't per-page events
+
+        listener = configure_logging(self.log_file, structured=True, async_logging=True, max_events_per_second=5)
+        for i in range(50):
+            logging.info("Fetched URL: %s", f'job-{i}', extra={'event': 'page_fetched'})
+        listener.stop()
+
+        messages = [entry['message'] for entry in self.read_log()]
+        self.assertEqual(messages[:2], ['Fetched URL: job-2', 'Run summary written'])
+        self.assertEqual(messages[2:], [f'Fetched URL: job-{i}' for i in range(5)])  # Burst capped at 5
+        self.assertEqual(metrics.summary()['counters']['log_events_dropped'], [
+            {'event': 'page_fetched', 'reason': 'rate_limited', 'value': 45},
+            {'event': 'page_fetched', 'reason': 'sampled', 'value': 1},
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
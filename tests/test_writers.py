@@ -0,0 +1,122 @@
+import unittest
+import csv
+import json
+import tempfile
+import threading
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from writers import open_writer, parquet_parts, FIELDNAMES, PARQUET_PART_ROWS
+
+
+class TestBatchWriter(unittest.TestCase):
+    job_details = {
+        'job_title': 'Software Engineer',
+        'employer': 'Tech Corp',
+        'description': 'Develop and maintain software solutions',
+        'salary': '80,000 USD',
+        'requirements': ['Python', 'Django']
+    }
+    job_details_missing = {
+        'job_title': 'Data Analyst',
+        'employer': 'None',
+        'description': 'None',
+        'salary': 'None',
+        'requirements': 'None'
+    }
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_csv_writer_buffers_until_batch_is_full(self):
+        path = os.path.join(self.tmp_dir.name, 'jobs.csv')
+        writer = open_writer(path, batch_size=2, flush_interval=3600)
+
+        writer.write(self.job_details)
+        self.assertEqual(writer.rows_written, 0)  # Still buffered
+        writer.write(self.job_details_missing)
+        self.assertEqual(writer.rows_written, 2)
+        writer.close()
+
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['Requirements'], "['Python', 'Django']")  # Same format as before
+        self.assertEqual(rows[1]['Employer'], 'None')
+
+    def test_stale_batch_is_flushed_without_another_write(self):
+        path = os.path.join(self.tmp_dir.name, 'jobs.csv')
+        flushed = threading.Event()
+        with open_writer(path, batch_size=100, flush_interval=0.1) as writer:
+            writer.flush_listeners.append(lambda tags, position: flushed.set())
+            writer.write(self.job_details, tag='job-1')
+            self.assertTrue(flushed.wait(5))  # The timer flushed the lone row
+            self.assertEqual(writer.rows_written, 1)
+
+    def test_csv_writer_appends_without_repeating_header(self):
+        path = os.path.join(self.tmp_dir.name, 'jobs.csv')
+        for _ in range(2):
+            with open_writer(path) as writer:
+                writer.write(self.job_details)
+
+        with open(path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[0], ','.join(f'"{name}"' for name in FIELDNAMES))
+
+    def test_jsonl_writer_keeps_requirements_as_list(self):
+        path = os.path.join(self.tmp_dir.name, 'jobs.jsonl')
+        with open_writer(path) as writer:
+            writer.write(self.job_details)
+            writer.write(self.job_details_missing)
+
+        with open(path, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(records[0]['Requirements'], ['Python', 'Django'])
+        self.assertIsNone(records[1]['Requirements'])
+
+    def test_parquet_writer_stores_requirements_as_list_column(self):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest('pyarrow not installed')
+        path = os.path.join(self.tmp_dir.name, 'jobs.parquet')
+        with open_writer(path, batch_size=1) as writer:
+            writer.write(self.job_details)
+            writer.write(self.job_details_missing)
+
+        table = pq.read_table(path)
+        self.assertEqual(table.num_rows, 2)
+        self.assertEqual(table.column('Requirements').to_pylist(), [['Python', 'Django'], None])
+
+    def test_parquet_parts_roll_only_when_durable_or_full(self):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest('pyarrow not installed')
+        for name, durable, part_rows, expected_parts in [('listened', False, PARQUET_PART_ROWS, 1),
+                                                         ('journalled', True, PARQUET_PART_ROWS, 4),
+                                                         ('full', False, 2, 2)]:
+            with self.subTest(name):
+                path = os.path.join(self.tmp_dir.name, f'{name}.parquet')
+                with open_writer(path, batch_size=1, flush_interval=None) as writer:
+                    writer.sink.part_rows = part_rows
+                    writer.durable = durable
+                    writer.flush_listeners.append(lambda tags, position: None)  # Like crawl_state.record_flushed
+                    for _ in range(4):
+                        writer.write(self.job_details)
+
+                parts = parquet_parts(path)
+                self.assertEqual(len(parts), expected_parts)
+                self.assertEqual(sum(pq.read_table(part).num_rows for part in parts), 4)
+
+    def test_unknown_format_raises(self):
+        with self.assertRaises(ValueError):
+            open_writer(os.path.join(self.tmp_dir.name, 'jobs.xlsx'))
+
+
+if __name__ == '__main__':
+    unittest.main()